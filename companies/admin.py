@@ -7,13 +7,15 @@ from django.db.models import Count
 from django.urls import path, reverse
 from django.shortcuts import get_object_or_404, redirect
 from django.utils.html import format_html
-from .models import Company, CompanyContact, ContactEmail, ContactPhone, Certificate
+from .models import Company, CompanyContact, CompanyContactSummary, ContactEmail, ContactPhone, Certificate
 from dictionaries.models import Industry, Kato, Oked, Krp, Product, Tnved
 from programs.models import Program, ProgramParticipation
 
-from .services.excel_builder import excel_builder
+from .services.contact_summary import sort_primary_first
+from .services.excel_builder import excel_builder, prefetch_export_relations
 
 from .services.prg_loader import load_company_data_by_bin, CompanyLoadError
+from .services.search import search_companies
 from django.http import HttpResponse
 from openpyxl import Workbook
 from django.urls import path
@@ -421,13 +423,14 @@ class CompanyContactAdmin(admin.ModelAdmin):
 
     @admin.display(description="Primary Email")
     def primary_email(self, obj: CompanyContact):
-        e = obj.emails.filter(is_primary=True).first() or obj.emails.first()
-        return e.email if e else "-"
+        # emails/phones уже в prefetch — выбираем в памяти, без запроса на строку
+        emails = sort_primary_first(obj.emails.all())
+        return emails[0].email if emails else "-"
 
     @admin.display(description="Primary Phone")
     def primary_phone(self, obj: CompanyContact):
-        p = obj.phones.filter(is_primary=True).first() or obj.phones.first()
-        return p.phone if p else "-"
+        phones = sort_primary_first(obj.phones.all())
+        return phones[0].phone if phones else "-"
 
     @admin.display(description="Emails для рассылки")
     def mailing_emails(self, obj: CompanyContact):
@@ -452,6 +455,9 @@ class CompanyContactInline(admin.TabularInline):
     readonly_fields = ("contact_link", "primary_phone", "primary_email")
     show_change_link = False
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related("phones", "emails")
+
     @admin.display(description="Контакт")
     def contact_link(self, obj: CompanyContact):
         if not obj or not obj.pk:
@@ -463,15 +469,15 @@ class CompanyContactInline(admin.TabularInline):
     def primary_phone(self, obj: CompanyContact):
         if not obj or not obj.pk:
             return "-"
-        p = obj.phones.filter(is_primary=True).first() or obj.phones.order_by("id").first()
-        return p.phone if p else "-"
+        phones = sort_primary_first(obj.phones.all())
+        return phones[0].phone if phones else "-"
 
     @admin.display(description="Email")
     def primary_email(self, obj: CompanyContact):
         if not obj or not obj.pk:
             return "-"
-        e = obj.emails.filter(is_primary=True).first() or obj.emails.order_by("id").first()
-        return e.email if e else "-"
+        emails = sort_primary_first(obj.emails.all())
+        return emails[0].email if emails else "-"
 
 
 # -------------------------
@@ -484,9 +490,12 @@ class CompanyAdmin(admin.ModelAdmin):
     list_display = (
         "name_ru",
         "company_bin",
+        "primary_contact",
         "updated",
     )
 
+    list_select_related = ("contact_summary",)
+
     list_filter = (
         IndustryUsedFilter,
         KatoDrilldownFilter,
@@ -561,12 +570,28 @@ class CompanyAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_search_results(self, request, queryset, search_term):
+        # индексированный поиск (FTS / триграммы / БИН) вместо icontains по search_fields
+        if not search_term:
+            return queryset, False
+        return search_companies(queryset, search_term), False
+
     def get_queryset(self, request):
         qs = super().get_queryset(request)
         # базовая оптимизация: подтягиваем kato одним join
         return qs.select_related("kato", "industry", "primary_oked", "kfc", "kse", "krp").prefetch_related("certificates","program_participations__program",)
 
 
+    @admin.display(description="Контакты")
+    def primary_contact(self, obj: Company):
+        # одна колонка из денормализованной сводки вместо обхода контактов
+        try:
+            summary = obj.contact_summary
+        except CompanyContactSummary.DoesNotExist:
+            return "—"
+        parts = [v for v in (summary.primary_phone, summary.primary_email) if v]
+        return ", ".join(parts) if parts else "—"
+
     @admin.display(description="Сертификаты")
     def certificates_list(self, obj: Company):
         names = list(obj.certificates.values_list("name", flat=True))
@@ -653,26 +678,7 @@ class CompanyAdmin(admin.ModelAdmin):
         # 3) дальше твой код как есть
         cl = self.get_changelist_instance(request)
 
-        companies_qs = (
-            cl.get_queryset(request)
-            .select_related(
-            "industry",
-            "kato",
-            "primary_oked",
-            "kfc",
-            "kse",
-            "krp"
-            )
-            .prefetch_related(
-            "contacts__emails",
-            "contacts__phones",
-            "certificates",
-            "secondary_okeds",
-            "product",
-            "tnveds",
-            "program_participations__program"
-            )
-        )
+        companies_qs = prefetch_export_relations(cl.get_queryset(request))
         filters_info = get_export_filters_values(request)
         filename = build_export_filename(filters_info)
         wb = excel_builder(companies_qs, filters_info)
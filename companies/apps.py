@@ -1,7 +1,23 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def ensure_search_schema(sender, using, **kwargs):
+    # в SQLite триггеры FTS пропадают, когда migrate пересоздаёт таблицу companies
+    from django.db import connections
+    from .services.search import install_search_schema
+
+    conn = connections[using]
+    if conn.vendor == "sqlite" and "companies" in conn.introspection.table_names():
+        install_search_schema(conn)
 
 
 class CompaniesConfig(AppConfig):
     name = 'companies'
     verbose_name = "Реестр компаний"
     verbose_name_plural = "Реестр компаний"
+
+    def ready(self):
+        from . import signals  # noqa: F401
+
+        post_migrate.connect(ensure_search_schema, sender=self)
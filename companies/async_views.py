@@ -0,0 +1,208 @@
+import base64
+import binascii
+import json
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import aauthenticate, get_user_model
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import NotAuthenticated, NotFound, Throttled, ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from users.authentication import token_user_cache
+
+from .filters import ClassifierTreeFilter, CompanySearchFilter
+from .models import Company
+from .pagination import CompanyCursorPagination
+from .serializers import CompanyBinSerializer
+from .services.company_fast import build_company_dicts, fast_company_queryset
+from .services.company_queries import DETAIL_DEFAULT_EXPAND, LIST_DEFAULT_EXPAND, parse_sparse_fieldset
+from .services.detail_cache import detail_etag, detail_variant, get_company_detail, set_company_detail
+from .services.prg_loader import CompanyLoadError, afetch_company_data, save_company_data
+from .throttling import is_expensive_list, throttle_ident, throttle_wait
+
+
+# Асинхронные версии /info/<bin>/, /get-company-data/ и /load-company-data/
+# для ASGI: ответы те же, что у DRF-представлений в views.py, но ожидание
+# PRGAPP и БД не держит поток воркера.
+
+LIST_FILTER_BACKENDS = [CompanySearchFilter, ClassifierTreeFilter]
+
+
+def json_response(data, status=200):
+    return HttpResponse(JSONRenderer().render(data), status=status, content_type="application/json")
+
+
+async def aget_user(request):
+    """
+    Token / Basic / сессия — как у DRF-представлений, но через async ORM.
+    """
+    auth = request.headers.get("Authorization", "").split()
+
+    if len(auth) == 2 and auth[0].lower() == "token":
+        # кэш токенов — в памяти процесса, без обращений к БД и кэшу
+        token = token_user_cache.get(auth[1])
+        if token is not None:
+            return token.user
+        try:
+            token = await Token.objects.select_related("user").aget(key=auth[1])
+        except Token.DoesNotExist:
+            return None
+        if not token.user.is_active:
+            return None
+        token_user_cache.set(auth[1], token)
+        return token.user
+
+    if len(auth) == 2 and auth[0].lower() == "basic":
+        try:
+            userid, _, password = base64.b64decode(auth[1]).decode("utf-8").partition(":")
+        except (binascii.Error, UnicodeDecodeError):
+            return None
+        credentials = {get_user_model().USERNAME_FIELD: userid, "password": password}
+        return await aauthenticate(request, **credentials)
+
+    user = await request.auser()
+    return user if user.is_authenticated else None
+
+
+def error_response(exc):
+    # как exception_handler DRF: строка ошибки — в {"detail": ...}
+    detail = exc.detail if isinstance(exc.detail, (dict, list)) else {"detail": exc.detail}
+    return json_response(detail, status=exc.status_code)
+
+
+def not_authenticated():
+    return json_response({"detail": NotAuthenticated.default_detail}, status=403)
+
+
+async def check_throttle(request, user, scope):
+    """
+    Те же бюджеты, что у DRF-представлений: None или ответ 429 с Retry-After.
+    Счётчики — в кэше "throttle" (обычно Redis/Memcached), поэтому через пул потоков.
+    """
+    auth = request.headers.get("Authorization", "").split()
+    token_key = auth[1] if len(auth) == 2 and auth[0].lower() == "token" else None
+    ident = throttle_ident(token_key, user, request.META.get("REMOTE_ADDR"))
+    wait = await sync_to_async(throttle_wait)(scope, ident)
+    if wait is None:
+        return None
+    response = error_response(Throttled(wait))
+    response["Retry-After"] = str(wait)
+    return response
+
+
+def _detail_data(company_id, updated, variant, sparse):
+    data = get_company_detail(company_id, updated, variant)
+    if data is None:
+        items = build_company_dicts(fast_company_queryset(sparse).filter(pk=company_id), sparse)
+        if not items:
+            return None
+        data = items[0]
+        set_company_detail(company_id, updated, variant, data)
+    return data
+
+
+@require_GET
+async def company_detail(request, company_bin):
+    user = await aget_user(request)
+    if user is None:
+        return not_authenticated()
+    throttled = await check_throttle(request, user, "company_detail")
+    if throttled is not None:
+        return throttled
+
+    try:
+        sparse = parse_sparse_fieldset(request.GET, DETAIL_DEFAULT_EXPAND)
+    except ValidationError as e:
+        return error_response(e)
+
+    row = await (
+        Company.objects
+        .filter(company_bin=company_bin)
+        .values_list("pk", "updated")
+        .afirst()
+    )
+    if row is None:
+        return json_response({"detail": NotFound.default_detail}, status=404)
+    company_id, updated = row
+
+    variant = detail_variant(request.GET, JSONRenderer.format)
+    etag = detail_etag(company_bin, updated, variant)
+    last_modified = int(updated.timestamp())
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    # кэш и батч-запросы сериализации — одним переходом в пул потоков
+    data = await sync_to_async(_detail_data)(company_id, updated, variant, sparse)
+    if data is None:
+        return json_response({"detail": NotFound.default_detail}, status=404)
+
+    response = json_response(data)
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    return response
+
+
+def _list_page(drf_request, sparse):
+    queryset = fast_company_queryset(sparse)
+    for backend in LIST_FILTER_BACKENDS:
+        queryset = backend().filter_queryset(drf_request, queryset, None)
+
+    paginator = CompanyCursorPagination()
+    page = paginator.paginate_queryset(queryset, drf_request)
+    return paginator.get_paginated_response(build_company_dicts(page, sparse)).data
+
+
+@require_GET
+async def company_list(request):
+    user = await aget_user(request)
+    if user is None:
+        return not_authenticated()
+    scope = "company_list_expensive" if is_expensive_list(request.GET) else "company_list"
+    throttled = await check_throttle(request, user, scope)
+    if throttled is not None:
+        return throttled
+
+    try:
+        sparse = parse_sparse_fieldset(request.GET, LIST_DEFAULT_EXPAND)
+        data = await sync_to_async(_list_page)(Request(request), sparse)
+    except (ValidationError, NotFound) as e:
+        return error_response(e)
+
+    return json_response(data)
+
+
+@csrf_exempt
+@require_POST
+async def load_company_data(request):
+    throttled = await check_throttle(request, await aget_user(request), "company_load")
+    if throttled is not None:
+        return throttled
+
+    if request.content_type == "application/json":
+        try:
+            payload = json.loads(request.body or b"{}")
+        except ValueError:
+            return json_response({"detail": "Некорректный JSON."}, status=400)
+    else:
+        payload = request.POST
+
+    serializer = CompanyBinSerializer(data=payload)
+    if not serializer.is_valid():
+        return json_response(serializer.errors, status=400)
+    company_bin = serializer.validated_data["company_bin"]
+
+    try:
+        c_data, g_data = await afetch_company_data(company_bin)
+        result = await sync_to_async(save_company_data)(company_bin, c_data, g_data)
+    except CompanyLoadError as e:
+        return json_response({"error": str(e)}, status=500)
+
+    return json_response(result)
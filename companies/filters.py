@@ -0,0 +1,74 @@
+from functools import reduce
+from operator import or_
+
+from rest_framework import filters
+
+from programs.models import ProgramParticipation
+
+from .services.classifier_tree import CLASSIFIER_TREES, code_prefix_q, node_q
+from .services.search import search_companies
+
+
+def split_param(raw):
+    return [part.strip() for part in (raw or "").split(",") if part.strip()]
+
+
+class CompanySearchFilter(filters.SearchFilter):
+    """
+    ?search= через индексированный поиск (services/search.py)
+    вместо icontains по каждому полю.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        return search_companies(queryset, " ".join(terms))
+
+
+class ClassifierTreeFilter(filters.BaseFilterBackend):
+    """
+    Фильтры по классификаторам с учётом всех потомков узла:
+      ?kato=75,63    ?oked=C    ?krp=100    ?product=<id>
+      ?industry=<id> ?kfc=<код> ?program=<id>
+    Несколько значений одного параметра — ИЛИ, разные параметры — И.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        for name, tree in CLASSIFIER_TREES.items():
+            codes = split_param(request.query_params.get(name))
+            if not codes:
+                continue
+
+            if tree.code_field == "id":
+                codes = [c for c in codes if c.isdigit()]
+
+            nodes = {
+                str(getattr(node, tree.code_field)): node
+                for node in tree.model.objects.filter(**{f"{tree.code_field}__in": codes}).only("id", "path", tree.code_field)
+            }
+
+            # у деревьев без кода (Product — по id) несуществующий id ничего не находит
+            conditions = [
+                node_q(tree, nodes[code]) if code in nodes else code_prefix_q(tree, code)
+                for code in codes
+                if code in nodes or tree.code_field != "id"
+            ]
+            queryset = queryset.filter(reduce(or_, conditions)) if conditions else queryset.none()
+
+        industries = [v for v in split_param(request.query_params.get("industry")) if v.isdigit()]
+        if industries:
+            queryset = queryset.filter(industry_id__in=industries)
+
+        kfcs = split_param(request.query_params.get("kfc"))
+        if kfcs:
+            queryset = queryset.filter(kfc__kfc_code__in=kfcs)
+
+        programs = [v for v in split_param(request.query_params.get("program")) if v.isdigit()]
+        if programs:
+            # через подзапрос, чтобы компании с несколькими участиями не дублировались
+            queryset = queryset.filter(pk__in=ProgramParticipation.objects.filter(
+                program_id__in=programs,
+            ).values("company_id"))
+
+        return queryset
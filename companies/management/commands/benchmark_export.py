@@ -0,0 +1,253 @@
+import json
+import os
+import random
+import resource
+import time
+from datetime import datetime, timezone
+from io import BytesIO
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from companies.models import Company, CompanyContact, ContactEmail, ContactPhone
+from companies.services.contact_summary import rebuild_contact_summaries
+from companies.services.excel_builder import (
+    excel_builder,
+    excel_builder_parallel,
+    prefetch_export_relations,
+)
+from dictionaries.models import Kato, Product
+
+
+# Синтетические компании — зарезервированный диапазон БИН: 12 цифр, как у
+# настоящих (поиск обращается с ними так же), но БИН начинается с ГГММ
+# регистрации, а месяца 99 не бывает — с реальными компаниями не пересекается
+SYNTHETIC_BIN_PREFIX = "9999"
+BATCH_SIZE = 2000
+
+
+def synthetic_bin(i: int) -> str:
+    return f"{SYNTHETIC_BIN_PREFIX}{i:08d}"
+
+
+def all_synthetic_companies():
+    return Company.objects.filter(company_bin__startswith=SYNTHETIC_BIN_PREFIX)
+
+
+def synthetic_companies(size: int):
+    """
+    Первые size синтетических компаний — диапазон по уникальному индексу БИН.
+    """
+    return Company.objects.filter(
+        company_bin__gte=synthetic_bin(0),
+        company_bin__lte=synthetic_bin(size - 1),
+    ).order_by("id")
+
+
+def export_xlsx(companies_qs):
+    wb = excel_builder(prefetch_export_relations(companies_qs), {}, workers=1)
+    buf = BytesIO()
+    wb.save(buf)
+    return buf.getbuffer().nbytes
+
+
+def export_xlsx_parallel(companies_qs):
+    # порог EXPORT_PARALLEL_MIN_ROWS не применяем — меряем именно параллельный режим;
+    # запросы воркеров в счётчик не попадают, считается только родительский процесс
+    workers = max(2, settings.EXPORT_PARALLEL_WORKERS, min(4, os.cpu_count() or 1))
+    wb = excel_builder_parallel(list(companies_qs.values_list("pk", flat=True)), {}, workers)
+    buf = BytesIO()
+    wb.save(buf)
+    return buf.getbuffer().nbytes
+
+
+# Формат экспорта -> функция, которая строит файл целиком и возвращает его размер в байтах
+EXPORTERS = {
+    "xlsx": export_xlsx,
+    "xlsx_parallel": export_xlsx_parallel,
+}
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def peak_rss_kb() -> tuple[int, int]:
+    """
+    Пик RSS (КБ в Linux) самого процесса и самого тяжёлого из завершившихся
+    дочерних — воркеров xlsx_parallel. Оба — максимум за всё время работы,
+    поэтому размеры гоняем по возрастанию.
+    """
+    return (
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+
+
+class Command(BaseCommand):
+    help = "Бенчмарк экспорта компаний на синтетическом каталоге (время, запросы к БД, пиковый RSS)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            default="10000,100000,500000",
+            help="Размеры каталога через запятую (по умолчанию 10000,100000,500000)",
+        )
+        parser.add_argument(
+            "--formats",
+            default=",".join(EXPORTERS),
+            help=f"Форматы экспорта через запятую ({', '.join(EXPORTERS)})",
+        )
+        parser.add_argument("--output", default="bench_export.json", help="Куда записать результаты (JSON)")
+        parser.add_argument("--seed", type=int, default=42, help="Seed генератора синтетических данных")
+        parser.add_argument("--cleanup", action="store_true", help="Удалить синтетические компании после замеров")
+
+    def handle(self, *args, **options):
+        try:
+            sizes = sorted({int(s) for s in options["sizes"].split(",") if s.strip()})
+        except ValueError:
+            raise CommandError("--sizes: ожидаются целые числа через запятую")
+
+        formats = [f.strip() for f in options["formats"].split(",") if f.strip()]
+        unknown = [f for f in formats if f not in EXPORTERS]
+        if unknown:
+            raise CommandError(f"Неизвестные форматы: {', '.join(unknown)}")
+
+        self.ensure_catalog(max(sizes), seed=options["seed"])
+
+        results = []
+        for size in sizes:
+            for fmt in formats:
+                result = self.run_one(fmt, size)
+                results.append(result)
+                self.stdout.write(
+                    f"{fmt:>13} {size:>8}: {result['seconds']:.2f} c, "
+                    f"{result['queries']} запросов, пик RSS {result['peak_rss_kb']} КБ"
+                    f" (воркеры: {result['peak_rss_children_kb']} КБ)"
+                )
+
+        report = {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "db_vendor": connection.vendor,
+            "results": results,
+        }
+        with open(options["output"], "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+        if options["cleanup"]:
+            # весь зарезервированный диапазон — и от прошлых запусков с большими размерами
+            deleted, _ = all_synthetic_companies().delete()
+            self.stdout.write(f"Удалено синтетических записей: {deleted}")
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Результаты записаны в {options['output']}"))
+
+    def run_one(self, fmt, size):
+        exporter = EXPORTERS[fmt]
+        counter = QueryCounter()
+
+        started = time.perf_counter()
+        with connection.execute_wrapper(counter):
+            nbytes = exporter(synthetic_companies(size))
+        seconds = time.perf_counter() - started
+        rss, children_rss = peak_rss_kb()
+
+        return {
+            "format": fmt,
+            "size": size,
+            "seconds": round(seconds, 3),
+            "queries": counter.count,
+            "peak_rss_kb": rss,
+            "peak_rss_children_kb": children_rss,
+            "bytes": nbytes,
+        }
+
+    # -------------------------
+    # Синтетический каталог
+    # -------------------------
+    def ensure_catalog(self, size, seed):
+        existing = set(synthetic_companies(size).values_list("company_bin", flat=True))
+        if len(existing) >= size:
+            self.stdout.write(f"Синтетический каталог на {size} компаний уже есть — переиспользуем")
+            return
+
+        self.stdout.write(f"Генерируем синтетические компании: {len(existing)} -> {size}")
+        rnd = random.Random(seed + len(existing))
+        missing = [i for i in range(size) if synthetic_bin(i) not in existing]
+
+        kato_ids = list(Kato.objects.filter(children__isnull=True).values_list("id", flat=True))
+        product_ids = list(Product.objects.values_list("id", flat=True))
+
+        # Распределение по КАТО неравномерное: несколько регионов собирают большую часть компаний
+        kato_weights = [1.0 / (rank + 1) for rank in range(len(kato_ids))]
+
+        for start in range(0, len(missing), BATCH_SIZE):
+            with transaction.atomic():
+                self.create_batch(rnd, missing[start:start + BATCH_SIZE], kato_ids, kato_weights, product_ids)
+
+    def create_batch(self, rnd, indexes, kato_ids, kato_weights, product_ids):
+        companies = []
+        for i in indexes:
+            companies.append(Company(
+                company_bin=synthetic_bin(i),
+                name_ru=f"ТОО «Синтетика {i}»",
+                name_kz=f"«Синтетика {i}» ЖШС",
+                address=f"ул. Тестовая, {i % 500 + 1}",
+                kato_id=rnd.choices(kato_ids, weights=kato_weights)[0] if kato_ids else None,
+            ))
+        companies = Company.objects.bulk_create(companies)
+        if not companies or companies[0].pk is None:
+            bins = [c.company_bin for c in companies]
+            companies = list(Company.objects.filter(company_bin__in=bins))
+
+        product_links = []
+        contacts = []
+        for company in companies:
+            if product_ids:
+                # у большинства компаний 0-3 товара, у немногих — длинный список
+                k = min(len(product_ids), rnd.choice((0, 1, 1, 2, 2, 3, 3, 8)))
+                for product_id in rnd.sample(product_ids, k):
+                    product_links.append(Company.product.through(company_id=company.pk, product_id=product_id))
+
+            for n in range(rnd.choice((0, 1, 1, 1, 2, 3))):
+                contacts.append(CompanyContact(
+                    company=company,
+                    full_name=f"Контакт {n + 1}" if rnd.random() < 0.7 else None,
+                    position="Директор" if n == 0 else "Менеджер",
+                    notes=None if rnd.random() < 0.8 else "источник ba.prg.kz (Бизнес аналитик)",
+                ))
+
+        Company.product.through.objects.bulk_create(product_links)
+        contacts = CompanyContact.objects.bulk_create(contacts)
+        if contacts and contacts[0].pk is None:
+            company_ids = [c.pk for c in companies]
+            contacts = list(CompanyContact.objects.filter(company_id__in=company_ids))
+
+        phones = []
+        emails = []
+        for contact in contacts:
+            for n in range(rnd.choice((0, 1, 1, 2, 3))):
+                phones.append(ContactPhone(
+                    contact=contact,
+                    phone=f"+7 7{rnd.randint(0, 99):02d} {rnd.randint(0, 9999999):07d}",
+                    is_primary=n == 0,
+                    is_mailing=rnd.random() < 0.2,
+                ))
+            for n in range(rnd.choice((0, 1, 1, 2))):
+                emails.append(ContactEmail(
+                    contact=contact,
+                    email=f"c{contact.pk}.{n}@example.kz",
+                    is_primary=n == 0,
+                    is_mailing=rnd.random() < 0.3,
+                ))
+
+        ContactPhone.objects.bulk_create(phones, ignore_conflicts=True)
+        ContactEmail.objects.bulk_create(emails, ignore_conflicts=True)
+
+        # bulk_create не шлёт сигналы — сводки контактов считаем явно
+        rebuild_contact_summaries(Company.objects.filter(pk__in=[c.pk for c in companies]))
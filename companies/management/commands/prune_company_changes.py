@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from companies.services.change_feed import prune_change_feed
+
+
+class Command(BaseCommand):
+    help = "Удаление старых записей журнала изменений компаний"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.CHANGE_FEED_RETENTION_DAYS,
+            help="Сколько дней хранить журнал",
+        )
+
+    def handle(self, *args, **options):
+        deleted = prune_change_feed(options["days"])
+        self.stdout.write(self.style.SUCCESS(f"✅ Удалено записей журнала: {deleted}"))
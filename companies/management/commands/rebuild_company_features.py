@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from companies.models import Company
+from companies.services.similar_companies import rebuild_company_features
+
+
+class Command(BaseCommand):
+    help = "Пересчёт векторов признаков компаний для поиска похожих"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Компаний в одной пачке")
+
+    def handle(self, *args, **options):
+        total = rebuild_company_features(Company.objects.all(), batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"✅ Пересчитано компаний: {total}"))
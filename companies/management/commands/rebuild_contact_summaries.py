@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from companies.models import Company
+from companies.services.contact_summary import rebuild_contact_summaries
+
+
+class Command(BaseCommand):
+    help = "Пересчёт денормализованных сводок контактов компаний"
+
+    def handle(self, *args, **options):
+        total = rebuild_contact_summaries(Company.objects.all())
+        self.stdout.write(self.style.SUCCESS(f"✅ Пересчитано сводок: {total}"))
@@ -0,0 +1,31 @@
+# Generated by Django 6.0 on 2026-10-19 09:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0012_alter_contactphone_phone'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompanyContactSummary',
+            fields=[
+                ('company', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='contact_summary', serialize=False, to='companies.company', verbose_name='Организация')),
+                ('primary_phone', models.CharField(blank=True, max_length=40, null=True, verbose_name='Основной телефон')),
+                ('primary_email', models.EmailField(blank=True, max_length=254, null=True, verbose_name='Основной email')),
+                ('has_mailing_phone', models.BooleanField(default=False, verbose_name='Есть телефон для рассылки')),
+                ('has_mailing_email', models.BooleanField(default=False, verbose_name='Есть email для рассылки')),
+                ('contacts_text', models.TextField(blank=True, default='', verbose_name='Контакты одной строкой')),
+                ('updated', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Сводка контактов компании',
+                'verbose_name_plural': 'Сводки контактов компаний',
+                'db_table': 'company_contact_summaries',
+            },
+        ),
+    ]
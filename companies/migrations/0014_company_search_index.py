@@ -0,0 +1,92 @@
+from django.db import migrations
+
+
+# SQL заморожен здесь: services/search.py может меняться, миграция — нет.
+# В SQLite триггеры после последующих migrate восстанавливает apps.py.
+
+POSTGRES_SCHEMA = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    ALTER TABLE companies ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        to_tsvector(
+            'simple',
+            coalesce(name_ru, '') || ' ' || coalesce(name_kz, '') || ' ' ||
+            coalesce(ceo, '') || ' ' || company_bin
+        )
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS companies_search_vector_gin ON companies USING GIN (search_vector)",
+    "CREATE INDEX IF NOT EXISTS companies_name_ru_trgm ON companies USING GIN (name_ru gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS companies_name_kz_trgm ON companies USING GIN (name_kz gin_trgm_ops)",
+]
+
+POSTGRES_SCHEMA_DROP = [
+    "DROP INDEX IF EXISTS companies_name_kz_trgm",
+    "DROP INDEX IF EXISTS companies_name_ru_trgm",
+    "DROP INDEX IF EXISTS companies_search_vector_gin",
+    "ALTER TABLE companies DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_SCHEMA = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS companies_fts USING fts5(
+        name_ru, name_kz, ceo, company_bin,
+        content='companies', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS companies_fts_ai AFTER INSERT ON companies BEGIN
+        INSERT INTO companies_fts(rowid, name_ru, name_kz, ceo, company_bin)
+        VALUES (new.id, new.name_ru, new.name_kz, new.ceo, new.company_bin);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS companies_fts_ad AFTER DELETE ON companies BEGIN
+        INSERT INTO companies_fts(companies_fts, rowid, name_ru, name_kz, ceo, company_bin)
+        VALUES ('delete', old.id, old.name_ru, old.name_kz, old.ceo, old.company_bin);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS companies_fts_au AFTER UPDATE ON companies BEGIN
+        INSERT INTO companies_fts(companies_fts, rowid, name_ru, name_kz, ceo, company_bin)
+        VALUES ('delete', old.id, old.name_ru, old.name_kz, old.ceo, old.company_bin);
+        INSERT INTO companies_fts(rowid, name_ru, name_kz, ceo, company_bin)
+        VALUES (new.id, new.name_ru, new.name_kz, new.ceo, new.company_bin);
+    END
+    """,
+    "INSERT INTO companies_fts(companies_fts) VALUES ('rebuild')",
+]
+
+SQLITE_SCHEMA_DROP = [
+    "DROP TRIGGER IF EXISTS companies_fts_au",
+    "DROP TRIGGER IF EXISTS companies_fts_ad",
+    "DROP TRIGGER IF EXISTS companies_fts_ai",
+    "DROP TABLE IF EXISTS companies_fts",
+]
+
+
+def _execute(schema_editor, statements):
+    statements = statements.get(schema_editor.connection.vendor, [])
+    with schema_editor.connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def install(apps, schema_editor):
+    _execute(schema_editor, {"postgresql": POSTGRES_SCHEMA, "sqlite": SQLITE_SCHEMA})
+
+
+def uninstall(apps, schema_editor):
+    _execute(schema_editor, {"postgresql": POSTGRES_SCHEMA_DROP, "sqlite": SQLITE_SCHEMA_DROP})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0013_companycontactsummary'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0 on 2026-10-19 15:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0014_company_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompanyChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('company_id', models.BigIntegerField(verbose_name='ID компании')),
+                ('company_bin', models.CharField(max_length=12, verbose_name='БИН')),
+                ('action', models.CharField(choices=[('upsert', 'Создание / изменение'), ('delete', 'Удаление')], max_length=8, verbose_name='Действие')),
+                ('changed_at', models.DateTimeField(db_index=True, verbose_name='Время изменения')),
+            ],
+            options={
+                'verbose_name': 'Изменение компании',
+                'verbose_name_plural': 'Журнал изменений компаний',
+                'db_table': 'company_changes',
+            },
+        ),
+    ]
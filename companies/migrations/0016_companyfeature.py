@@ -0,0 +1,30 @@
+# Generated by Django 6.0 on 2026-10-19 17:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0015_companychange'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompanyFeature',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('feature', models.CharField(max_length=64, verbose_name='Признак')),
+                ('weight', models.FloatField(verbose_name='Вес')),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='features', to='companies.company', verbose_name='Организация')),
+            ],
+            options={
+                'verbose_name': 'Признак компании',
+                'verbose_name_plural': 'Признаки компаний',
+                'db_table': 'company_features',
+                'indexes': [models.Index(fields=['feature', 'company'], name='company_feature_inverted_idx')],
+                'constraints': [models.UniqueConstraint(fields=('company', 'feature'), name='uniq_company_feature')],
+            },
+        ),
+    ]
@@ -0,0 +1,84 @@
+from django.db import migrations
+
+
+# Векторы для компаний, которые были в каталоге до появления CompanyFeature;
+# дальше их поддерживают сигналы. Расчёт заморожен здесь: веса в
+# services/similar_companies.py могут меняться — тогда пересчёт делает
+# manage.py rebuild_company_features.
+
+FEATURE_WEIGHTS = {
+    "primary_oked": 3.0,
+    "secondary_oked": 1.5,
+    "tnved": 2.0,
+    "product": 2.0,
+    "kato": 1.0,
+    "krp": 0.5,
+}
+ANCESTOR_WEIGHT = 0.5
+BATCH_SIZE = 1000
+
+
+def _path_ancestors(node, code):
+    if node is None or not node.path:
+        return []
+    return [c for c in node.path.split("/") if c and c != code]
+
+
+def _features(company):
+    features = {}
+
+    def add(feature, weight):
+        if weight > features.get(feature, 0):
+            features[feature] = weight
+
+    if company.primary_oked is not None:
+        add(f"oked:{company.primary_oked.oked_code}", FEATURE_WEIGHTS["primary_oked"])
+        for code in _path_ancestors(company.primary_oked, company.primary_oked.oked_code):
+            add(f"oked:{code}", FEATURE_WEIGHTS["primary_oked"] * ANCESTOR_WEIGHT)
+    for oked in company.secondary_okeds.all():
+        add(f"oked:{oked.oked_code}", FEATURE_WEIGHTS["secondary_oked"])
+    for tnved in company.tnveds.all():
+        add(f"tnved:{tnved.tn_ved_code}", FEATURE_WEIGHTS["tnved"])
+    for product in company.product.all():
+        add(f"product:{product.pk}", FEATURE_WEIGHTS["product"])
+    if company.kato is not None:
+        add(f"kato:{company.kato.kato_code}", FEATURE_WEIGHTS["kato"])
+        for code in _path_ancestors(company.kato, company.kato.kato_code):
+            add(f"kato:{code}", FEATURE_WEIGHTS["kato"] * ANCESTOR_WEIGHT)
+    if company.krp is not None:
+        add(f"krp:{company.krp.krp_code}", FEATURE_WEIGHTS["krp"])
+    return features
+
+
+def backfill(apps, schema_editor):
+    Company = apps.get_model("companies", "Company")
+    CompanyFeature = apps.get_model("companies", "CompanyFeature")
+
+    companies = (
+        Company.objects
+        .exclude(pk__in=CompanyFeature.objects.values("company_id"))
+        .order_by("pk")
+        .select_related("primary_oked", "kato", "krp")
+        .prefetch_related("secondary_okeds", "tnveds", "product")
+    )
+    rows = []
+    for company in companies.iterator(chunk_size=BATCH_SIZE):
+        rows.extend(
+            CompanyFeature(company_id=company.pk, feature=feature, weight=weight)
+            for feature, weight in _features(company).items()
+        )
+        if len(rows) >= BATCH_SIZE * 5:
+            CompanyFeature.objects.bulk_create(rows)
+            rows = []
+    CompanyFeature.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0016_companyfeature'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
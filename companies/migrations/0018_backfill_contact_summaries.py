@@ -0,0 +1,77 @@
+from django.db import migrations
+
+
+# Сводки для компаний, которые были в каталоге до появления
+# CompanyContactSummary; дальше их поддерживают сигналы. Сборка строки
+# заморожена здесь: если формат в services/contact_summary.py поменяется,
+# пересчёт делает manage.py rebuild_contact_summaries.
+
+BATCH_SIZE = 2000
+
+
+def _primary_first(items):
+    return sorted(items, key=lambda x: (not x.is_primary, x.id))
+
+
+def _contacts_text(contacts):
+    chunks = []
+    for c in contacts:
+        name = (c.full_name or "").strip()
+        pos = (c.position or "").strip()
+        notes = (c.notes or "").strip()
+
+        if name:
+            header = f"{name} - {pos}" if pos else name
+        else:
+            header = notes if notes else "-"
+
+        phone_str = ", ".join(p.phone for p in _primary_first(c.phones.all()) if p.phone)
+        email_str = "; ".join(e.email for e in _primary_first(c.emails.all()) if e.email)
+        parts = [part for part in (phone_str, email_str) if part]
+        chunks.append(f"{header}: " + "; ".join(parts) if parts else header)
+    return "\n ".join(chunks)
+
+
+def _summary(CompanyContactSummary, company):
+    contacts = sorted(company.contacts.all(), key=lambda c: c.id)
+    phones = _primary_first(p for c in contacts for p in c.phones.all())
+    emails = _primary_first(e for c in contacts for e in c.emails.all())
+    return CompanyContactSummary(
+        company_id=company.pk,
+        primary_phone=phones[0].phone if phones else None,
+        primary_email=emails[0].email if emails else None,
+        has_mailing_phone=any(p.is_mailing for p in phones),
+        has_mailing_email=any(e.is_mailing for e in emails),
+        contacts_text=_contacts_text(contacts),
+    )
+
+
+def backfill(apps, schema_editor):
+    Company = apps.get_model("companies", "Company")
+    CompanyContactSummary = apps.get_model("companies", "CompanyContactSummary")
+
+    companies = (
+        Company.objects
+        .filter(contact_summary__isnull=True)
+        .order_by("pk")
+        .only("pk")
+        .prefetch_related("contacts__phones", "contacts__emails")
+    )
+    batch = []
+    for company in companies.iterator(chunk_size=BATCH_SIZE):
+        batch.append(_summary(CompanyContactSummary, company))
+        if len(batch) >= BATCH_SIZE:
+            CompanyContactSummary.objects.bulk_create(batch)
+            batch = []
+    CompanyContactSummary.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0017_backfill_company_features'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 6.0 on 2026-10-19 19:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0018_backfill_contact_summaries'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompanyChangePrune',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pruned_through', models.BigIntegerField(verbose_name='Удалены записи по id')),
+                ('pruned_at', models.DateTimeField(auto_now_add=True, verbose_name='Время чистки')),
+            ],
+            options={
+                'verbose_name': 'Чистка журнала изменений',
+                'verbose_name_plural': 'Чистки журнала изменений',
+                'db_table': 'company_change_prunes',
+            },
+        ),
+    ]
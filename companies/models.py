@@ -103,6 +103,110 @@ class ContactPhone(models.Model):
         ]
 
 
+class CompanyContactSummary(models.Model):
+    """
+    Денормализованная сводка контактов компании: пересчитывается при изменении
+    CompanyContact / ContactPhone / ContactEmail (см. companies/signals.py).
+    """
+    company = models.OneToOneField(
+        "companies.Company",
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="contact_summary",
+        verbose_name="Организация"
+    )
+    primary_phone = models.CharField(max_length=40, null=True, blank=True, verbose_name="Основной телефон")
+    primary_email = models.EmailField(null=True, blank=True, verbose_name="Основной email")
+    has_mailing_phone = models.BooleanField(default=False, verbose_name="Есть телефон для рассылки")
+    has_mailing_email = models.BooleanField(default=False, verbose_name="Есть email для рассылки")
+    contacts_text = models.TextField(blank=True, default="", verbose_name="Контакты одной строкой")
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Контакты: {self.company_id}"
+
+    class Meta:
+        db_table = "company_contact_summaries"
+        verbose_name = "Сводка контактов компании"
+        verbose_name_plural = "Сводки контактов компаний"
+
+
+class CompanyChange(models.Model):
+    """
+    Журнал изменений компаний для инкрементальной синхронизации
+    (/companies/changes/). Только дописывается; удаление компании —
+    запись с action="delete" (tombstone), поэтому без FK на Company.
+    """
+    ACTION_UPSERT = "upsert"
+    ACTION_DELETE = "delete"
+    ACTION_CHOICES = [
+        (ACTION_UPSERT, "Создание / изменение"),
+        (ACTION_DELETE, "Удаление"),
+    ]
+
+    company_id = models.BigIntegerField(verbose_name="ID компании")
+    company_bin = models.CharField(max_length=12, verbose_name="БИН")
+    action = models.CharField(max_length=8, choices=ACTION_CHOICES, verbose_name="Действие")
+    changed_at = models.DateTimeField(db_index=True, verbose_name="Время изменения")
+
+    def __str__(self):
+        return f"{self.company_bin} {self.action} {self.changed_at}"
+
+    class Meta:
+        db_table = "company_changes"
+        verbose_name = "Изменение компании"
+        verbose_name_plural = "Журнал изменений компаний"
+
+
+class CompanyChangePrune(models.Model):
+    """
+    Отметка чистки журнала изменений: записи с id <= pruned_through удалены.
+    Курсор ниже последней отметки — клиент мог пропустить изменения.
+    Сравнивать с Min(id) журнала нельзя: в id бывают дыры.
+    """
+    pruned_through = models.BigIntegerField(verbose_name="Удалены записи по id")
+    pruned_at = models.DateTimeField(auto_now_add=True, verbose_name="Время чистки")
+
+    def __str__(self):
+        return f"<= {self.pruned_through} ({self.pruned_at})"
+
+    class Meta:
+        db_table = "company_change_prunes"
+        verbose_name = "Чистка журнала изменений"
+        verbose_name_plural = "Чистки журнала изменений"
+
+
+class CompanyFeature(models.Model):
+    """
+    Разреженный вектор признаков компании для поиска похожих
+    (/companies/similar/<bin>/): "oked:01110", "tnved:0101", "kato:751010000"...
+    Пересчитывается при изменении компании и её M2M (см. companies/signals.py).
+    """
+    company = models.ForeignKey(
+        "companies.Company",
+        on_delete=models.CASCADE,
+        related_name="features",
+        verbose_name="Организация"
+    )
+    feature = models.CharField(max_length=64, verbose_name="Признак")
+    weight = models.FloatField(verbose_name="Вес")
+
+    def __str__(self):
+        return f"{self.company_id} {self.feature}"
+
+    class Meta:
+        db_table = "company_features"
+        verbose_name = "Признак компании"
+        verbose_name_plural = "Признаки компаний"
+        constraints = [
+            models.UniqueConstraint(fields=["company", "feature"], name="uniq_company_feature"),
+        ]
+        indexes = [
+            # обратный индекс: признак -> компании
+            models.Index(fields=["feature", "company"], name="company_feature_inverted_idx"),
+        ]
+
+
 class Certificate(models.Model):
     name = models.CharField(max_length=255, unique=True, verbose_name="Название сертификата")
 
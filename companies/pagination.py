@@ -0,0 +1,13 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class CompanyCursorPagination(CursorPagination):
+    """
+    Keyset-пагинация по id: следующая страница — это WHERE id > <курсор>,
+    поэтому глубокие страницы стоят столько же, сколько первая (без OFFSET).
+    """
+    ordering = "id"
+    page_size = settings.COMPANY_LIST_PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = settings.COMPANY_LIST_MAX_PAGE_SIZE
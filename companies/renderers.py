@@ -0,0 +1,68 @@
+from rest_framework.renderers import BaseRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # необязательная зависимость
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # необязательная зависимость
+    msgpack = None
+
+
+class ORJSONRenderer(BaseRenderer):
+    """
+    JSON через orjson — включается на запрос: ?format=orjson.
+    Байт-в-байт совпадает с JSONRenderer (компактный, UTF-8, \\u2028/\\u2029
+    экранированы); datetime и прочее нестандартное отдаётся JSONEncoder DRF.
+    Отличия только на краях: NaN/Infinity -> null, 1e+16 -> 1e16.
+    """
+    media_type = "application/json"
+    format = "orjson"
+    charset = None
+
+    _encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        ret = orjson.dumps(
+            data,
+            default=self._encoder.default,
+            option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+        )
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    MessagePack для межсервисного обмена — по Accept: application/msgpack.
+    Структура та же, что у JSON: даты и прочее нестандартное — строками
+    через JSONEncoder DRF.
+    """
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    _encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return msgpack.packb(data, default=self._encoder.default, use_bin_type=True, datetime=False)
+
+
+def company_renderer_classes():
+    """
+    Рендереры эндпоинтов компаний: стандартные + доступные быстрые.
+    """
+    renderers = list(api_settings.DEFAULT_RENDERER_CLASSES)
+    if orjson is not None:
+        renderers.append(ORJSONRenderer)
+    if msgpack is not None:
+        renderers.append(MessagePackRenderer)
+    return renderers
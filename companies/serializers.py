@@ -1,5 +1,9 @@
+from django.conf import settings
 from rest_framework import serializers
-from .models import Company, CompanyContact, ContactEmail, ContactPhone
+from .models import Company, CompanyContact, CompanyContactSummary, ContactEmail, ContactPhone
+from .services.company_fast import METRIC_MODELS
+from .services.company_queries import EXPANDABLE_RELATIONS
+from .services.metric_rankings import ORDER_VALUE, ORDERS
 from programs.serializers import ProgramParticipationReadSerializer
 from metrics.serializers import (
     TaxesSerializer,
@@ -19,6 +23,54 @@ class CompanyBinSerializer(serializers.Serializer):
         return data
 
 
+class CompanyBulkLookupSerializer(serializers.Serializer):
+    bins = serializers.ListField(
+        child=serializers.CharField(),
+        allow_empty=False,
+        max_length=settings.COMPANY_BULK_LOOKUP_MAX,
+    )
+
+    def validate_bins(self, bins):
+        invalid = [b for b in bins if not b.isdigit()]
+        if invalid:
+            raise serializers.ValidationError(f"Некорректные БИН: {', '.join(invalid[:20])}")
+        # дубли убираем, порядок сохраняем
+        return list(dict.fromkeys(bins))
+
+
+class ChangeFeedParamsSerializer(serializers.Serializer):
+    cursor = serializers.IntegerField(min_value=0, default=0)
+    limit = serializers.IntegerField(
+        min_value=1,
+        max_value=settings.CHANGE_FEED_MAX_PAGE_SIZE,
+        default=settings.CHANGE_FEED_PAGE_SIZE,
+    )
+
+
+class SimilarCompaniesParamsSerializer(serializers.Serializer):
+    limit = serializers.IntegerField(
+        min_value=1,
+        max_value=settings.SIMILAR_COMPANIES_MAX_LIMIT,
+        default=settings.SIMILAR_COMPANIES_LIMIT,
+    )
+
+
+class RegionalStatsParamsSerializer(serializers.Serializer):
+    depth = serializers.IntegerField(min_value=1, max_value=10, default=1)
+    year = serializers.IntegerField(min_value=1900, max_value=2100, required=False)
+
+
+class MetricRankingParamsSerializer(serializers.Serializer):
+    metric = serializers.ChoiceField(choices=list(METRIC_MODELS))
+    year = serializers.IntegerField(min_value=1900, max_value=2100, required=False)
+    order = serializers.ChoiceField(choices=ORDERS, default=ORDER_VALUE)
+    limit = serializers.IntegerField(
+        min_value=1,
+        max_value=settings.METRIC_RANKING_MAX_LIMIT,
+        default=settings.METRIC_RANKING_LIMIT,
+    )
+
+
 class ContactEmailSerializer(serializers.ModelSerializer):
     class Meta:
         model = ContactEmail
@@ -40,9 +92,40 @@ class CompanyContactSerializer(serializers.ModelSerializer):
         fields = ["id", "full_name", "position", "notes", "emails", "phones"]
 
 
-class CompanySerializer(serializers.ModelSerializer):
+class CompanyContactSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CompanyContactSummary
+        fields = ["primary_phone", "primary_email", "has_mailing_phone", "has_mailing_email"]
+
+
+class SparseFieldsetMixin:
+    """
+    Убирает поля, не попавшие в ?fields= / ?expand= (context["sparse_fieldset"]).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        sparse = self.context.get("sparse_fieldset")
+        if sparse is None:
+            return
+
+        for name in list(self.fields):
+            if name in EXPANDABLE_RELATIONS:
+                keep = name in sparse.expand
+            else:
+                keep = sparse.fields is None or name in sparse.fields
+            if not keep:
+                self.fields.pop(name)
+
+
+class CompanySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """
+    Набор вложенных связей по умолчанию у списка и карточки разный
+    (LIST_DEFAULT_EXPAND / DETAIL_DEFAULT_EXPAND в services/company_queries.py).
+    """
     # контакты
     contacts = CompanyContactSerializer(many=True, read_only=True)
+    contact_summary = CompanyContactSummarySerializer(read_only=True, allow_null=True)
 
     # метрики
     taxes = TaxesSerializer(many=True, read_only=True)
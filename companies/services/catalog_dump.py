@@ -0,0 +1,142 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.db.models import Prefetch
+
+from companies.models import Company
+from companies.services.change_feed import latest_change_id
+from dictionaries.models import Oked, Product, Tnved
+from metrics.models import GosZakupCustomer, GosZakupSupplier, Nds, Taxes
+
+
+# Метрика в выгрузке -> (related_name, модель); берётся значение за последний год
+DUMP_METRICS = {
+    "taxes": ("taxes", Taxes),
+    "nds": ("nds", Nds),
+    "goszakupsupplier": ("goszakupsupplier", GosZakupSupplier),
+    "goszakupcustomer": ("goszakupcustomer", GosZakupCustomer),
+}
+
+# сколько строк копить перед отправкой клиенту
+FLUSH_BYTES = 64 * 1024
+
+
+def dump_queryset():
+    prefetches = [
+        Prefetch(name, queryset=model.objects.only("company_id", "year", "value").order_by("-year", "-id"))
+        for name, model in DUMP_METRICS.values()
+    ]
+    return (
+        Company.objects
+        .select_related("kato", "krp", "kse", "kfc", "primary_oked")
+        .prefetch_related(
+            *prefetches,
+            Prefetch("product", queryset=Product.objects.only("id")),
+            Prefetch("secondary_okeds", queryset=Oked.objects.only("id", "oked_code")),
+            Prefetch("tnveds", queryset=Tnved.objects.only("id", "tn_ved_code")),
+            "program_participations",
+        )
+        .order_by("id")
+    )
+
+
+def _code(obj, field):
+    return getattr(obj, field) if obj is not None else None
+
+
+def company_record(company):
+    record = {
+        "id": company.id,
+        "company_bin": company.company_bin,
+        "name_ru": company.name_ru,
+        "name_kz": company.name_kz,
+        "register_date": company.register_date.isoformat() if company.register_date else None,
+        "ceo": company.ceo,
+        "pay_nds": company.pay_nds,
+        "tax_risk": company.tax_risk,
+        "address": company.address,
+        "updated": company.updated.isoformat() if company.updated else None,
+        "kato": _code(company.kato, "kato_code"),
+        "krp": _code(company.krp, "krp_code"),
+        "kse": _code(company.kse, "kse_code"),
+        "kfc": _code(company.kfc, "kfc_code"),
+        "oked": _code(company.primary_oked, "oked_code"),
+        "secondary_okeds": [o.oked_code for o in company.secondary_okeds.all()],
+        "tnveds": [t.tn_ved_code for t in company.tnveds.all()],
+        "products": [p.id for p in company.product.all()],
+        "industry": company.industry_id,
+        "programs": [
+            {"program": p.program_id, "year": p.year}
+            for p in company.program_participations.all()
+        ],
+    }
+
+    for key, (related_name, _) in DUMP_METRICS.items():
+        # prefetch отсортирован по убыванию года — первый и есть последний
+        latest = next(iter(getattr(company, related_name).all()), None)
+        record[key] = {"year": latest.year, "value": latest.value} if latest else None
+
+    return record
+
+
+def iter_catalog_ndjson(chunk_size=None):
+    """
+    Весь каталог построчно в NDJSON. Строки идут из server-side курсора
+    (iterator) с prefetch по чанкам — память не растёт с размером каталога.
+    Всё читается в одной транзакции REPEATABLE READ, т.е. из одного снимка БД.
+    Первая строка — {"next_cursor": N}: курсор журнала изменений на момент
+    снимка, с него клиент продолжает через /companies/changes/.
+    """
+    chunk_size = chunk_size or settings.CATALOG_DUMP_CHUNK_SIZE
+
+    with transaction.atomic():
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY")
+        # в SQLite транзакция и так видит один снимок
+
+        # первое чтение в транзакции — снимок берётся уже на нём
+        buffer = [json.dumps({"next_cursor": latest_change_id()}) + "\n"]
+        size = len(buffer[0])
+        for company in dump_queryset().iterator(chunk_size=chunk_size):
+            line = json.dumps(company_record(company), ensure_ascii=False) + "\n"
+            buffer.append(line)
+            size += len(line)
+            if size >= FLUSH_BYTES:
+                yield "".join(buffer).encode("utf-8")
+                buffer, size = [], 0
+
+        if buffer:
+            yield "".join(buffer).encode("utf-8")
+
+
+
+def _next_chunk(chunks):
+    return next(chunks, None)
+
+
+def _close_chunks(chunks):
+    # закрытие генератора завершает транзакцию; соединение потока больше не нужно
+    chunks.close()
+    connections.close_all()
+
+
+async def aiter_catalog_ndjson(chunk_size=None):
+    """
+    То же для ASGI. Синхронный итератор StreamingHttpResponse под ASGI
+    Django сначала читает целиком в память, поэтому генератор выгрузки
+    крутится в отдельном потоке (своё соединение и своя транзакция на всю
+    выгрузку), а чанки отдаются по мере готовности.
+    """
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="catalog-dump")
+    step = sync_to_async(_next_chunk, thread_sensitive=False, executor=executor)
+    chunks = iter_catalog_ndjson(chunk_size)
+    try:
+        while (chunk := await step(chunks)) is not None:
+            yield chunk
+    finally:
+        await sync_to_async(_close_chunks, thread_sensitive=False, executor=executor)(chunks)
+        executor.shutdown(wait=False)
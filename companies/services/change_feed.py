@@ -0,0 +1,89 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from companies.models import CompanyChange, CompanyChangePrune
+
+
+class ChangeFeedExpired(Exception):
+    """
+    Курсор ниже отметки чистки журнала: часть изменений уже удалена
+    prune_change_feed. Клиенту нужна полная выгрузка (/companies/dump/),
+    после неё — продолжение с курсора из её первой строки.
+    """
+
+    def __init__(self, next_cursor):
+        super().__init__(next_cursor)
+        self.next_cursor = next_cursor
+
+
+def read_change_feed(cursor, limit):
+    """
+    Изменения после курсора (id записи журнала), не больше limit.
+
+    Записи моложе CHANGE_FEED_SETTLE_SECONDS не отдаются: id выдаются
+    до коммита, и более ранний id может появиться в журнале позже —
+    без задержки клиент перескочил бы через него. changed_at — время
+    вставки записи, а не коммита бизнес-транзакции: журнал пишется
+    после коммита отдельной короткой вставкой (company_changes.py),
+    поэтому окно должно покрывать только её. Цена — запись теряется,
+    если процесс упал между коммитом и вставкой журнала.
+
+    Возвращает (последнее изменение по каждой компании, следующий курсор, есть ли ещё).
+    Если записи после курсора уже удалены чисткой — ChangeFeedExpired.
+    """
+    pruned_through = CompanyChangePrune.objects.aggregate(n=Max("pruned_through"))["n"]
+    if pruned_through is not None and cursor < pruned_through:
+        raise ChangeFeedExpired(latest_change_id())
+
+    cutoff = timezone.now() - timedelta(seconds=settings.CHANGE_FEED_SETTLE_SECONDS)
+
+    rows = list(
+        CompanyChange.objects
+        .filter(id__gt=cursor)
+        .order_by("id")
+        .values("id", "company_id", "company_bin", "action", "changed_at")[:limit + 1]
+    )
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    # останавливаемся на первой «свежей» записи, а не пропускаем её
+    for i, row in enumerate(rows):
+        if row["changed_at"] > cutoff:
+            rows = rows[:i]
+            has_more = True
+            break
+
+    # по компании важно только последнее изменение в пачке
+    latest = {}
+    for row in rows:
+        latest.pop(row["company_id"], None)
+        latest[row["company_id"]] = row
+
+    next_cursor = rows[-1]["id"] if rows else cursor
+    return list(latest.values()), next_cursor, has_more
+
+
+def latest_change_id():
+    # курсор «всё, что уже в журнале»; пустой журнал — 0
+    return CompanyChange.objects.aggregate(n=Max("id"))["n"] or 0
+
+
+def prune_change_feed(days):
+    """
+    Удаляет записи старше days дней — по id, до последней такой записи,
+    и сохраняет эту границу: по ней read_change_feed отличает курсор,
+    за которым записи удалены, от курсора в обычной дыре между id.
+    """
+    cutoff = timezone.now() - timedelta(days=days)
+    with transaction.atomic():
+        pruned_through = CompanyChange.objects.filter(changed_at__lt=cutoff).aggregate(n=Max("id"))["n"]
+        if pruned_through is None:
+            return 0
+        deleted, _ = CompanyChange.objects.filter(id__lte=pruned_through).delete()
+        CompanyChangePrune.objects.create(pruned_through=pruned_through)
+    return deleted
@@ -0,0 +1,137 @@
+from collections import namedtuple
+
+from django.db.models import CharField, Count, Q, Value
+from django.db.models.functions import Concat, StrIndex, Substr
+
+from companies.models import Company
+from dictionaries.models import Kato, Krp, Oked, Product
+
+
+# Иерархический классификатор, к которому привязаны компании:
+#   code_field  — по чему узел выбирают в запросе (у Product кода нет — берётся id),
+#   lookup      — поле Company, ведущее в классификатор,
+#   many        — M2M (фильтр через подзапрос, чтобы не плодить JOIN и дубли).
+ClassifierTree = namedtuple("ClassifierTree", ["model", "code_field", "name_field", "lookup", "many"])
+
+CLASSIFIER_TREES = {
+    "kato": ClassifierTree(Kato, "kato_code", "kato_name", "kato", False),
+    "oked": ClassifierTree(Oked, "oked_code", "oked_name", "primary_oked", False),
+    "krp": ClassifierTree(Krp, "krp_code", "krp_name", "krp", False),
+    "product": ClassifierTree(Product, "id", "name", "product", True),
+}
+
+
+def node_prefix(node):
+    """
+    Префикс path для поддерева узла. В path у Product бывает и без
+    завершающего "/", поэтому нормализуем. Для корня дерева — "".
+    """
+    if node is None:
+        return ""
+    path = node.path or ""
+    return path if path.endswith("/") else f"{path}/"
+
+
+def node_key(node):
+    # последний сегмент path — то, что стоит в path потомков на этом уровне
+    return (node.path or "").rstrip("/").rsplit("/", 1)[-1]
+
+
+def resolve_node(tree: ClassifierTree, code):
+    if code in (None, ""):
+        return None
+    if tree.code_field == "id" and not str(code).isdigit():
+        return None
+    return tree.model.objects.only("id", "path", tree.name_field).filter(**{tree.code_field: code}).first()
+
+
+def subtree_q(tree: ClassifierTree, prefix):
+    """
+    Условие «компания в поддереве с данным префиксом path» — префиксный
+    поиск по индексированной колонке path.
+    """
+    if not tree.many:
+        return Q(**{f"{tree.lookup}__path__startswith": prefix})
+
+    through = getattr(Company, tree.lookup).through
+    target = getattr(Company, tree.lookup).field.m2m_reverse_field_name()
+    return Q(pk__in=through.objects.filter(**{f"{target}__path__startswith": prefix}).values("company_id"))
+
+
+def node_q(tree: ClassifierTree, node):
+    """
+    Компания в поддереве узла. Узлы, созданные загрузчиком PRGAPP
+    без path, матчатся только сами по себе.
+    """
+    if node.path:
+        return subtree_q(tree, node_prefix(node))
+    if not tree.many:
+        return Q(**{tree.lookup: node.pk})
+    through = getattr(Company, tree.lookup).through
+    target = getattr(Company, tree.lookup).field.m2m_reverse_field_name()
+    return Q(pk__in=through.objects.filter(**{target: node.pk}).values("company_id"))
+
+
+def code_prefix_q(tree: ClassifierTree, code):
+    """
+    Код, которого нет в классификаторе, трактуется как префикс кода:
+    kato=75 — все КАТО, чей код начинается с 75 (уникальный индекс по коду).
+    """
+    if not tree.many:
+        return Q(**{f"{tree.lookup}__{tree.code_field}__startswith": code})
+    through = getattr(Company, tree.lookup).through
+    target = getattr(Company, tree.lookup).field.m2m_reverse_field_name()
+    return Q(pk__in=through.objects.filter(**{f"{target}__{tree.code_field}__startswith": code}).values("company_id"))
+
+
+def next_level_counts(companies_qs, tree: ClassifierTree, node=None):
+    """
+    Сколько компаний выборки попадает в каждого ребёнка узла (или в каждый корень).
+    Один GROUP BY по сегменту path, следующему за префиксом узла,
+    плюс один запрос за самими детьми.
+    """
+    prefix = node_prefix(node)
+    path = f"{tree.lookup}__path"
+
+    rest = Substr(path, len(prefix) + 1, output_field=CharField())
+    segment = Substr(
+        rest,
+        1,
+        StrIndex(Concat(rest, Value("/"), output_field=CharField()), Value("/")) - 1,
+        output_field=CharField(),
+    )
+
+    rows = (
+        companies_qs
+        .filter(**{f"{path}__startswith": prefix})
+        .annotate(segment=segment)
+        .values("segment")
+        .annotate(n=Count("pk", distinct=True))
+        .order_by()
+    )
+    counts = {row["segment"]: row["n"] for row in rows if row["segment"]}
+
+    children = tree.model.objects.filter(parent=node) if node else tree.model.objects.filter(parent__isnull=True)
+    items = []
+    for child in children.only("id", "path", tree.code_field, tree.name_field):
+        items.append({
+            "code": str(getattr(child, tree.code_field)),
+            "name": getattr(child, tree.name_field),
+            "count": counts.get(node_key(child), 0),
+        })
+    items.sort(key=lambda item: (-item["count"], item["name"]))
+    return items
+
+
+def flat_counts(companies_qs, id_field, code_field, name_field):
+    rows = (
+        companies_qs
+        .exclude(**{f"{id_field}__isnull": True})
+        .values(id_field, code_field, name_field)
+        .annotate(n=Count("pk", distinct=True))
+        .order_by("-n", name_field)
+    )
+    return [
+        {"code": str(row[code_field]), "name": row[name_field], "count": row["n"]}
+        for row in rows
+    ]
@@ -0,0 +1,50 @@
+from functools import partial
+
+from django.utils import timezone
+
+from company_catalog_api.on_commit import on_commit_batch
+from companies.models import Company, CompanyChange
+from companies.services.detail_cache import invalidate_company_detail
+
+
+def log_company_changes(companies, action=CompanyChange.ACTION_UPSERT, changed_at=None):
+    """
+    Дописывает в журнал изменений по записи на компанию.
+    companies — пары (id, БИН).
+    """
+    changed_at = changed_at or timezone.now()
+    CompanyChange.objects.bulk_create([
+        CompanyChange(company_id=pk, company_bin=company_bin, action=action, changed_at=changed_at)
+        for pk, company_bin in sorted(companies)
+    ])
+
+
+def schedule_company_log(companies, action=CompanyChange.ACTION_UPSERT):
+    """
+    Запись в журнал откладывается до коммита и делается отдельной короткой
+    вставкой: changed_at отстаёт от коммита записи журнала не больше, чем
+    на время самой вставки, — на этом держится окно в change_feed.py.
+    companies — пары (id, БИН).
+    """
+    on_commit_batch(f"company_log:{action}", companies, partial(log_company_changes, action=action))
+
+
+def mark_companies_changed(company_ids):
+    """
+    Изменение контактов, метрик, участия в программах или M2M-связей
+    считается изменением самой компании: сдвигаем Company.updated
+    и пишем в журнал изменений. На Company.updated держатся
+    ETag / Last-Modified и кэш карточки компании.
+
+    Внутри транзакции id копятся и после коммита уходят одним UPDATE,
+    одной вставкой в журнал и одной инвалидацией на компанию.
+    """
+    on_commit_batch("companies_changed", company_ids, _touch_companies)
+
+
+def _touch_companies(company_ids):
+    now = timezone.now()
+    companies = Company.objects.filter(pk__in=company_ids)
+    companies.update(updated=now)
+    log_company_changes(companies.values_list("pk", "company_bin"), changed_at=now)
+    invalidate_company_detail(company_ids)
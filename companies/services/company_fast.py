@@ -0,0 +1,196 @@
+from collections import defaultdict
+from functools import lru_cache
+
+from django.db import models
+from django.utils import timezone
+
+from companies.models import Company, CompanyContact, ContactEmail, ContactPhone
+from metrics.models import GosZakupCustomer, GosZakupSupplier, Nds, Taxes
+from programs.models import Program, ProgramParticipation
+
+from .company_queries import EXPANDABLE_RELATIONS, M2M_FIELDS, SparseFieldset
+
+
+# Быстрая сериализация компаний: словари строятся прямо из values()
+# и батч-запросов по связям, без объектов моделей и полей сериализатора.
+# Результат совпадает с CompanySerializer (см. tests.py), поэтому
+# порядок полей берётся у самого сериализатора.
+
+METRIC_MODELS = {
+    "taxes": Taxes,
+    "nds": Nds,
+    "goszakupsupplier": GosZakupSupplier,
+    "goszakupcustomer": GosZakupCustomer,
+}
+
+SUMMARY_FIELDS = ("primary_phone", "primary_email", "has_mailing_phone", "has_mailing_email")
+
+
+def _datetime(value):
+    # как DateTimeField.to_representation в DRF
+    if not value:
+        return None
+    if timezone.is_aware(value):
+        value = timezone.localtime(value)
+    value = value.isoformat()
+    if value.endswith("+00:00"):
+        value = value[:-6] + "Z"
+    return value
+
+
+def _date(value):
+    return value.isoformat() if value else None
+
+
+def _float(value):
+    return None if value is None else float(value)
+
+
+def _converter(field):
+    if isinstance(field, models.DateTimeField):
+        return _datetime
+    if isinstance(field, models.DateField):
+        return _date
+    if isinstance(field, models.FloatField):
+        return _float
+    return None
+
+
+@lru_cache(maxsize=None)
+def serializer_field_order():
+    from companies.serializers import CompanySerializer
+    return tuple(CompanySerializer().fields)
+
+
+@lru_cache(maxsize=None)
+def _column_converters():
+    return {
+        field.name: _converter(field)
+        for field in Company._meta.concrete_fields
+    }
+
+
+def selected_fields(sparse: SparseFieldset):
+    # те же правила, что у SparseFieldsetMixin
+    names = []
+    for name in serializer_field_order():
+        if name in EXPANDABLE_RELATIONS:
+            keep = name in sparse.expand
+        else:
+            keep = sparse.fields is None or name in sparse.fields
+        if keep:
+            names.append(name)
+    return names
+
+
+def fast_company_queryset(sparse: SparseFieldset):
+    """
+    values()-queryset под набор полей: фильтры и пагинация работают с ним
+    так же, как с обычным; сводка контактов — через тот же JOIN.
+    """
+    columns = _column_converters()
+    names = ["id"] + [f for f in selected_fields(sparse) if f in columns and f != "id"]
+    if "contact_summary" in sparse.expand:
+        names += ["contact_summary__company"] + [f"contact_summary__{f}" for f in SUMMARY_FIELDS]
+    return Company.objects.values(*names)
+
+
+def _group(rows, key="company_id"):
+    grouped = defaultdict(list)
+    for row in rows:
+        grouped[row.pop(key)].append(row)
+    return grouped
+
+
+def _load_m2m(name, ids):
+    field = Company._meta.get_field(name)
+    target = field.related_model
+    # тот же запрос, что делает prefetch_related (и тот же порядок по Meta.ordering)
+    lookup = field.related_query_name()
+    rows = target.objects.filter(**{f"{lookup}__in": ids}).values_list(lookup, "pk")
+    grouped = defaultdict(list)
+    for company_id, pk in rows:
+        grouped[company_id].append(pk)
+    return grouped
+
+
+def _load_metrics(model, ids):
+    grouped = defaultdict(list)
+    for company_id, year, value in model.objects.filter(company__in=ids).values_list("company_id", "year", "value"):
+        grouped[company_id].append({"year": year, "value": _float(value)})
+    return grouped
+
+
+def _load_contacts(ids):
+    contacts = list(
+        CompanyContact.objects.filter(company__in=ids)
+        .values("company_id", "id", "full_name", "position", "notes")
+    )
+    contact_ids = [c["id"] for c in contacts]
+    emails = _group(ContactEmail.objects.filter(contact__in=contact_ids).values(
+        "contact_id", "id", "email", "is_primary", "is_mailing",
+    ), key="contact_id")
+    phones = _group(ContactPhone.objects.filter(contact__in=contact_ids).values(
+        "contact_id", "id", "phone", "is_primary", "is_mailing",
+    ), key="contact_id")
+
+    for contact in contacts:
+        contact["emails"] = emails.get(contact["id"], [])
+        contact["phones"] = phones.get(contact["id"], [])
+    return _group(contacts)
+
+
+def _load_programs(ids):
+    participations = list(
+        ProgramParticipation.objects.filter(company__in=ids)
+        .values("company_id", "id", "year", "program_id")
+    )
+    programs = {
+        p["id"]: p
+        for p in Program.objects.filter(pk__in={p["program_id"] for p in participations})
+        .values("id", "name", "description")
+    }
+    for participation in participations:
+        participation["program"] = programs.get(participation.pop("program_id"))
+    return _group(participations)
+
+
+def build_company_dicts(rows, sparse: SparseFieldset):
+    """
+    rows — строки fast_company_queryset(sparse). На каждую запрошенную
+    связь — один батч-запрос на всю пачку, как у prefetch_related.
+    """
+    rows = list(rows)
+    if not rows:
+        return []
+
+    ids = [row["id"] for row in rows]
+    names = selected_fields(sparse)
+    columns = _column_converters()
+
+    related = {}
+    for name in names:
+        if name in M2M_FIELDS:
+            related[name] = _load_m2m(name, ids)
+        elif name in METRIC_MODELS:
+            related[name] = _load_metrics(METRIC_MODELS[name], ids)
+        elif name == "contacts":
+            related[name] = _load_contacts(ids)
+        elif name == "program_participations":
+            related[name] = _load_programs(ids)
+
+    result = []
+    for row in rows:
+        item = {}
+        for name in names:
+            if name in related:
+                item[name] = related[name].get(row["id"], [])
+            elif name == "contact_summary":
+                item[name] = None if row["contact_summary__company"] is None else {
+                    f: row[f"contact_summary__{f}"] for f in SUMMARY_FIELDS
+                }
+            else:
+                convert = columns[name]
+                item[name] = convert(row[name]) if convert else row[name]
+        result.append(item)
+    return result
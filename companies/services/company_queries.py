@@ -0,0 +1,112 @@
+from collections import namedtuple
+
+from rest_framework.exceptions import ValidationError
+
+from companies.models import Company, CompanyContactSummary
+
+
+# Вложенные связи, которые включаются через ?expand=:
+# имя -> (select_related, prefetch_related)
+EXPANDABLE_RELATIONS = {
+    "contacts": ((), ("contacts__emails", "contacts__phones")),
+    "contact_summary": (("contact_summary",), ()),
+    "taxes": ((), ("taxes",)),
+    "nds": ((), ("nds",)),
+    "goszakupsupplier": ((), ("goszakupsupplier",)),
+    "goszakupcustomer": ((), ("goszakupcustomer",)),
+    "program_participations": ((), ("program_participations__program",)),
+}
+
+# M2M-поля верхнего уровня (списки id): каждое — отдельный батч-запрос,
+# поэтому подтягиваются только если попали в ?fields=
+M2M_FIELDS = ("product", "certificates", "secondary_okeds", "tnveds")
+
+# Что отдаётся без ?expand=
+LIST_DEFAULT_EXPAND = (
+    "contact_summary",
+    "taxes",
+    "nds",
+    "goszakupsupplier",
+    "goszakupcustomer",
+    "program_participations",
+)
+DETAIL_DEFAULT_EXPAND = (
+    "contacts",
+    "taxes",
+    "nds",
+    "goszakupsupplier",
+    "goszakupcustomer",
+    "program_participations",
+)
+
+# fields=None — все поля верхнего уровня
+SparseFieldset = namedtuple("SparseFieldset", ["fields", "expand"])
+
+
+def company_base_fields():
+    opts = Company._meta
+    return [f.name for f in opts.concrete_fields] + [f.name for f in opts.many_to_many]
+
+
+def _split(raw):
+    return [part.strip() for part in raw.split(",") if part.strip()]
+
+
+def parse_sparse_fieldset(query_params, default_expand) -> SparseFieldset:
+    """
+    ?fields=company_bin,name_ru,kato — только эти поля верхнего уровня;
+    ?expand=contacts,taxes — только эти вложенные связи.
+    Без ?expand= отдаются связи по умолчанию, но если задан ?fields=,
+    то только связи, явно перечисленные в нём.
+    """
+    base_fields = set(company_base_fields())
+
+    fields = None
+    relations_in_fields = set()
+    if "fields" in query_params:
+        requested = _split(query_params.get("fields", ""))
+        relations_in_fields = {f for f in requested if f in EXPANDABLE_RELATIONS}
+        fields = {f for f in requested if f not in EXPANDABLE_RELATIONS}
+        unknown = sorted(fields - base_fields)
+        if unknown:
+            raise ValidationError({"fields": f"Неизвестные поля: {', '.join(unknown)}"})
+
+    if "expand" in query_params:
+        expand = set(_split(query_params.get("expand", "")))
+        unknown = sorted(expand - set(EXPANDABLE_RELATIONS))
+        if unknown:
+            raise ValidationError({"expand": f"Неизвестные связи: {', '.join(unknown)}"})
+    elif fields is not None:
+        expand = set()
+    else:
+        expand = set(default_expand)
+
+    return SparseFieldset(fields, frozenset(expand | relations_in_fields))
+
+
+def company_queryset(sparse: SparseFieldset):
+    """
+    Queryset под конкретный набор полей: JOIN/prefetch только для
+    запрошенных связей, а при ?fields= — только нужные колонки.
+    """
+    select_related = []
+    prefetch_related = []
+    for name in sorted(sparse.expand):
+        select, prefetch = EXPANDABLE_RELATIONS[name]
+        select_related.extend(select)
+        prefetch_related.extend(prefetch)
+
+    if sparse.fields is None:
+        prefetch_related.extend(M2M_FIELDS)
+    else:
+        prefetch_related.extend(f for f in M2M_FIELDS if f in sparse.fields)
+
+    qs = Company.objects.all()
+
+    if sparse.fields is not None:
+        only = ["id"] + [f for f in sparse.fields if f not in M2M_FIELDS]
+        if "contact_summary" in select_related:
+            only += [f"contact_summary__{f.name}" for f in CompanyContactSummary._meta.concrete_fields]
+        qs = qs.only(*only)
+
+    return qs.select_related(*select_related).prefetch_related(*prefetch_related)
@@ -0,0 +1,125 @@
+from company_catalog_api.on_commit import on_commit_batch
+from companies.models import Company, CompanyContactSummary
+
+
+SUMMARY_FIELDS = [
+    "primary_phone",
+    "primary_email",
+    "has_mailing_phone",
+    "has_mailing_email",
+    "contacts_text",
+]
+
+
+def sort_primary_first(items):
+    # items: iterable with attr is_primary (bool)
+    return sorted(items, key=lambda x: (not getattr(x, "is_primary", False), getattr(x, "id", 0)))
+
+
+def build_contacts_text(contacts):
+    """
+    Контакты одной строкой — в том виде, в каком они попадают в колонку «Контакты» экспорта.
+    """
+    contact_chunks = []
+
+    for c in contacts:
+        name = (c.full_name or "").strip()
+        pos = (c.position or "").strip()
+        notes = (getattr(c, "notes", "") or "").strip()
+
+        # Заголовок контакта
+        if name:
+            header = name
+            if pos:
+                header = f"{header} - {pos}"
+        else:
+            # нет ФИО -> вместо ФИО/Должности пишем notes
+            # если notes пустой, то хотя бы прочерк, чтобы контакт не был пустым
+            header = notes if notes else "-"
+
+        # Телефоны / emails с primary первым
+        phones = sort_primary_first(c.phones.all())
+        emails = sort_primary_first(c.emails.all())
+
+        phone_str = ", ".join(p.phone for p in phones if getattr(p, "phone", None))
+        email_str = "; ".join(e.email for e in emails if getattr(e, "email", None))
+
+        # Сборка строки контакта
+        parts = []
+        if phone_str:
+            parts.append(phone_str)
+        if email_str:
+            parts.append(email_str)
+
+        if parts:
+            contact_chunks.append(f"{header}: " + "; ".join(parts))
+        else:
+            contact_chunks.append(header)
+
+    return "\n ".join(contact_chunks)
+
+
+def build_contact_summary(company) -> CompanyContactSummary:
+    """
+    Собирает сводку по уже подтянутым контактам компании
+    (contacts__phones и contacts__emails должны быть в prefetch).
+    """
+    contacts = sorted(company.contacts.all(), key=lambda c: c.id)
+
+    phones = sort_primary_first(p for c in contacts for p in c.phones.all())
+    emails = sort_primary_first(e for c in contacts for e in c.emails.all())
+
+    return CompanyContactSummary(
+        company_id=company.pk,
+        primary_phone=phones[0].phone if phones else None,
+        primary_email=emails[0].email if emails else None,
+        has_mailing_phone=any(p.is_mailing for p in phones),
+        has_mailing_email=any(e.is_mailing for e in emails),
+        contacts_text=build_contacts_text(contacts),
+    )
+
+
+def rebuild_contact_summaries(companies_qs, batch_size=2000) -> int:
+    """
+    Пересчитывает сводки для всех компаний выборки пачками (upsert по company_id).
+    """
+    companies_qs = (
+        companies_qs
+        .order_by("pk")
+        .only("pk")
+        .prefetch_related("contacts__phones", "contacts__emails")
+    )
+
+    total = 0
+    batch = []
+    for company in companies_qs.iterator(chunk_size=batch_size):
+        batch.append(build_contact_summary(company))
+        if len(batch) >= batch_size:
+            total += _upsert(batch)
+            batch = []
+    if batch:
+        total += _upsert(batch)
+    return total
+
+
+def _upsert(summaries):
+    CompanyContactSummary.objects.bulk_create(
+        summaries,
+        update_conflicts=True,
+        unique_fields=["company"],
+        update_fields=SUMMARY_FIELDS + ["updated"],
+    )
+    return len(summaries)
+
+
+def refresh_contact_summaries(company_ids):
+    # компании могли быть удалены в той же транзакции (каскад по контактам)
+    rebuild_contact_summaries(Company.objects.filter(pk__in=company_ids))
+
+
+def schedule_contact_summary_refresh(company_ids):
+    """
+    Пересчёт откладывается до коммита и делается один раз на компанию:
+    внутри транзакции контакты могут меняться пачкой, а компания — удаляться каскадом.
+    """
+    on_commit_batch("contact_summary", company_ids, refresh_contact_summaries)
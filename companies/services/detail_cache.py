@@ -0,0 +1,87 @@
+import hashlib
+import uuid
+
+from django.core.cache import caches
+
+
+CACHE_ALIAS = "company_detail"
+
+HITS_KEY = "company-detail-stats:hits"
+MISSES_KEY = "company-detail-stats:misses"
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def _generation_key(company_id):
+    return f"company-detail-gen:{company_id}"
+
+
+def _generation(company_id):
+    cache = _cache()
+    key = _generation_key(company_id)
+    generation = cache.get(key)
+    if generation is None:
+        generation = uuid.uuid4().hex[:12]
+        # add: если другой процесс успел раньше — берём его значение
+        if not cache.add(key, generation, timeout=None):
+            generation = cache.get(key, generation)
+    return generation
+
+
+def _data_key(company_id, updated, variant):
+    """
+    В ключе и поколение (сбрасывается при инвалидации), и Company.updated:
+    даже локальный кэш другого процесса, не получивший инвалидацию,
+    не отдаст устаревшее представление.
+    """
+    raw = f"{updated.isoformat()}|{variant}"
+    digest = hashlib.md5(raw.encode("utf-8")).hexdigest()
+    return f"company-detail:{company_id}:{_generation(company_id)}:{digest}"
+
+
+def detail_variant(query_params, renderer_format):
+    # одна и та же компания в разных ?fields= / ?expand= / форматах — разные представления
+    params = "&".join(f"{k}={v}" for k, v in sorted(query_params.items()))
+    return f"{renderer_format}|{params}"
+
+
+def detail_etag(company_bin, updated, variant):
+    raw = f"{company_bin}|{updated.isoformat()}|{variant}"
+    return '"' + hashlib.md5(raw.encode("utf-8")).hexdigest() + '"'
+
+
+def _incr(key):
+    cache = _cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+
+
+def get_company_detail(company_id, updated, variant):
+    data = _cache().get(_data_key(company_id, updated, variant))
+    _incr(MISSES_KEY if data is None else HITS_KEY)
+    return data
+
+
+def set_company_detail(company_id, updated, variant, data):
+    _cache().set(_data_key(company_id, updated, variant), data)
+
+
+def invalidate_company_detail(company_ids):
+    _cache().delete_many([_generation_key(pk) for pk in company_ids])
+
+
+def company_detail_cache_stats():
+    cache = _cache()
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / total, 4) if total else None,
+    }
@@ -1,10 +1,27 @@
+import math
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Prefetch
 from openpyxl import Workbook
 from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
 from openpyxl.utils import get_column_letter
 
+from companies.models import Company, CompanyContact, CompanyContactSummary
+from companies.services.contact_summary import build_contacts_text
 from dictionaries.models import Kato  # важно: нужен доступ к модели КАТО
 
 
+# Лимит строк на листе Excel и служебные строки сверху (заголовок, пустая, шапка)
+EXCEL_MAX_ROWS = 1_048_576
+HEADER_ROWS = 3
+EXCEL_MAX_DATA_ROWS = EXCEL_MAX_ROWS - HEADER_ROWS
+
+SHEET_TITLE = "Список компаний"
+COLUMNS = ["Наименование", "Область", "Товары", "Контакты"]
+
+
 def build_excel_title(filters):
     
     parts = []
@@ -40,7 +57,7 @@ def build_excel_title(filters):
     )
 
 
-def format_kato_region_name(company):
+def format_kato_region_name(company, region_cache=None):
     kato = getattr(company, "kato", None)
     if not kato or not getattr(kato, "kato_code", None):
         return ""
@@ -52,6 +69,10 @@ def format_kato_region_name(company):
 
     region_code = code[:2] + ("0" * (len(code) - 2))
 
+    # регионов немного — в рамках одного экспорта ищем каждый один раз
+    if region_cache is not None and region_code in region_cache:
+        return region_cache[region_code]
+
     region_name = (
         Kato.objects
         .filter(kato_code=region_code)
@@ -60,137 +81,250 @@ def format_kato_region_name(company):
     )
 
     # если по какой-то причине не нашли — вернём хотя бы код
-    return region_name or region_code
-
+    result = region_name or region_code
+    if region_cache is not None:
+        region_cache[region_code] = result
+    return result
+
+
+def format_contacts(company):
+    # обычно строка уже лежит в денормализованной сводке (CompanyContactSummary);
+    # для компаний без сводки контакты подтянуты в prefetch_export_relations
+    try:
+        return company.contact_summary.contacts_text
+    except CompanyContactSummary.DoesNotExist:
+        contacts = getattr(company, "contacts_without_summary", None)
+        if contacts is None:
+            contacts = company.contacts.all()
+        return build_contacts_text(contacts)
+
+
+def format_products(company):
+    products = company.product.all()
+    return ", ".join(p.name for p in products) if products else ""
+
+
+def prefetch_export_relations(companies_qs):
+    """
+    Подтягивает все связи, которые читает excel_builder, батчами
+    (одна выборка на связь вместо запросов на каждую компанию).
+    """
+    return (
+        companies_qs
+        .select_related(
+            "industry",
+            "kato",
+            "primary_oked",
+            "kfc",
+            "kse",
+            "krp",
+            "contact_summary",
+        )
+        .prefetch_related(
+            "certificates",
+            "secondary_okeds",
+            "product",
+            "tnveds",
+            "program_participations__program",
+            # сводки ещё нет (не пересчитана после импорта) — контакты батчем,
+            # только для таких компаний
+            Prefetch(
+                "contacts",
+                queryset=(
+                    CompanyContact.objects
+                    .filter(company__contact_summary__isnull=True)
+                    .order_by("id")
+                    .prefetch_related("phones", "emails")
+                ),
+                to_attr="contacts_without_summary",
+            ),
+        )
+    )
 
-def excel_builder(companies_qs, filters_info):
-    title_text = build_excel_title(filters_info)
 
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Список компаний"
-
-    # -------------------------
-    # Styles
-    # -------------------------
-    title_font = Font(bold=True, size=14)
-    header_font = Font(bold=True)
-    header_fill = PatternFill("solid", fgColor="E6F0FF")
-    thin = Side(style="thin", color="D0D0D0")
-    border_thin = Border(left=thin, right=thin, top=thin, bottom=thin)
-
-    align_left_top_wrap = Alignment(horizontal="left", vertical="top", wrap_text=True)
-    align_center = Alignment(horizontal="center", vertical="center", wrap_text=True)
-
-    # -------------------------
-    # Columns
-    # -------------------------
-    columns = ["Наименование", "Область", "Товары", "Контакты"]
-    ncols = len(columns)
-
-    # -------------------------
-    # Title row
-    # -------------------------
-    ws.merge_cells(start_row=1, start_column=1, end_row=1, end_column=ncols)
-    c = ws.cell(row=1, column=1, value=title_text)
-    c.font = title_font
-    c.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-    ws.row_dimensions[1].height = 32
-
-    # -------------------------
-    # Header row
-    # -------------------------
-    ws.append([])      # row 2
-    ws.append(columns) # row 3
-    header_row = 3
-
-    for col_idx in range(1, ncols + 1):
-        cell = ws.cell(row=header_row, column=col_idx)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = align_center
-        cell.border = border_thin
-
-    ws.row_dimensions[header_row].height = 20
-
-    # Freeze panes + autofilter
-    ws.freeze_panes = ws["A4"]
-    ws.auto_filter.ref = f"A{header_row}:{get_column_letter(ncols)}{header_row}"
-
-    # -------------------------
-    # Helpers
-    # -------------------------
-    def format_contacts(company):
-        def sort_primary_first(items):
-            # items: iterable with attr is_primary (bool)
-            return sorted(items, key=lambda x: (not getattr(x, "is_primary", False), getattr(x, "id", 0)))
-
-        contact_chunks = []
-
-        for c in company.contacts.all():
-            name = (c.full_name or "").strip()
-            pos = (c.position or "").strip()
-            notes = (getattr(c, "notes", "") or "").strip()
-
-            # Заголовок контакта
-            if name:
-                header = name
-                if pos:
-                    header = f"{header} - {pos}"
-            else:
-                # нет ФИО -> вместо ФИО/Должности пишем notes
-                # если notes пустой, то хотя бы прочерк, чтобы контакт не был пустым
-                header = notes if notes else "-"
-
-            # Телефоны / emails с primary первым
-            phones = sort_primary_first(c.phones.all())
-            emails = sort_primary_first(c.emails.all())
-
-            phone_str = ", ".join(p.phone for p in phones if getattr(p, "phone", None))
-            email_str = "; ".join(e.email for e in emails if getattr(e, "email", None))
-
-            # Сборка строки контакта
-            parts = []
-            if phone_str:
-                parts.append(phone_str)
-            if email_str:
-                parts.append(email_str)
-
-            if parts:
-                contact_chunks.append(f"{header}: " + "; ".join(parts))
-            else:
-                contact_chunks.append(header)
-
-        return "\n ".join(contact_chunks)
-
-    def format_products(company):
-        products = company.product.all()
-        return ", ".join(p.name for p in products) if products else ""
-
-    # -------------------------
-    # Column widths
-    # -------------------------
-    widths = {1: 42, 2: 26, 3: 40, 4: 60}
-    for col_idx, w in widths.items():
-        ws.column_dimensions[get_column_letter(col_idx)].width = w
-
-    # -------------------------
-    # Data rows
-    # -------------------------
-    row_idx = 3
+def build_rows(companies_qs, region_cache=None):
+    """
+    Значения ячеек по строкам: (наименование, область, товары, контакты).
+    """
+    if region_cache is None:
+        region_cache = {}
     for company in companies_qs:
-        row_idx += 1
-        ws.cell(row=row_idx, column=1, value=company.name_ru or "")
-        ws.cell(row=row_idx, column=2, value=format_kato_region_name(company))
-        ws.cell(row=row_idx, column=3, value=format_products(company))
-        ws.cell(row=row_idx, column=4, value=format_contacts(company))
+        yield (
+            company.name_ru or "",
+            format_kato_region_name(company, region_cache),
+            format_products(company),
+            format_contacts(company),
+        )
+
+
+class _SheetWriter:
+    """
+    Оформление листа: заголовок, шапка, ширины колонок и стили строк.
+    """
+
+    def __init__(self, title_text):
+        self.title_text = title_text
+
+        # -------------------------
+        # Styles
+        # -------------------------
+        self.title_font = Font(bold=True, size=14)
+        self.header_font = Font(bold=True)
+        self.header_fill = PatternFill("solid", fgColor="E6F0FF")
+        thin = Side(style="thin", color="D0D0D0")
+        self.border_thin = Border(left=thin, right=thin, top=thin, bottom=thin)
+
+        self.align_left_top_wrap = Alignment(horizontal="left", vertical="top", wrap_text=True)
+        self.align_center = Alignment(horizontal="center", vertical="center", wrap_text=True)
+
+    def setup(self, ws):
+        ncols = len(COLUMNS)
+
+        # -------------------------
+        # Title row
+        # -------------------------
+        ws.merge_cells(start_row=1, start_column=1, end_row=1, end_column=ncols)
+        c = ws.cell(row=1, column=1, value=self.title_text)
+        c.font = self.title_font
+        c.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
+        ws.row_dimensions[1].height = 32
+
+        # -------------------------
+        # Header row
+        # -------------------------
+        ws.append([])      # row 2
+        ws.append(COLUMNS) # row 3
+        header_row = HEADER_ROWS
 
         for col_idx in range(1, ncols + 1):
-            cell = ws.cell(row=row_idx, column=col_idx)
-            cell.alignment = align_left_top_wrap
-            cell.border = border_thin
+            cell = ws.cell(row=header_row, column=col_idx)
+            cell.font = self.header_font
+            cell.fill = self.header_fill
+            cell.alignment = self.align_center
+            cell.border = self.border_thin
+
+        ws.row_dimensions[header_row].height = 20
+
+        # Freeze panes + autofilter
+        ws.freeze_panes = ws["A4"]
+        ws.auto_filter.ref = f"A{header_row}:{get_column_letter(ncols)}{header_row}"
+
+        # -------------------------
+        # Column widths
+        # -------------------------
+        widths = {1: 42, 2: 26, 3: 40, 4: 60}
+        for col_idx, w in widths.items():
+            ws.column_dimensions[get_column_letter(col_idx)].width = w
+
+    def write_rows(self, ws, rows):
+        row_idx = HEADER_ROWS
+        for values in rows:
+            row_idx += 1
+            for col_idx, value in enumerate(values, start=1):
+                cell = ws.cell(row=row_idx, column=col_idx, value=value)
+                cell.alignment = self.align_left_top_wrap
+                cell.border = self.border_thin
+
+            ws.row_dimensions[row_idx].height = 48
+
+
+def excel_builder(companies_qs, filters_info, workers=None):
+    """
+    workers: число процессов для подготовки строк. По умолчанию берётся
+    из settings.EXPORT_PARALLEL_WORKERS (1 — без параллельности), а маленькие
+    выборки (меньше EXPORT_PARALLEL_MIN_ROWS) всегда строятся в одном процессе.
+    """
+    if workers is None:
+        workers = getattr(settings, "EXPORT_PARALLEL_WORKERS", 1)
+
+    if workers > 1 and companies_qs.count() >= getattr(settings, "EXPORT_PARALLEL_MIN_ROWS", 0):
+        # pk в исходном порядке выборки — в нём же склеиваются строки воркеров
+        pks = list(companies_qs.values_list("pk", flat=True))
+        return excel_builder_parallel(pks, filters_info, workers)
+
+    writer = _SheetWriter(build_excel_title(filters_info))
 
-        ws.row_dimensions[row_idx].height = 48
+    wb = Workbook()
+    ws = wb.active
+    ws.title = SHEET_TITLE
+    writer.setup(ws)
+    writer.write_rows(ws, build_rows(companies_qs))
 
     return wb
 
+
+# -------------------------
+# Параллельный экспорт
+# -------------------------
+# Воркер подтягивает компании своего куска пачками по pk__in
+SHARD_BATCH_SIZE = 2000
+
+
+def split_pks(pks, shards):
+    """
+    Делит список pk на shards непрерывных кусков, сохраняя порядок.
+    """
+    if not pks:
+        return []
+    size = math.ceil(len(pks) / shards)
+    return [pks[i:i + size] for i in range(0, len(pks), size)]
+
+
+def _init_export_worker():
+    # при spawn/forkserver процесс стартует с нуля — поднимаем Django
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+def _render_shard(pks):
+    region_cache = {}
+    rows = []
+    for start in range(0, len(pks), SHARD_BATCH_SIZE):
+        batch = pks[start:start + SHARD_BATCH_SIZE]
+        by_pk = {
+            company.pk: company
+            for company in prefetch_export_relations(Company.objects.filter(pk__in=batch))
+        }
+        rows.extend(build_rows((by_pk[pk] for pk in batch if pk in by_pk), region_cache))
+    return rows
+
+
+def excel_builder_parallel(pks, filters_info, workers):
+    """
+    Список pk (в порядке исходной выборки) режется на куски, строки каждого
+    куска готовятся в отдельном процессе, затем склеиваются в книгу в том же
+    порядке. Если строк больше, чем помещается на лист Excel, каждый кусок
+    пишется на свой лист.
+
+    Процессы форкаются из текущего, поэтому вызывать стоит из management-команды
+    или фоновой задачи, а не из веб-воркера.
+    """
+    per_sheet = len(pks) > EXCEL_MAX_DATA_ROWS
+    shards = max(workers, math.ceil(len(pks) / EXCEL_MAX_DATA_ROWS))
+    chunks = split_pks(pks, shards)
+
+    # соединения с БД не должны наследоваться дочерними процессами
+    connections.close_all()
+
+    writer = _SheetWriter(build_excel_title(filters_info))
+    wb = Workbook()
+    ws = wb.active
+    ws.title = SHEET_TITLE
+    writer.setup(ws)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_export_worker) as pool:
+        futures = [pool.submit(_render_shard, chunk) for chunk in chunks]
+
+        if per_sheet:
+            for n, future in enumerate(futures):
+                if n > 0:
+                    ws = wb.create_sheet(f"{SHEET_TITLE} ({n + 1})")
+                    writer.setup(ws)
+                writer.write_rows(ws, future.result())
+        else:
+            writer.write_rows(ws, (row for future in futures for row in future.result()))
+
+    return wb
@@ -0,0 +1,73 @@
+from django.db.models import F, FloatField, Max, OuterRef, Subquery
+
+from .company_fast import METRIC_MODELS
+
+
+# Рейтинг компаний по метрике за год целиком в SQL: по значению — проход
+# по индексу (year, value) с LIMIT; по росту — значение прошлого года
+# коррелированным подзапросом по индексу (company, year).
+
+ORDER_VALUE = "value"
+ORDER_GROWTH = "growth"  # относительный рост к прошлому году
+ORDER_DELTA = "delta"    # абсолютный прирост
+ORDERS = (ORDER_VALUE, ORDER_GROWTH, ORDER_DELTA)
+
+
+def latest_year(metric):
+    return METRIC_MODELS[metric].objects.aggregate(year=Max("year"))["year"]
+
+
+def rank_companies(metric, year, order=ORDER_VALUE, companies_qs=None, limit=100):
+    """
+    Лучшие limit записей метрики за год: словари с company_bin, name_ru,
+    value, previous (значение за прошлый год) и growth / delta.
+    companies_qs — выборка компаний (поддерево классификатора); None — все.
+    """
+    model = METRIC_MODELS[metric]
+    rows = model.objects.filter(year=year)
+    if companies_qs is not None:
+        rows = rows.filter(company__in=companies_qs.values("pk"))
+
+    previous = Subquery(
+        model.objects
+        .filter(company=OuterRef("company"), year=year - 1)
+        .order_by()
+        .values("value")[:1],
+        output_field=FloatField(),
+    )
+    rows = rows.annotate(previous=previous)
+
+    if order == ORDER_GROWTH:
+        rows = (
+            rows
+            .filter(previous__gt=0)
+            .annotate(growth=(F("value") - F("previous")) / F("previous"))
+            .order_by(F("growth").desc(), "company_id")
+        )
+    elif order == ORDER_DELTA:
+        rows = (
+            rows
+            .filter(previous__isnull=False)
+            .annotate(delta=F("value") - F("previous"))
+            .order_by(F("delta").desc(), "company_id")
+        )
+    else:
+        rows = rows.order_by("-value", "company_id")
+
+    results = []
+    for rank, row in enumerate(
+        rows.values("company__company_bin", "company__name_ru", "value", "previous")[:limit],
+        start=1,
+    ):
+        previous_value = row["previous"]
+        value = row["value"]
+        results.append({
+            "rank": rank,
+            "company_bin": row["company__company_bin"],
+            "name_ru": row["company__name_ru"],
+            "value": value,
+            "previous": previous_value,
+            "delta": None if previous_value is None else value - previous_value,
+            "growth": (value - previous_value) / previous_value if previous_value else None,
+        })
+    return results
@@ -1,4 +1,6 @@
+import asyncio
 import requests
+from asgiref.sync import sync_to_async
 from datetime import datetime
 from django.db import transaction
 
@@ -7,28 +9,67 @@ from metrics.models import Taxes, Nds, GosZakupSupplier, GosZakupCustomer
 from dictionaries.models import Krp, Kse, Kfc, Kato, Oked
 
 
+try:
+    import httpx
+except ImportError:  # нужен только асинхронной загрузке
+    httpx = None
+
+
 class CompanyLoadError(Exception):
     pass
 
 
-def load_company_data_by_bin(company_bin: str) -> dict:
-    company_url = "https://apiba.prgapp.kz/CompanyFullInfo"
-    goz_zakup_url = "https://apiba.prgapp.kz/CompanyGosZakupGraph"
+PRGAPP_COMPANY_URL = "https://apiba.prgapp.kz/CompanyFullInfo"
+PRGAPP_GOS_ZAKUP_URL = "https://apiba.prgapp.kz/CompanyGosZakupGraph"
+PRGAPP_TIMEOUT = 30
+
 
-    company_params = {"id": company_bin, "lang": "ru"}
-    goz_zakup_params = {"bin": company_bin, "lang": "ru"}
+def prgapp_requests(company_bin: str):
+    # (url, params) обоих запросов к PRGAPP — общие для sync и async клиента
+    return [
+        (PRGAPP_COMPANY_URL, {"id": company_bin, "lang": "ru"}),
+        (PRGAPP_GOS_ZAKUP_URL, {"bin": company_bin, "lang": "ru"}),
+    ]
 
-    company_response = requests.get(company_url, params=company_params, timeout=30)
-    gos_zakup_response = requests.get(goz_zakup_url, params=goz_zakup_params, timeout=30)
 
+def check_prgapp_responses(company_response, gos_zakup_response):
     if not (company_response.status_code == 200 and gos_zakup_response.status_code == 200):
         raise CompanyLoadError(
             f"PRGAPP failed. company={company_response.status_code}, gos_zakup={gos_zakup_response.status_code}"
         )
+    return company_response.json(), gos_zakup_response.json()
+
+
+def fetch_company_data(company_bin: str):
+    company_response, gos_zakup_response = (
+        requests.get(url, params=params, timeout=PRGAPP_TIMEOUT)
+        for url, params in prgapp_requests(company_bin)
+    )
+    return check_prgapp_responses(company_response, gos_zakup_response)
+
+
+async def afetch_company_data(company_bin: str):
+    """
+    То же через httpx.AsyncClient: оба запроса параллельно, без занятого потока.
+    Без httpx — синхронный клиент в пуле потоков.
+    """
+    if httpx is None:
+        return await sync_to_async(fetch_company_data, thread_sensitive=False)(company_bin)
+
+    async with httpx.AsyncClient(timeout=PRGAPP_TIMEOUT) as client:
+        company_response, gos_zakup_response = await asyncio.gather(*(
+            client.get(url, params=params)
+            for url, params in prgapp_requests(company_bin)
+        ))
+    return check_prgapp_responses(company_response, gos_zakup_response)
+
+
+def load_company_data_by_bin(company_bin: str) -> dict:
+    c_data, g_data = fetch_company_data(company_bin)
+    return save_company_data(company_bin, c_data, g_data)
 
-    c_data = company_response.json()
-    g_data = gos_zakup_response.json()
 
+def save_company_data(company_bin: str, c_data: dict, g_data: dict) -> dict:
     if c_data.get("basicInfo", {}).get("isDeleted"):
         return {"status": "deleted", "message": f"Компания удалена. БИН: {company_bin}"}
 
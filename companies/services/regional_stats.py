@@ -0,0 +1,67 @@
+from django.db.models import Count, Sum
+
+from companies.models import Company
+from dictionaries.services.classifier_snapshot import get_snapshot
+
+from .company_fast import METRIC_MODELS
+
+
+# Сводка по регионам: компании и суммы метрик сгруппированы в SQL
+# по kato_id (по запросу на метрику), а свёртка до нужного уровня КАТО —
+# по цепочкам предков из снимка классификатора (dictionaries), без JOIN
+# по дереву и без выгрузки компаний.
+
+
+def _totals_by_kato(companies_qs, year):
+    """
+    {kato_id: {"companies": n, "taxes": сумма, ...}} — один GROUP BY
+    на количество компаний и по одному на каждую метрику.
+    Выборка — подзапросом по pk: фильтр с JOIN по M2M размножил бы
+    строки компаний, а с ними количества и суммы.
+    """
+    companies_qs = Company.objects.filter(pk__in=companies_qs.values("pk"))
+    totals = {}
+    for row in companies_qs.values("kato_id").annotate(n=Count("pk")).order_by():
+        totals.setdefault(row["kato_id"], {})["companies"] = row["n"]
+
+    for name in METRIC_MODELS:
+        metric_qs = companies_qs
+        if year is not None:
+            metric_qs = metric_qs.filter(**{f"{name}__year": year})
+        rows = metric_qs.values("kato_id").annotate(total=Sum(f"{name}__value")).order_by()
+        for row in rows:
+            totals.setdefault(row["kato_id"], {})[name] = row["total"]
+    return totals
+
+
+def regional_stats(companies_qs, depth, year=None):
+    """
+    Строки сводки на уровне depth (1 — области и города республиканского
+    значения). Компании, привязанные к узлу выше этого уровня, остаются
+    в строке самого узла (её depth меньше запрошенного); без КАТО — в строке
+    с code=None.
+    """
+    snapshot = get_snapshot("kato")
+    rows = {}
+
+    for kato_id, totals in _totals_by_kato(companies_qs, year).items():
+        code = snapshot.code_by_id.get(kato_id)
+        if code is not None:
+            lineage = snapshot.lineage(code)
+            code = lineage[min(depth, len(lineage)) - 1]
+
+        row = rows.get(code)
+        if row is None:
+            node = snapshot.nodes.get(code)
+            row = rows[code] = {
+                "code": code,
+                "name": node["name"] if node else None,
+                "depth": len(snapshot.lineage(code)) if node else None,
+                "companies": 0,
+                **{name: 0.0 for name in METRIC_MODELS},
+            }
+        row["companies"] += totals.get("companies", 0)
+        for name in METRIC_MODELS:
+            row[name] += totals.get(name) or 0.0
+
+    return sorted(rows.values(), key=lambda row: (row["code"] is None, -row["companies"], row["code"] or ""))
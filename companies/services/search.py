@@ -0,0 +1,176 @@
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+
+# Индексируемые колонки таблицы companies
+SEARCH_COLUMNS = ("name_ru", "name_kz", "ceo", "company_bin")
+
+BIN_RE = re.compile(r"\d{12}")
+DIGITS_RE = re.compile(r"\d+")
+
+
+# -------------------------
+# Схема: tsvector + GIN + pg_trgm (Postgres) / FTS5 (SQLite)
+# -------------------------
+POSTGRES_SCHEMA = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    ALTER TABLE companies ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        to_tsvector(
+            'simple',
+            coalesce(name_ru, '') || ' ' || coalesce(name_kz, '') || ' ' ||
+            coalesce(ceo, '') || ' ' || company_bin
+        )
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS companies_search_vector_gin ON companies USING GIN (search_vector)",
+    "CREATE INDEX IF NOT EXISTS companies_name_ru_trgm ON companies USING GIN (name_ru gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS companies_name_kz_trgm ON companies USING GIN (name_kz gin_trgm_ops)",
+]
+
+POSTGRES_SCHEMA_DROP = [
+    "DROP INDEX IF EXISTS companies_name_kz_trgm",
+    "DROP INDEX IF EXISTS companies_name_ru_trgm",
+    "DROP INDEX IF EXISTS companies_search_vector_gin",
+    "ALTER TABLE companies DROP COLUMN IF EXISTS search_vector",
+]
+
+_cols = ", ".join(SEARCH_COLUMNS)
+_new_cols = ", ".join(f"new.{c}" for c in SEARCH_COLUMNS)
+_old_cols = ", ".join(f"old.{c}" for c in SEARCH_COLUMNS)
+
+SQLITE_TABLE = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS companies_fts USING fts5({_cols}, "
+    "content='companies', content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+)
+
+# Django пересоздаёт таблицу в SQLite при ALTER — вместе с ней пропадают триггеры,
+# поэтому они ставятся заново после каждого migrate (см. apps.py)
+SQLITE_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS companies_fts_ai AFTER INSERT ON companies BEGIN
+        INSERT INTO companies_fts(rowid, {_cols}) VALUES (new.id, {_new_cols});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS companies_fts_ad AFTER DELETE ON companies BEGIN
+        INSERT INTO companies_fts(companies_fts, rowid, {_cols}) VALUES ('delete', old.id, {_old_cols});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS companies_fts_au AFTER UPDATE ON companies BEGIN
+        INSERT INTO companies_fts(companies_fts, rowid, {_cols}) VALUES ('delete', old.id, {_old_cols});
+        INSERT INTO companies_fts(rowid, {_cols}) VALUES (new.id, {_new_cols});
+    END
+    """,
+]
+
+SQLITE_SCHEMA_DROP = [
+    "DROP TRIGGER IF EXISTS companies_fts_au",
+    "DROP TRIGGER IF EXISTS companies_fts_ad",
+    "DROP TRIGGER IF EXISTS companies_fts_ai",
+    "DROP TABLE IF EXISTS companies_fts",
+]
+
+
+def install_search_schema(conn):
+    """
+    Идемпотентно создаёт поисковый индекс для текущей БД.
+    """
+    with conn.cursor() as cursor:
+        if conn.vendor == "postgresql":
+            for sql in POSTGRES_SCHEMA:
+                cursor.execute(sql)
+
+        elif conn.vendor == "sqlite":
+            cursor.execute(
+                "SELECT count(*) FROM sqlite_master WHERE type = 'trigger' "
+                "AND name IN ('companies_fts_ai', 'companies_fts_ad', 'companies_fts_au')"
+            )
+            triggers_ok = cursor.fetchone()[0] == len(SQLITE_TRIGGERS)
+
+            cursor.execute(SQLITE_TABLE)
+            for sql in SQLITE_TRIGGERS:
+                cursor.execute(sql)
+
+            # пока триггеров не было, индекс мог разойтись с таблицей
+            if not triggers_ok:
+                cursor.execute("INSERT INTO companies_fts(companies_fts) VALUES ('rebuild')")
+
+
+def drop_search_schema(conn):
+    statements = {
+        "postgresql": POSTGRES_SCHEMA_DROP,
+        "sqlite": SQLITE_SCHEMA_DROP,
+    }.get(conn.vendor, [])
+    with conn.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+# -------------------------
+# Поиск
+# -------------------------
+def _words(term):
+    return re.findall(r"\w+", term.lower())
+
+
+def _like_escape(term):
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def search_companies(queryset, term):
+    """
+    Поиск компаний по названию (ru/kz), руководителю и БИН через индекс:
+    - 12 цифр — точное совпадение БИН (уникальный индекс);
+    - только цифры — префикс БИН; числа в названиях так не ищутся;
+    - Postgres — tsvector (префиксы слов) + триграммы (подстрока и опечатки);
+    - SQLite — FTS5, только префиксы слов: в отличие от прежнего icontains,
+      "строй" не находит "Алматыстрой". SQLite — БД для локальной разработки.
+    """
+    term = (term or "").strip()
+    if not term:
+        return queryset
+
+    if BIN_RE.fullmatch(term):
+        return queryset.filter(company_bin=term)
+
+    if DIGITS_RE.fullmatch(term):
+        return queryset.filter(company_bin__startswith=term)
+
+    words = _words(term)
+    if not words:
+        return queryset
+
+    if connection.vendor == "postgresql":
+        tsquery = " & ".join(f"{w}:*" for w in words)
+        like = f"%{_like_escape(term)}%"
+        return queryset.filter(pk__in=RawSQL(
+            "SELECT id FROM companies "
+            "WHERE search_vector @@ to_tsquery('simple', %s) "
+            "OR name_ru ILIKE %s OR name_kz ILIKE %s "
+            "OR name_ru %% %s",
+            [tsquery, like, like, term],
+        ))
+
+    if connection.vendor == "sqlite":
+        match = " ".join(f'"{w}"*' for w in words)
+        return queryset.filter(pk__in=RawSQL(
+            "SELECT rowid FROM companies_fts WHERE companies_fts MATCH %s",
+            [match],
+        ))
+
+    # прочие БД — без индекса, как раньше
+    condition = Q()
+    for word in words:
+        condition &= (
+            Q(name_ru__icontains=word)
+            | Q(name_kz__icontains=word)
+            | Q(ceo__icontains=word)
+            | Q(company_bin__icontains=word)
+        )
+    return queryset.filter(condition)
@@ -0,0 +1,222 @@
+import math
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, Sum, Value, When
+
+from company_catalog_api.on_commit import on_commit_batch
+from companies.models import Company, CompanyFeature
+
+
+# Похожие компании: у каждой компании — разреженный вектор признаков
+# (CompanyFeature), обратный индекс по признаку даёт кандидатов,
+# ранг — взвешенное пересечение с IDF: общий редкий ТН ВЭД значит
+# больше, чем общая область.
+
+# Вес признака в векторе компании
+FEATURE_WEIGHTS = {
+    "primary_oked": 3.0,
+    "secondary_oked": 1.5,
+    "tnved": 2.0,
+    "product": 2.0,
+    "kato": 1.0,
+    "krp": 0.5,
+}
+
+# Предки по path (группа ОКЭД, район и область КАТО) — с этой долей веса узла
+ANCESTOR_WEIGHT = 0.5
+
+
+def _path_ancestors(node, code_field):
+    # path = "коды/предков/узел/"; сам узел — последний сегмент
+    if node is None or not node.path:
+        return []
+    codes = [c for c in node.path.split("/") if c]
+    own = str(getattr(node, code_field))
+    return [c for c in codes if c != own]
+
+
+def company_features(company):
+    """
+    {признак: вес} по уже подтянутым классификаторам компании
+    (см. feature_queryset). Совпадающие признаки берут больший вес.
+    """
+    features = {}
+
+    def add(feature, weight):
+        if weight > features.get(feature, 0):
+            features[feature] = weight
+
+    if company.primary_oked is not None:
+        add(f"oked:{company.primary_oked.oked_code}", FEATURE_WEIGHTS["primary_oked"])
+        for code in _path_ancestors(company.primary_oked, "oked_code"):
+            add(f"oked:{code}", FEATURE_WEIGHTS["primary_oked"] * ANCESTOR_WEIGHT)
+    for oked in company.secondary_okeds.all():
+        add(f"oked:{oked.oked_code}", FEATURE_WEIGHTS["secondary_oked"])
+    for tnved in company.tnveds.all():
+        add(f"tnved:{tnved.tn_ved_code}", FEATURE_WEIGHTS["tnved"])
+    for product in company.product.all():
+        add(f"product:{product.pk}", FEATURE_WEIGHTS["product"])
+    if company.kato is not None:
+        add(f"kato:{company.kato.kato_code}", FEATURE_WEIGHTS["kato"])
+        for code in _path_ancestors(company.kato, "kato_code"):
+            add(f"kato:{code}", FEATURE_WEIGHTS["kato"] * ANCESTOR_WEIGHT)
+    if company.krp is not None:
+        add(f"krp:{company.krp.krp_code}", FEATURE_WEIGHTS["krp"])
+    return features
+
+
+def feature_queryset(companies_qs):
+    return (
+        companies_qs
+        .order_by("pk")
+        .only(
+            "pk",
+            "primary_oked__oked_code", "primary_oked__path",
+            "kato__kato_code", "kato__path",
+            "krp__krp_code",
+        )
+        .select_related("primary_oked", "kato", "krp")
+        .prefetch_related("secondary_okeds", "tnveds", "product")
+    )
+
+
+def rebuild_company_features(companies_qs, batch_size=1000) -> int:
+    """
+    Пересчитывает векторы всех компаний выборки пачками:
+    старые признаки пачки удаляются, новые вставляются одним bulk_create.
+    """
+    total = 0
+    batch = []
+    for company in feature_queryset(companies_qs).iterator(chunk_size=batch_size):
+        batch.append(company)
+        if len(batch) >= batch_size:
+            total += _replace_features(batch)
+            batch = []
+    if batch:
+        total += _replace_features(batch)
+    return total
+
+
+def _replace_features(companies):
+    rows = [
+        CompanyFeature(company_id=company.pk, feature=feature, weight=weight)
+        for company in companies
+        for feature, weight in company_features(company).items()
+    ]
+    with transaction.atomic():
+        CompanyFeature.objects.filter(company__in=[c.pk for c in companies]).delete()
+        CompanyFeature.objects.bulk_create(rows, batch_size=5000)
+    return len(companies)
+
+
+def refresh_company_features(company_ids):
+    # компании могли быть удалены в той же транзакции — признаки ушли каскадом
+    rebuild_company_features(Company.objects.filter(pk__in=company_ids))
+
+
+def schedule_feature_refresh(company_ids):
+    """
+    Как сводка контактов — после коммита, одним пересчётом на транзакцию:
+    M2M и FK компании в транзакции меняются по одному.
+    """
+    on_commit_batch("company_features", company_ids, refresh_company_features)
+
+
+# Частоты признаков и N для IDF меняются медленно: точность не нужна,
+# поэтому считаются не чаще раза в час
+STATS_TIMEOUT = 60 * 60
+
+
+def _total_companies():
+    return cache.get_or_set("similar_companies:total", Company.objects.count, STATS_TIMEOUT) or 1
+
+
+def _feature_frequencies(features):
+    keys = {f"similar_companies:df:{feature}": feature for feature in features}
+    cached = cache.get_many(keys)
+    df = {keys[key]: n for key, n in cached.items()}
+
+    missing = [feature for feature in features if feature not in df]
+    if missing:
+        counted = dict(
+            CompanyFeature.objects
+            .filter(feature__in=missing)
+            .values_list("feature")
+            .annotate(n=Count("company_id"))
+        )
+        fresh = {feature: counted.get(feature, 0) for feature in missing}
+        cache.set_many({f"similar_companies:df:{f}": n for f, n in fresh.items()}, STATS_TIMEOUT)
+        df.update(fresh)
+    return df
+
+
+def _idf(df, total):
+    return math.log(1 + total / max(df, 1))
+
+
+def find_similar_companies(company_id, limit):
+    """
+    [(id компании, оценка, [общие признаки])], лучшие первыми.
+
+    1. Частоты признаков компании — GROUP BY по обратному индексу (с кэшем).
+    2. Кандидаты — взвешенная сумма по спискам компаний редких признаков
+       (не длиннее SIMILAR_COMPANIES_MAX_POSTINGS) в SQL; частые признаки
+       (вся область, КРП) кандидатов не дают, чтобы не читать полкаталога.
+    3. Точная оценка кандидатов по всем признакам, включая частые.
+
+    Если редких признаков нет совсем, кандидаты — первые по id компании
+    с самым редким из частых признаков (по индексу признак+компания):
+    выдача стабильна, но это не лучшие совпадения по всему каталогу.
+    """
+    source = dict(CompanyFeature.objects.filter(company_id=company_id).values_list("feature", "weight"))
+    if not source:
+        return []
+
+    df = _feature_frequencies(list(source))
+    total = _total_companies()
+    # вклад признака, общий для всех кандидатов: вес у источника * IDF
+    factor = {feature: weight * _idf(df.get(feature, 1), total) for feature, weight in source.items()}
+
+    max_postings = settings.SIMILAR_COMPANIES_MAX_POSTINGS
+    rare = [feature for feature in source if df.get(feature, 0) <= max_postings]
+
+    postings = CompanyFeature.objects.exclude(company_id=company_id)
+    if rare:
+        candidates = list(
+            postings
+            .filter(feature__in=rare)
+            .values("company_id")
+            .annotate(score=Sum(F("weight") * Case(
+                *[When(feature=feature, then=Value(factor[feature])) for feature in rare],
+                output_field=FloatField(),
+            )))
+            .order_by("-score", "company_id")
+            .values_list("company_id", flat=True)[:settings.SIMILAR_COMPANIES_CANDIDATES]
+        )
+    else:
+        # только частые признаки: берём часть компаний самого редкого,
+        # при равной частоте — признак по алфавиту
+        rarest = min(source, key=lambda feature: (df.get(feature, 0), feature))
+        candidates = list(
+            postings
+            .filter(feature=rarest)
+            .order_by("company_id")
+            .values_list("company_id", flat=True)[:settings.SIMILAR_COMPANIES_CANDIDATES]
+        )
+    if not candidates:
+        return []
+
+    scores = {}
+    shared = {}
+    for candidate_id, feature, weight in (
+        CompanyFeature.objects
+        .filter(company_id__in=candidates, feature__in=source)
+        .values_list("company_id", "feature", "weight")
+    ):
+        scores[candidate_id] = scores.get(candidate_id, 0) + weight * factor[feature]
+        shared.setdefault(candidate_id, []).append(feature)
+
+    ranked = sorted(scores, key=lambda pk: (-scores[pk], pk))[:limit]
+    return [(pk, scores[pk], sorted(shared[pk])) for pk in ranked]
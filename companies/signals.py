@@ -0,0 +1,115 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from dictionaries.models import Oked, Product, Tnved
+from metrics.models import GosZakupCustomer, GosZakupSupplier, Nds, Taxes
+from programs.models import ProgramParticipation
+
+from .models import Certificate, Company, CompanyChange, CompanyContact, ContactEmail, ContactPhone
+from .services.company_changes import mark_companies_changed, schedule_company_log
+from .services.company_queries import M2M_FIELDS
+from .services.contact_summary import schedule_contact_summary_refresh
+from .services.detail_cache import invalidate_company_detail
+from .services.similar_companies import schedule_feature_refresh
+
+
+@receiver(post_save, sender=Company)
+def company_saved(sender, instance, **kwargs):
+    # сохранения из админки, prg_loader и т.д.
+    schedule_company_log([(instance.pk, instance.company_bin)])
+    invalidate_company_detail([instance.pk])
+    schedule_feature_refresh([instance.pk])
+
+
+@receiver(post_delete, sender=Company)
+def company_deleted(sender, instance, **kwargs):
+    schedule_company_log([(instance.pk, instance.company_bin)], action=CompanyChange.ACTION_DELETE)
+    invalidate_company_detail([instance.pk])
+
+
+@receiver(post_save, sender=CompanyContact)
+@receiver(post_delete, sender=CompanyContact)
+def contact_changed(sender, instance, **kwargs):
+    schedule_contact_summary_refresh([instance.company_id])
+    mark_companies_changed([instance.company_id])
+
+
+@receiver(post_save, sender=ContactPhone)
+@receiver(post_delete, sender=ContactPhone)
+@receiver(post_save, sender=ContactEmail)
+@receiver(post_delete, sender=ContactEmail)
+def contact_detail_changed(sender, instance, **kwargs):
+    try:
+        company_id = instance.contact.company_id
+    except CompanyContact.DoesNotExist:
+        return
+    schedule_contact_summary_refresh([company_id])
+    mark_companies_changed([company_id])
+
+
+@receiver(post_save, sender=Taxes)
+@receiver(post_delete, sender=Taxes)
+@receiver(post_save, sender=Nds)
+@receiver(post_delete, sender=Nds)
+@receiver(post_save, sender=GosZakupSupplier)
+@receiver(post_delete, sender=GosZakupSupplier)
+@receiver(post_save, sender=GosZakupCustomer)
+@receiver(post_delete, sender=GosZakupCustomer)
+@receiver(post_save, sender=ProgramParticipation)
+@receiver(post_delete, sender=ProgramParticipation)
+def company_child_changed(sender, instance, **kwargs):
+    mark_companies_changed([instance.company_id])
+
+
+# M2M компании: through-модель -> поле Company
+COMPANY_M2M = {
+    Company._meta.get_field(name).remote_field.through: Company._meta.get_field(name)
+    for name in M2M_FIELDS
+}
+
+
+def _linked_company_ids(field, target_ids):
+    # компании, связанные через M2M-поле field с элементами target_ids
+    through = field.remote_field.through
+    return list(
+        through.objects
+        .filter(**{f"{field.m2m_reverse_field_name()}__in": target_ids})
+        .values_list(field.m2m_field_name(), flat=True)
+    )
+
+
+def _company_links_changed(field, company_ids):
+    mark_companies_changed(company_ids)
+    if field.name != "certificates":
+        # сертификаты в вектор похожести не входят
+        schedule_feature_refresh(company_ids)
+
+
+@receiver(m2m_changed, sender=Company.product.through)
+@receiver(m2m_changed, sender=Company.certificates.through)
+@receiver(m2m_changed, sender=Company.secondary_okeds.through)
+@receiver(m2m_changed, sender=Company.tnveds.through)
+def company_m2m_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    field = COMPANY_M2M[sender]
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            _company_links_changed(field, [instance.pk])
+    elif action in ("post_add", "post_remove"):
+        # изменение со стороны классификатора: pk_set — id компаний
+        _company_links_changed(field, pk_set or ())
+    elif action == "pre_clear":
+        # post_clear со стороны классификатора приходит без pk_set —
+        # компании забираем до удаления связей
+        _company_links_changed(field, _linked_company_ids(field, [instance.pk]))
+
+
+@receiver(pre_delete, sender=Product)
+@receiver(pre_delete, sender=Certificate)
+@receiver(pre_delete, sender=Oked)
+@receiver(pre_delete, sender=Tnved)
+def company_m2m_target_deleted(sender, instance, **kwargs):
+    # удаление элемента классификатора убирает строки through-таблицы
+    # каскадом, без m2m_changed
+    for field in COMPANY_M2M.values():
+        if field.related_model is sender:
+            _company_links_changed(field, _linked_company_ids(field, [instance.pk]))
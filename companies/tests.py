@@ -1,3 +1,806 @@
-from django.test import TestCase
+import datetime
+import json
+import unittest
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+from django.test import AsyncClient, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from company_catalog_api.testing import APITestCase
+from dictionaries.models import Kato, Oked, Product, Tnved
+from dictionaries.services.classifier_snapshot import clear_snapshots
+from metrics.models import GosZakupCustomer, GosZakupSupplier, Nds, Taxes
+from programs.models import Program, ProgramParticipation
+from users.authentication import token_user_cache
+from users.models import User
+
+from .models import Company, CompanyChange, CompanyContact, CompanyContactSummary, ContactEmail, ContactPhone
+from .renderers import ORJSONRenderer, msgpack, orjson
+from .services.excel_builder import (
+    HEADER_ROWS,
+    SHEET_TITLE,
+    _render_shard,
+    build_rows,
+    excel_builder,
+    excel_builder_parallel,
+    prefetch_export_relations,
+    split_pks,
+)
+from .services.change_feed import prune_change_feed
+from .services.detail_cache import company_detail_cache_stats
+from .services.regional_stats import regional_stats
+from .services.similar_companies import find_similar_companies
+from .throttling import SlidingWindowScopedThrottle, sliding_window_hit
+
+
+def make_company(n, program=None):
+    company = Company.objects.create(company_bin=f"{n:012d}", name_ru=f"Компания {n}")
+    for year in (2022, 2023):
+        Taxes.objects.create(company=company, year=year, value=n * 10)
+        Nds.objects.create(company=company, year=year, value=n)
+        GosZakupSupplier.objects.create(company=company, year=year, value=n)
+        GosZakupCustomer.objects.create(company=company, year=year, value=n)
+    contact = CompanyContact.objects.create(company=company, full_name=f"Контакт {n}")
+    ContactPhone.objects.create(contact=contact, phone=f"+7 700 {n:07d}", is_primary=True)
+    ContactEmail.objects.create(contact=contact, email=f"c{n}@example.kz", is_primary=True)
+    if program:
+        ProgramParticipation.objects.create(company=company, program=program, year=2023)
+    return company
+
+
+class CompanyListQueryCountTests(APITestCase):
+    # 1 запрос на страницу компаний (+ сводка контактов через JOIN)
+    # и по одному батч-запросу на каждую prefetch-связь company_queryset()
+    # без ?fields= и ?expand= (LIST_DEFAULT_EXPAND и M2M_FIELDS из services/company_queries.py)
+    LIST_QUERIES = 11
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        program = Program.objects.create(name="Программа")
+        # сводки контактов пересчитываются в on_commit
+        with cls.captureOnCommitCallbacks(execute=True):
+            for n in range(1, 13):
+                make_company(n, program=program)
+
+    def test_query_count_does_not_depend_on_page_size(self):
+        for page_size in (3, 12):
+            with self.subTest(page_size=page_size), self.assertNumQueries(self.LIST_QUERIES):
+                response = self.client.get("/companies/get-company-data/", {"page_size": page_size})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.json()["results"]), page_size)
+
+    def test_list_item_carries_contact_summary_and_metrics(self):
+        response = self.client.get("/companies/get-company-data/", {"page_size": 1})
+        item = response.json()["results"][0]
+        self.assertEqual(item["contact_summary"]["primary_phone"], "+7 700 0000001")
+        self.assertEqual(sorted(t["year"] for t in item["taxes"]), [2022, 2023])
+        self.assertEqual(item["program_participations"][0]["program"]["name"], "Программа")
+
+
+class CompanyFastSerializationTests(APITestCase):
+    """
+    Быстрый путь (services/company_fast.py) и orjson должны отдавать
+    ровно те же байты, что CompanySerializer + JSONRenderer.
+    """
+    LIST_PARAMS = [
+        {},
+        {"expand": "contacts,contact_summary,taxes"},
+        {"fields": "id,name_ru,register_date,updated,product,kato"},
+        {"fields": "name_ru,contact_summary,program_participations"},
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        program = Program.objects.create(name="Программа", description="Описание\u2028строка")
+        product = Product.objects.create(name="Товар")
+        with cls.captureOnCommitCallbacks(execute=True):
+            for n in range(1, 6):
+                company = make_company(n, program=program if n % 2 else None)
+                company.register_date = datetime.date(2020, 1, n)
+                company.save()
+                company.product.add(product)
+
+    def get_both(self, url, params):
+        contents = []
+        for fast in (True, False):
+            caches["company_detail"].clear()
+            with override_settings(COMPANY_FAST_SERIALIZATION=fast):
+                response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            contents.append(response.content)
+        return contents
+
+    def test_list_matches_serializer(self):
+        for params in self.LIST_PARAMS:
+            with self.subTest(params=params):
+                fast, slow = self.get_both("/companies/get-company-data/", params)
+                self.assertEqual(fast, slow)
+
+    def test_detail_matches_serializer(self):
+        for params in ({}, {"fields": "name_ru,product,updated"}):
+            with self.subTest(params=params):
+                fast, slow = self.get_both("/companies/info/000000000001/", params)
+                self.assertEqual(fast, slow)
+
+    @unittest.skipIf(orjson is None, "orjson не установлен")
+    def test_orjson_renderer_matches_json_renderer(self):
+        data = self.client.get("/companies/get-company-data/").json()
+        data["now"] = datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    @unittest.skipIf(msgpack is None, "msgpack не установлен")
+    def test_msgpack_matches_json_structure(self):
+        as_json = self.client.get("/companies/get-company-data/", HTTP_ACCEPT="application/json")
+        as_msgpack = self.client.get("/companies/get-company-data/", HTTP_ACCEPT="application/msgpack")
+        self.assertEqual(as_msgpack["Content-Type"], "application/msgpack")
+        self.assertEqual(msgpack.unpackb(as_msgpack.content), as_json.json())
+
+
+class SimilarCompaniesTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        region = Kato.objects.create(kato_code="750000000", kato_name="г. Алматы", path="750000000/")
+        district = Kato.objects.create(kato_code="751010000", kato_name="Район", parent=region, path="750000000/751010000/")
+        oked = Oked.objects.create(oked_code="01110", oked_name="Выращивание зерновых")
+        tnved = Tnved.objects.create(tn_ved_code="1001", tn_ved_name="Пшеница")
+
+        # признаки пересчитываются в on_commit
+        with cls.captureOnCommitCallbacks(execute=True):
+            cls.source = Company.objects.create(company_bin="000000000001", primary_oked=oked, kato=district)
+            cls.source.tnveds.add(tnved)
+            cls.twin = Company.objects.create(company_bin="000000000002", primary_oked=oked, kato=district)
+            cls.twin.tnveds.add(tnved)
+            cls.same_oked = Company.objects.create(company_bin="000000000003", primary_oked=oked, kato=region)
+            cls.same_region = Company.objects.create(company_bin="000000000004", kato=district)
+            Company.objects.create(company_bin="000000000005")
+
+    def setUp(self):
+        super().setUp()
+        # частоты признаков кэшируются
+        caches["default"].clear()
+
+    def test_features_follow_company_changes(self):
+        self.assertEqual(
+            dict(self.source.features.values_list("feature", "weight")),
+            {"oked:01110": 3.0, "tnved:1001": 2.0, "kato:751010000": 1.0, "kato:750000000": 0.5},
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.twin.tnveds.clear()
+            self.twin.kato = None
+            self.twin.save()
+        self.assertEqual(list(self.twin.features.values_list("feature", flat=True)), ["oked:01110"])
+
+    def test_ranked_by_weighted_overlap(self):
+        response = self.client.get("/companies/similar/000000000001/")
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertEqual([r["company_bin"] for r in results], ["000000000002", "000000000003", "000000000004"])
+        self.assertEqual(results[1]["shared"], ["kato:750000000", "oked:01110"])
+
+    @override_settings(SIMILAR_COMPANIES_MAX_POSTINGS=2)
+    def test_common_features_do_not_produce_candidates(self):
+        # ОКЭД и КАТО есть у трёх компаний и больше: кандидатов даёт только ТН ВЭД,
+        # но оценка учитывает все общие признаки
+        similar = find_similar_companies(self.source.pk, 10)
+        self.assertEqual([(pk, shared) for pk, _, shared in similar], [
+            (self.twin.pk, ["kato:750000000", "kato:751010000", "oked:01110", "tnved:1001"]),
+        ])
+
+    @override_settings(SIMILAR_COMPANIES_MAX_POSTINGS=1, SIMILAR_COMPANIES_CANDIDATES=2)
+    def test_only_common_features_give_stable_candidates(self):
+        # без ТН ВЭД редких признаков нет: ОКЭД и район встречаются по три раза,
+        # берётся район (по алфавиту) и первые по id компании с ним
+        with self.captureOnCommitCallbacks(execute=True):
+            self.source.tnveds.clear()
+        similar = find_similar_companies(self.source.pk, 10)
+        self.assertEqual([pk for pk, _, _ in similar], [self.twin.pk, self.same_region.pk])
+
+
+class RegionalStatsTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        with cls.captureOnCommitCallbacks(execute=True):
+            region = Kato.objects.create(kato_code="750000000", kato_name="г. Алматы", path="750000000/")
+            district = Kato.objects.create(kato_code="751010000", kato_name="Район", parent=region, path="750000000/751010000/")
+            village = Kato.objects.create(kato_code="751010100", kato_name="Село", parent=district, path="750000000/751010000/751010100/")
+            oked = Oked.objects.create(oked_code="01110", oked_name="Выращивание зерновых", path="01110/")
+
+        for n, kato in enumerate((region, district, village, village, None), start=1):
+            company = Company.objects.create(company_bin=f"{n:012d}", kato=kato, primary_oked=oked if n > 2 else None)
+            for year in (2022, 2023):
+                Taxes.objects.create(company=company, year=year, value=n)
+                GosZakupSupplier.objects.create(company=company, year=year, value=10 * n)
+
+    def setUp(self):
+        super().setUp()
+        clear_snapshots()
+
+    def rows(self, params):
+        response = self.client.get("/companies/regions/", params)
+        self.assertEqual(response.status_code, 200)
+        return [(r["code"], r["depth"], r["companies"], r["taxes"], r["goszakupsupplier"]) for r in response.json()["results"]]
+
+    def test_rolls_up_to_depth(self):
+        self.assertEqual(self.rows({"depth": 1, "year": 2023}), [
+            ("750000000", 1, 4, 10.0, 100.0),
+            (None, None, 1, 5.0, 50.0),
+        ])
+        # компания самой области остаётся в строке области
+        self.assertEqual(self.rows({"depth": 2}), [
+            ("751010000", 2, 3, 18.0, 180.0),
+            ("750000000", 1, 1, 2.0, 20.0),
+            (None, None, 1, 10.0, 100.0),
+        ])
+
+    def test_filters_like_company_list(self):
+        self.assertEqual(self.rows({"depth": 3, "oked": "01110", "year": 2022}), [
+            ("751010100", 3, 2, 7.0, 70.0),
+            (None, None, 1, 5.0, 50.0),
+        ])
+
+    def test_m2m_join_does_not_multiply_totals(self):
+        first = Product.objects.create(name="Зерно")
+        second = Product.objects.create(name="Мука")
+        company = Company.objects.get(company_bin="000000000003")
+        company.product.add(first, second)
+
+        # JOIN по M2M даёт компанию дважды
+        companies_qs = Company.objects.filter(product__in=[first, second])
+        self.assertEqual(companies_qs.count(), 2)
+        rows = regional_stats(companies_qs, depth=1, year=2023)
+        self.assertEqual([(r["code"], r["companies"], r["taxes"]) for r in rows], [("750000000", 1, 3.0)])
+
+
+class MetricRankingTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        with cls.captureOnCommitCallbacks(execute=True):
+            region = Kato.objects.create(kato_code="750000000", kato_name="г. Алматы", path="750000000/")
+        # (2022, 2023): рост у 2 — в 3 раза, у 3 — самый большой прирост
+        values = {1: (100, 115), 2: (10, 30), 3: (200, 260), 4: (None, 500)}
+        for n, (previous, current) in values.items():
+            company = Company.objects.create(company_bin=f"{n:012d}", kato=region if n % 2 else None)
+            if previous is not None:
+                Taxes.objects.create(company=company, year=2022, value=previous)
+            Taxes.objects.create(company=company, year=2023, value=current)
+
+    def setUp(self):
+        super().setUp()
+        clear_snapshots()
+
+    def bins(self, params):
+        response = self.client.get("/companies/top/", {"metric": "taxes", **params})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["year"], 2023)
+        return [r["company_bin"][-1] for r in response.json()["results"]]
+
+    def test_orders(self):
+        self.assertEqual(self.bins({}), ["4", "3", "1", "2"])
+        self.assertEqual(self.bins({"order": "growth"}), ["2", "3", "1"])
+        self.assertEqual(self.bins({"order": "delta", "limit": 2}), ["3", "2"])
+
+    def test_classifier_subtree(self):
+        self.assertEqual(self.bins({"kato": "750000000"}), ["3", "1"])
+
+    def test_growth_fields(self):
+        item = self.client.get("/companies/top/", {"metric": "taxes", "order": "growth"}).json()["results"][0]
+        self.assertEqual((item["previous"], item["delta"], item["growth"]), (10.0, 20.0, 2.0))
+
+    def test_own_throttle_budget(self):
+        # опрос /top/ не съедает бюджет поиска по списку и другие аналитические эндпоинты
+        caches["throttle"].clear()
+        rates = {"company_top": "1/min", "company_list_expensive": "1/min", "company_facets": "1/min"}
+        with mock.patch.dict(SlidingWindowScopedThrottle.THROTTLE_RATES, rates):
+            self.assertEqual(self.client.get("/companies/top/", {"metric": "taxes"}).status_code, 200)
+            self.assertEqual(self.client.get("/companies/top/", {"metric": "taxes"}).status_code, 429)
+            self.assertEqual(self.client.get("/companies/get-company-data/", {"search": "Компания"}).status_code, 200)
+            self.assertEqual(self.client.get("/companies/facets/").status_code, 200)
+
+
+class ExcelExportTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        with cls.captureOnCommitCallbacks(execute=True):
+            cls.companies = [make_company(n) for n in range(1, 6)]
+
+    def test_shards_keep_incoming_order(self):
+        pks = list(Company.objects.order_by("-name_ru").values_list("pk", flat=True))
+        chunks = split_pks(pks, 2)
+        self.assertEqual([pk for chunk in chunks for pk in chunk], pks)
+
+        rows = [row for chunk in chunks for row in _render_shard(chunk)]
+        self.assertEqual([row[0] for row in rows], [f"Компания {n}" for n in range(5, 0, -1)])
+        self.assertIn("+7 700 0000005", rows[0][3])
+
+    def test_single_process_by_default(self):
+        wb = excel_builder(Company.objects.order_by("-name_ru"), {})
+        ws = wb.active
+        self.assertEqual(ws.cell(row=HEADER_ROWS + 1, column=1).value, "Компания 5")
+        self.assertEqual(ws.max_row, HEADER_ROWS + 5)
+
+    def test_contacts_without_summary_are_prefetched(self):
+        CompanyContactSummary.objects.filter(company__in=self.companies[:3]).delete()
+        qs = prefetch_export_relations(Company.objects.order_by("name_ru"))
+        # контакты компаний без сводки — тремя батч-запросами, а не по запросам на компанию
+        with self.assertNumQueries(9):
+            rows = list(build_rows(qs))
+        self.assertIn("Контакт 1: +7 700 0000001; c1@example.kz", rows[0][3])
+        self.assertEqual(rows[0][3], rows[4][3].replace("5", "1"))
+
+
+class ParallelExcelExportTests(TransactionTestCase):
+    # строки готовят дочерние процессы — данным нужен настоящий коммит
+
+    def setUp(self):
+        companies = [make_company(n) for n in range(1, 6)]
+        self.pks = [company.pk for company in reversed(companies)]
+
+    def names(self, ws):
+        return [ws.cell(row=row, column=1).value for row in range(HEADER_ROWS + 1, ws.max_row + 1)]
+
+    def test_workers_keep_incoming_order(self):
+        wb = excel_builder_parallel(self.pks, {}, workers=2)
+        self.assertEqual(wb.sheetnames, [SHEET_TITLE])
+        self.assertEqual(self.names(wb.active), [f"Компания {n}" for n in range(5, 0, -1)])
+        self.assertIn("+7 700 0000005", wb.active.cell(row=HEADER_ROWS + 1, column=4).value)
+
+    def test_sheet_per_shard_past_row_limit(self):
+        with mock.patch("companies.services.excel_builder.EXCEL_MAX_DATA_ROWS", 2):
+            wb = excel_builder_parallel(self.pks, {}, workers=2)
+        self.assertEqual(wb.sheetnames, [SHEET_TITLE, f"{SHEET_TITLE} (2)", f"{SHEET_TITLE} (3)"])
+        self.assertEqual([self.names(ws) for ws in wb.worksheets], [
+            ["Компания 5", "Компания 4"],
+            ["Компания 3", "Компания 2"],
+            ["Компания 1"],
+        ])
+
+
+class SparseFieldsetTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        with cls.captureOnCommitCallbacks(execute=True):
+            make_company(1)
+
+    def test_fields_limit_top_level_and_relations(self):
+        response = self.client.get("/companies/info/000000000001/", {"fields": "company_bin,name_ru,taxes"})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(set(data), {"company_bin", "name_ru", "taxes"})
+        self.assertEqual(len(data["taxes"]), 2)
+
+    def test_expand_replaces_default_relations(self):
+        response = self.client.get("/companies/get-company-data/", {"expand": "contacts"})
+        item = response.json()["results"][0]
+        self.assertEqual(item["contacts"][0]["full_name"], "Контакт 1")
+        self.assertNotIn("taxes", item)
+        self.assertNotIn("contact_summary", item)
+
+    def test_unknown_names_are_rejected(self):
+        self.assertEqual(self.client.get("/companies/get-company-data/", {"fields": "nope"}).status_code, 400)
+        self.assertEqual(self.client.get("/companies/info/000000000001/", {"expand": "nope"}).status_code, 400)
+
+
+class CompanyChangeSignalTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        with cls.captureOnCommitCallbacks(execute=True):
+            cls.company = make_company(1)
+            cls.product = Product.objects.create(name="Молоко")
+            cls.company.product.add(cls.product)
+
+    def changes(self):
+        return CompanyChange.objects.filter(company_id=self.company.pk).count()
+
+    def test_child_rows_are_batched_per_transaction(self):
+        before = self.changes()
+        with self.captureOnCommitCallbacks(execute=True):
+            for year in range(2010, 2015):
+                Taxes.objects.create(company=self.company, year=year, value=1)
+            contact = self.company.contacts.get()
+            ContactPhone.objects.create(contact=contact, phone="+7 700 1111111")
+            self.assertEqual(self.changes(), before)
+        self.assertEqual(self.changes(), before + 1)
+        self.assertIn("+7 700 1111111", CompanyContactSummary.objects.get(company=self.company).contacts_text)
+
+    def test_reverse_clear_marks_companies(self):
+        self.assertTrue(self.company.features.filter(feature__startswith="product:").exists())
+        before = self.changes()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.company_set.clear()
+        self.assertEqual(self.changes(), before + 1)
+        self.assertFalse(self.company.features.filter(feature__startswith="product:").exists())
+
+    def test_classifier_delete_marks_companies(self):
+        before = self.changes()
+        updated = Company.objects.get(pk=self.company.pk).updated
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.delete()
+        self.assertEqual(self.changes(), before + 1)
+        self.assertGreater(Company.objects.get(pk=self.company.pk).updated, updated)
+        self.assertFalse(self.company.features.filter(feature__startswith="product:").exists())
+
+
+class CompanyDetailCacheTests(APITestCase):
+    URL = "/companies/info/000000000001/"
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        with cls.captureOnCommitCallbacks(execute=True):
+            cls.company = make_company(1)
+
+    def setUp(self):
+        super().setUp()
+        caches["company_detail"].clear()
+
+    def stats(self):
+        return company_detail_cache_stats()
+
+    def test_second_request_is_a_hit(self):
+        first = self.client.get(self.URL)
+        with self.assertNumQueries(1):
+            second = self.client.get(self.URL)
+        self.assertEqual(first.json(), second.json())
+        self.assertEqual(self.stats()["misses"], 1)
+        self.assertEqual(self.stats()["hits"], 1)
+
+    def test_variants_are_cached_separately(self):
+        self.client.get(self.URL)
+        response = self.client.get(self.URL, {"fields": "company_bin"})
+        self.assertEqual(response.json(), {"company_bin": "000000000001"})
+        self.assertEqual(self.stats()["misses"], 2)
+
+    def test_related_change_invalidates_card(self):
+        self.client.get(self.URL)
+        with self.captureOnCommitCallbacks(execute=True):
+            Taxes.objects.create(company=self.company, year=2024, value=5)
+        years = [t["year"] for t in self.client.get(self.URL).json()["taxes"]]
+        self.assertIn(2024, years)
+        self.assertEqual(self.stats()["hits"], 0)
+
+    def test_etag_not_modified(self):
+        etag = self.client.get(self.URL)["ETag"]
+        self.assertEqual(self.client.get(self.URL, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_stats_endpoint_is_admin_only(self):
+        self.assertEqual(self.client.get("/companies/cache-stats/").status_code, 403)
+        self.user.is_staff = True
+        self.user.save()
+        self.client.get(self.URL)
+        response = self.client.get("/companies/cache-stats/")
+        self.assertEqual(response.json(), {"hits": 0, "misses": 1, "hit_ratio": 0.0})
+
+
+class CompanySearchTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Company.objects.create(company_bin="010140000001", name_ru="ТОО «Алматыстрой»", ceo="Иванов Пётр")
+        Company.objects.create(company_bin="020240000002", name_ru="АО «Казахтелеком»")
+
+    def bins(self, term):
+        response = self.client.get("/companies/get-company-data/", {"search": term})
+        return sorted(item["company_bin"] for item in response.json()["results"])
+
+    def test_word_prefixes_in_any_order(self):
+        self.assertEqual(self.bins("алматы"), ["010140000001"])
+        self.assertEqual(self.bins("пётр иван"), ["010140000001"])
+        self.assertEqual(self.bins("казах алматы"), [])
+
+    def test_digits_search_bin(self):
+        self.assertEqual(self.bins("020240000002"), ["020240000002"])
+        self.assertEqual(self.bins("0101"), ["010140000001"])
+
+    def test_index_follows_updates(self):
+        Company.objects.filter(company_bin="020240000002").update(name_ru="АО «Самрук»")
+        self.assertEqual(self.bins("казах"), [])
+        self.assertEqual(self.bins("самрук"), ["020240000002"])
+
+
+class CompanyFacetsTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        with cls.captureOnCommitCallbacks(execute=True):
+            region = Kato.objects.create(kato_code="750000000", kato_name="г. Алматы", path="750000000/")
+            first = Kato.objects.create(kato_code="751010000", kato_name="Алмалинский район", parent=region, path="750000000/751010000/")
+            second = Kato.objects.create(kato_code="751210000", kato_name="Ауэзовский район", parent=region, path="750000000/751210000/")
+            cls.dairy = Product.objects.create(name="Молочное")
+            milk = Product.objects.create(name="Молоко", parent=cls.dairy)
+            cheese = Product.objects.create(name="Сыр", parent=cls.dairy)
+
+            for n, kato, products in ((1, first, (milk, cheese)), (2, first, (milk,)), (3, second, ())):
+                company = Company.objects.create(company_bin=f"{n:012d}", name_ru=f"Компания {n}", kato=kato)
+                company.product.add(*products)
+
+    def facets(self, params=None):
+        response = self.client.get("/companies/facets/", params or {})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def counts(self, facet):
+        return [(item["name"], item["count"]) for item in facet["items"]]
+
+    def test_roots_without_filters(self):
+        data = self.facets()
+        self.assertEqual(data["total"], 3)
+        self.assertIsNone(data["kato"]["node"])
+        self.assertEqual(self.counts(data["kato"]), [("г. Алматы", 3)])
+        # компания с двумя товарами одного узла считается один раз
+        self.assertEqual(self.counts(data["product"]), [("Молочное", 2)])
+
+    def test_children_of_selected_node(self):
+        data = self.facets({"kato": "750000000", "product": str(self.dairy.pk)})
+        self.assertEqual(data["total"], 2)
+        self.assertEqual(data["kato"]["node"], {"code": "750000000", "name": "г. Алматы"})
+        self.assertEqual(self.counts(data["kato"]), [("Алмалинский район", 2), ("Ауэзовский район", 0)])
+        self.assertEqual(self.counts(data["product"]), [("Молоко", 2), ("Сыр", 1)])
+
+
+class ClassifierTreeFilterTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.dairy = Product.objects.create(name="Молочное")
+        milk = Product.objects.create(name="Молоко", parent=cls.dairy)
+        cheese = Product.objects.create(name="Сыр", parent=cls.dairy)
+        company = Company.objects.create(company_bin="000000000001", name_ru="Компания 1")
+        company.product.add(milk, cheese)
+
+    def bins(self, params):
+        response = self.client.get("/companies/get-company-data/", params)
+        self.assertEqual(response.status_code, 200)
+        return [item["company_bin"] for item in response.json()["results"]]
+
+    def test_subtree_of_many_to_many_has_no_duplicates(self):
+        self.assertEqual(self.bins({"product": str(self.dairy.pk)}), ["000000000001"])
+
+    def test_unknown_product_id_matches_nothing(self):
+        # id не префикс: несуществующий id не находит товары, чей id с него начинается
+        missing = Product.objects.order_by("-id").first().pk + 1
+        self.assertEqual(self.bins({"product": str(missing)}), [])
+
+
+class CompanyBulkLookupTests(APITestCase):
+    URL = "/companies/info/bulk/"
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        with cls.captureOnCommitCallbacks(execute=True):
+            for n in range(1, 5):
+                make_company(n)
+
+    def lookup(self, bins, params=""):
+        return self.client.post(self.URL + params, {"bins": bins}, format="json")
+
+    def test_found_and_not_found(self):
+        response = self.lookup(["000000000002", "999999999999", "000000000001", "000000000002"])
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(sorted(data["found"]), ["000000000001", "000000000002"])
+        self.assertEqual(data["not_found"], ["999999999999"])
+        self.assertEqual(data["found"]["000000000001"]["contacts"][0]["full_name"], "Контакт 1")
+
+    def test_query_count_does_not_depend_on_bins(self):
+        # company_bin__in + батч-запросы связей DETAIL_DEFAULT_EXPAND и M2M_FIELDS
+        for bins in (["000000000001"], [f"{n:012d}" for n in range(1, 5)]):
+            with self.subTest(bins=len(bins)), self.assertNumQueries(13):
+                self.lookup(bins)
+
+    def test_fields_and_validation(self):
+        data = self.lookup(["000000000003"], "?fields=name_ru").json()
+        self.assertEqual(data["found"], {"000000000003": {"name_ru": "Компания 3"}})
+        self.assertEqual(self.lookup(["12ab"]).status_code, 400)
+        self.assertEqual(self.lookup([]).status_code, 400)
+
+
+class CatalogDumpTests(TransactionTestCase):
+    # выгрузка под ASGI читает БД из своего потока — данным нужен настоящий коммит
+    URL = "/companies/dump/"
+
+    def setUp(self):
+        caches["throttle"].clear()
+        self.user = User.objects.create_user(email="dump@example.kz", password="x")
+        self.token = Token.objects.create(user=self.user)
+        for n in (2, 1):
+            make_company(n)
+
+    def records(self, content):
+        # первая строка — курсор журнала изменений на момент снимка
+        header, *records = [json.loads(line) for line in content.decode("utf-8").splitlines()]
+        self.assertEqual(list(header), ["next_cursor"])
+        return records
+
+    def test_wsgi_stream(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get(self.URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.is_async)
+        content = b"".join(response.streaming_content)
+        records = self.records(content)
+        self.assertEqual([r["company_bin"] for r in records], ["000000000002", "000000000001"])
+        cursor = json.loads(content.splitlines()[0])["next_cursor"]
+        self.assertEqual(cursor, CompanyChange.objects.order_by("-id").first().pk)
+        self.assertEqual(records[0]["taxes"], {"year": 2023, "value": 20.0})
+
+    async def test_asgi_stream_is_async(self):
+        response = await AsyncClient().get(self.URL, headers={"Authorization": f"Token {self.token.key}"})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        content = b"".join([chunk async for chunk in response.streaming_content])
+        self.assertEqual([r["company_bin"] for r in self.records(content)], ["000000000002", "000000000001"])
+
+
+@override_settings(CHANGE_FEED_SETTLE_SECONDS=0)
+class CompanyChangeFeedTests(APITestCase):
+    URL = "/companies/changes/"
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        with cls.captureOnCommitCallbacks(execute=True):
+            for n in range(1, 4):
+                Company.objects.create(company_bin=f"{n:012d}", name_ru=f"Компания {n}")
+
+    def feed(self, cursor=0, limit=100):
+        return self.client.get(self.URL, {"cursor": cursor, "limit": limit})
+
+    def test_cursor_pages_through_changes(self):
+        first = self.feed(limit=2).json()
+        self.assertEqual([r["company_bin"] for r in first["results"]], ["000000000001", "000000000002"])
+        self.assertTrue(first["has_more"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Company.objects.get(company_bin="000000000001").delete()
+
+        second = self.feed(first["next_cursor"]).json()
+        self.assertEqual(
+            [(r["company_bin"], r["action"]) for r in second["results"]],
+            [("000000000003", "upsert"), ("000000000001", "delete")],
+        )
+        self.assertFalse(second["has_more"])
+        self.assertEqual(self.feed(second["next_cursor"]).json()["results"], [])
+
+    @override_settings(CHANGE_FEED_SETTLE_SECONDS=60)
+    def test_recent_changes_are_held_back(self):
+        data = self.feed().json()
+        self.assertEqual(data["results"], [])
+        self.assertEqual(data["next_cursor"], 0)
+        self.assertTrue(data["has_more"])
+
+    def test_pruned_cursor_gets_gone(self):
+        latest = CompanyChange.objects.order_by("-id").first().pk
+        CompanyChange.objects.filter(pk__lt=latest).update(changed_at=timezone.now() - datetime.timedelta(days=10))
+        self.assertEqual(prune_change_feed(days=5), 2)
+
+        response = self.feed(0)
+        self.assertEqual(response.status_code, 410)
+        self.assertEqual(response.json()["next_cursor"], latest)
+        self.assertEqual(self.feed(latest - 1).status_code, 200)
+
+    def test_gap_in_ids_is_not_expired(self):
+        # дыра перед самой старой записью (откат вставки, скачок sequence) — не чистка
+        first, second, third = CompanyChange.objects.order_by("id")
+        CompanyChange.objects.filter(pk__in=[first.pk, second.pk]).delete()
+        response = self.feed(first.pk - 1)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r["company_bin"] for r in response.json()["results"]], [third.company_bin])
+
+
+class AsyncViewsTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.token = Token.objects.create(user=cls.user)
+        with cls.captureOnCommitCallbacks(execute=True):
+            for n in range(1, 4):
+                make_company(n)
+
+    def setUp(self):
+        super().setUp()
+        caches["throttle"].clear()
+        caches["company_detail"].clear()
+        token_user_cache.clear()
+        self.async_client = AsyncClient()
+
+    def auth(self):
+        return {"Authorization": f"Token {self.token.key}"}
+
+    async def test_requires_credentials(self):
+        response = await self.async_client.get("/companies/async/info/000000000001/")
+        self.assertEqual(response.status_code, 403)
+        response = await self.async_client.get(
+            "/companies/async/get-company-data/", headers={"Authorization": "Token nope"},
+        )
+        self.assertEqual(response.status_code, 403)
+
+    def sync_get(self, url):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        return client.get(url)
+
+    async def test_matches_sync_views(self):
+        detail = await self.async_client.get("/companies/async/info/000000000002/", headers=self.auth())
+        self.assertEqual(detail.status_code, 200)
+        sync_detail = await sync_to_async(self.sync_get)("/companies/info/000000000002/")
+        self.assertEqual(detail.json(), sync_detail.json())
+
+        page = await self.async_client.get("/companies/async/get-company-data/?page_size=2", headers=self.auth())
+        self.assertEqual(page.status_code, 200)
+        sync_page = await sync_to_async(self.sync_get)("/companies/get-company-data/?page_size=2")
+        self.assertEqual(page.json()["results"], sync_page.json()["results"])
+
+    async def test_shares_throttle_budget(self):
+        with mock.patch.dict(SlidingWindowScopedThrottle.THROTTLE_RATES, {"company_detail": "2/min"}):
+            for _ in range(2):
+                response = await self.async_client.get("/companies/async/info/000000000001/", headers=self.auth())
+                self.assertEqual(response.status_code, 200)
+            response = await self.async_client.get("/companies/async/info/000000000001/", headers=self.auth())
+            self.assertEqual(response.status_code, 429)
+            self.assertGreaterEqual(int(response["Retry-After"]), 1)
+
+            # тот же токен у DRF-представления — тот же бюджет
+            response = await sync_to_async(self.sync_get)("/companies/info/000000000001/")
+            self.assertEqual(response.status_code, 429)
+
+
+class SlidingWindowThrottleTests(unittest.TestCase):
+
+    def setUp(self):
+        caches["throttle"].clear()
+
+    def hit(self, now, scope="company_detail", num_requests=2):
+        return sliding_window_hit(scope, "token:test", num_requests, 60, now=now)
+
+    def test_limit_within_window(self):
+        self.assertIsNone(self.hit(0))
+        self.assertIsNone(self.hit(1))
+        self.assertIsNotNone(self.hit(2))
+        # отклонённый запрос бюджет не расходует
+        self.assertIsNotNone(self.hit(3))
+
+    def test_retry_after_when_current_window_is_full(self):
+        self.hit(0)
+        self.hit(0)
+        # в следующем окне 2 запроса прошлого весят полностью: место — через 60 + 30 c
+        self.assertEqual(self.hit(0), 90)
+        self.assertIsNotNone(self.hit(89))
+        self.assertIsNone(self.hit(90))
+
+    def test_retry_after_when_previous_window_weighs(self):
+        for _ in range(3):
+            self.hit(0, num_requests=3)
+        self.assertEqual(self.hit(60, num_requests=3), 20)
+        self.assertIsNotNone(self.hit(79, num_requests=3))
+        self.assertIsNone(self.hit(80, num_requests=3))
+
+    def test_scopes_have_separate_budgets(self):
+        self.hit(0)
+        self.hit(0)
+        self.assertIsNotNone(self.hit(0))
+        self.assertIsNone(self.hit(0, scope="company_list"))
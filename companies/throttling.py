@@ -0,0 +1,138 @@
+import hashlib
+import math
+import time
+
+from django.core.cache import caches
+from rest_framework.throttling import SimpleRateThrottle
+
+
+THROTTLE_CACHE_ALIAS = "throttle"
+
+# Параметры, которые сужают список; без них (или с ?search=) страница дорогая
+LIST_FILTER_PARAMS = ("kato", "oked", "krp", "product", "industry", "kfc", "program")
+
+
+def sliding_window_hit(scope, ident, num_requests, duration, now=None):
+    """
+    Скользящее окно на двух счётчиках: оценка = текущее окно + предыдущее
+    с весом непрошедшей доли. Сначала атомарный incr текущего окна, потом
+    проверка — параллельные запросы не проскакивают лимит между чтением
+    и записью; отклонённый запрос возвращается decr. Без записей в БД.
+    Возвращает None, если запрос пропущен (и учтён), иначе — сколько секунд ждать.
+    """
+    cache = caches[THROTTLE_CACHE_ALIAS]
+    now = time.time() if now is None else now
+
+    window = int(now // duration)
+    elapsed = now - window * duration
+    current_key = f"throttle:{scope}:{ident}:{window}"
+    previous_key = f"throttle:{scope}:{ident}:{window - 1}"
+
+    current = _incr(cache, current_key, timeout=duration * 2)
+    previous = cache.get(previous_key, 0)
+
+    weight = 1 - elapsed / duration
+    if previous * weight + current <= num_requests:
+        return None
+
+    try:
+        cache.decr(current_key)
+    except ValueError:
+        pass
+    # round: 60 * (1 - 2/3) не должно превращаться в 21 секунду
+    wait = round(_retry_after(current - 1, previous, num_requests, duration, elapsed), 6)
+    return max(1, math.ceil(wait))
+
+
+def _incr(cache, key, timeout):
+    if cache.add(key, 1, timeout=timeout):
+        return 1
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # ключ истёк между add и incr
+        cache.add(key, 1, timeout=timeout)
+        return 1
+
+
+def _retry_after(current, previous, num_requests, duration, elapsed):
+    """
+    Через сколько секунд запрос поместится в лимит. current — запросы
+    текущего окна без отклонённого.
+    """
+    if current < num_requests:
+        # место освободится в этом же окне, когда вес прошлого упадёт
+        # (previous > 0, иначе запрос прошёл бы)
+        return duration * (1 - (num_requests - current - 1) / previous) - elapsed
+    # в этом окне места нет; в следующем текущее окно станет прошлым
+    # с полным весом и будет убывать, пока не освободится место
+    return duration - elapsed + duration * (1 - (num_requests - 1) / current)
+
+
+def throttle_ident(token_key=None, user=None, remote_addr=None):
+    # отдельный бюджет на каждый токен; без токена — на пользователя, анониму — на IP
+    if token_key:
+        return "token:" + hashlib.sha256(token_key.encode()).hexdigest()[:20]
+    if user is not None and user.is_authenticated:
+        return f"user:{user.pk}"
+    return f"ip:{remote_addr}"
+
+
+class SlidingWindowScopedThrottle(SimpleRateThrottle):
+    """
+    Как ScopedRateThrottle (scope — из view.throttle_scope, лимит — из
+    DEFAULT_THROTTLE_RATES), но со скользящим окном на счётчиках в кэше
+    "throttle" вместо списка времён запросов.
+    """
+    scope_attr = "throttle_scope"
+
+    def __init__(self):
+        # лимит зависит от view, он определяется в allow_request
+        self._wait = None
+
+    def get_scope(self, request, view):
+        return getattr(view, self.scope_attr, None)
+
+    def get_ident_key(self, request):
+        token_key = getattr(request.auth, "key", None)
+        return throttle_ident(token_key, request.user, self.get_ident(request))
+
+    def allow_request(self, request, view):
+        self.scope = self.get_scope(request, view)
+        if not self.scope:
+            return True
+
+        self.rate = self.THROTTLE_RATES.get(self.scope)
+        if self.rate is None:
+            return True
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+
+        self._wait = sliding_window_hit(self.scope, self.get_ident_key(request), self.num_requests, self.duration)
+        return self._wait is None
+
+    def wait(self):
+        return self._wait
+
+
+def throttle_wait(scope, ident):
+    """
+    Для представлений вне DRF (async_views.py): None или сколько ждать.
+    """
+    rate = SlidingWindowScopedThrottle.THROTTLE_RATES.get(scope)
+    if rate is None:
+        return None
+    num_requests, duration = SlidingWindowScopedThrottle().parse_rate(rate)
+    return sliding_window_hit(scope, ident, num_requests, duration)
+
+
+def is_expensive_list(query_params):
+    return bool(query_params.get("search")) or not any(query_params.get(p) for p in LIST_FILTER_PARAMS)
+
+
+class CompanyListThrottle(SlidingWindowScopedThrottle):
+    """
+    Список компаний: страницы без фильтров и поиск — отдельный, меньший бюджет.
+    """
+
+    def get_scope(self, request, view):
+        return "company_list_expensive" if is_expensive_list(request.query_params) else "company_list"
@@ -1,9 +1,22 @@
 from django.urls import path
 
-from . import views
+from . import async_views, views
 
 urlpatterns = [
     path("load-company-data/", views.LoadCompanyData.as_view()),
     path("get-company-data/", views.GetCompanyData.as_view()),
-    path("info/<str:company_bin>/", views.CompanyDetailAPIView.as_view())
+    path("info/bulk/", views.CompanyBulkLookup.as_view()),
+    path("info/<str:company_bin>/", views.CompanyDetailAPIView.as_view()),
+    path("changes/", views.CompanyChangeFeed.as_view()),
+    path("dump/", views.CompanyCatalogDump.as_view()),
+    path("facets/", views.CompanyFacets.as_view()),
+    path("regions/", views.CompanyRegionalStats.as_view()),
+    path("top/", views.CompanyMetricRanking.as_view()),
+    path("similar/<str:company_bin>/", views.CompanySimilar.as_view()),
+    path("cache-stats/", views.CompanyDetailCacheStats.as_view()),
+
+    # ASGI: те же ответы без блокировки потока
+    path("async/load-company-data/", async_views.load_company_data),
+    path("async/get-company-data/", async_views.company_list),
+    path("async/info/<str:company_bin>/", async_views.company_detail),
 ]
\ No newline at end of file
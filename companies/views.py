@@ -1,23 +1,63 @@
+import hashlib
 import requests
 import time
 from datetime import datetime
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.generics import ListAPIView
 from rest_framework.generics import RetrieveAPIView
+from rest_framework.generics import GenericAPIView
 from rest_framework import filters
+from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from django.db import transaction
 from .serializers import *
 from .models import *
 from metrics.models import *
 from dictionaries.models import *
 
+from .filters import ClassifierTreeFilter, CompanySearchFilter, split_param
+from .pagination import CompanyCursorPagination
+from .services.change_feed import ChangeFeedExpired, read_change_feed
+from .services.catalog_dump import aiter_catalog_ndjson, iter_catalog_ndjson
+from .services.classifier_tree import (
+    CLASSIFIER_TREES,
+    flat_counts,
+    next_level_counts,
+    resolve_node,
+)
+from .renderers import company_renderer_classes
+from .throttling import CompanyListThrottle, SlidingWindowScopedThrottle
+from .services.company_fast import build_company_dicts, fast_company_queryset
+from .services.company_queries import (
+    DETAIL_DEFAULT_EXPAND,
+    LIST_DEFAULT_EXPAND,
+    company_queryset,
+    parse_sparse_fieldset,
+)
+from .services.detail_cache import (
+    company_detail_cache_stats,
+    detail_etag,
+    detail_variant,
+    get_company_detail,
+    set_company_detail,
+)
 from .services.prg_loader import load_company_data_by_bin, CompanyLoadError
+from .services.metric_rankings import latest_year, rank_companies
+from .services.regional_stats import regional_stats
+from .services.similar_companies import find_similar_companies
 
 
 class LoadCompanyData(APIView):
+    throttle_classes = [SlidingWindowScopedThrottle]
+    throttle_scope = "company_load"
+
     def post(self, request):
         serializer = CompanyBinSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -30,34 +70,370 @@ class LoadCompanyData(APIView):
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     
-class GetCompanyData(ListAPIView):
+class CompanySparseFieldsetMixin:
+    """
+    ?fields= / ?expand= для эндпоинтов компаний: один и тот же разобранный
+    набор полей определяет и queryset, и сериализатор.
+    """
+    default_expand = ()
+
+    def get_sparse_fieldset(self):
+        if not hasattr(self, "_sparse_fieldset"):
+            self._sparse_fieldset = parse_sparse_fieldset(self.request.query_params, self.default_expand)
+        return self._sparse_fieldset
+
+    def get_queryset(self):
+        return company_queryset(self.get_sparse_fieldset())
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["sparse_fieldset"] = self.get_sparse_fieldset()
+        return context
+
+
+class GetCompanyData(CompanySparseFieldsetMixin, ListAPIView):
     permission_classes = [IsAuthenticated]
+    renderer_classes = company_renderer_classes()
     serializer_class = CompanySerializer
-    filter_backends = [filters.SearchFilter]
-    search_fields = ["name_ru", "name_kz", "company_bin"]
+    pagination_class = CompanyCursorPagination
+    filter_backends = [CompanySearchFilter, ClassifierTreeFilter]
+    throttle_classes = [CompanyListThrottle]
+    default_expand = LIST_DEFAULT_EXPAND
 
-    def get_queryset(self):
-        return Company.objects.all()
+    def list(self, request, *args, **kwargs):
+        if not settings.COMPANY_FAST_SERIALIZATION:
+            return super().list(request, *args, **kwargs)
 
+        # фильтры и курсорная пагинация работают и с values()-queryset
+        sparse = self.get_sparse_fieldset()
+        page = self.paginate_queryset(self.filter_queryset(fast_company_queryset(sparse)))
+        return self.get_paginated_response(build_company_dicts(page, sparse))
 
-class CompanyDetailAPIView(RetrieveAPIView):
+
+class CompanyDetailAPIView(CompanySparseFieldsetMixin, RetrieveAPIView):
     permission_classes = [IsAuthenticated]
+    renderer_classes = company_renderer_classes()
     serializer_class = CompanySerializer
     lookup_field = "company_bin"
+    throttle_classes = [SlidingWindowScopedThrottle]
+    throttle_scope = "company_detail"
+    default_expand = DETAIL_DEFAULT_EXPAND
 
-    def get_queryset(self):
-        return (
+    def get_variant(self):
+        return detail_variant(self.request.query_params, self.request.accepted_renderer.format)
+
+    def get_etag(self, updated):
+        return detail_etag(self.kwargs["company_bin"], updated, self.get_variant())
+
+    def retrieve(self, request, *args, **kwargs):
+        # Company.updated сдвигается и при изменении связанных данных (см. signals.py),
+        # поэтому валидатор — один запрос по уникальному индексу БИН
+        row = (
             Company.objects
-            .select_related("krp", "kse", "kfc", "kato", "industry", "primary_oked")
-            .prefetch_related(
-                "product",
-                "secondary_okeds",
-                "taxes",
-                "nds",
-                "goszakupsupplier",
-                "goszakupcustomer",
-                "program_participations__program",
-                "contacts__emails",
-                "contacts__phones",
+            .filter(company_bin=kwargs["company_bin"])
+            .values_list("pk", "updated")
+            .first()
+        )
+        if row is None:
+            raise NotFound()
+        company_id, updated = row
+
+        etag = self.get_etag(updated)
+        last_modified = int(updated.timestamp())
+
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        variant = self.get_variant()
+        data = get_company_detail(company_id, updated, variant)
+        if data is None:
+            data = self.serialize_company(company_id)
+            set_company_detail(company_id, updated, variant, data)
+
+        response = Response(data)
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        return response
+
+    def serialize_company(self, company_id):
+        if not settings.COMPANY_FAST_SERIALIZATION:
+            return self.get_serializer(self.get_object()).data
+
+        sparse = self.get_sparse_fieldset()
+        items = build_company_dicts(fast_company_queryset(sparse).filter(pk=company_id), sparse)
+        if not items:
+            raise NotFound()
+        return items[0]
+
+
+class CompanyBulkLookup(CompanySparseFieldsetMixin, GenericAPIView):
+    """
+    POST {"bins": [...]} — карточки сразу по многим БИН: один запрос
+    company_bin__in плюс батч-prefetch связей, вместо запроса на каждый БИН.
+    ?fields= / ?expand= — как у /info/<bin>/.
+    """
+    permission_classes = [IsAuthenticated]
+    renderer_classes = company_renderer_classes()
+    serializer_class = CompanySerializer
+    throttle_classes = [SlidingWindowScopedThrottle]
+    throttle_scope = "company_bulk"
+    default_expand = DETAIL_DEFAULT_EXPAND
+
+    def get_queryset(self):
+        sparse = self.get_sparse_fieldset()
+        if sparse.fields is not None:
+            # БИН нужен для ключа ответа, даже если его нет в ?fields=
+            sparse = sparse._replace(fields=sparse.fields | {"company_bin"})
+        return company_queryset(sparse)
+
+    def post(self, request):
+        lookup = CompanyBulkLookupSerializer(data=request.data)
+        lookup.is_valid(raise_exception=True)
+        bins = lookup.validated_data["bins"]
+
+        companies = list(self.get_queryset().filter(company_bin__in=bins))
+        serializer = self.get_serializer(companies, many=True)
+
+        found = {
+            company.company_bin: data
+            for company, data in zip(companies, serializer.data)
+        }
+        not_found = [b for b in bins if b not in found]
+
+        return Response({"found": found, "not_found": not_found})
+
+
+class CompanyChangeFeed(CompanySparseFieldsetMixin, GenericAPIView):
+    """
+    Инкрементальная синхронизация: GET ?cursor=<next_cursor прошлого ответа>.
+    Изменения контактов, метрик и программ — изменения самой компании;
+    удалённые компании приходят с action="delete" и company=null.
+    Если курсор старше хранимого журнала — 410 с reset=true и курсором,
+    с которого продолжать после полной выгрузки.
+    ?fields= / ?expand= — как у списка.
+    """
+    permission_classes = [IsAuthenticated]
+    renderer_classes = company_renderer_classes()
+    serializer_class = CompanySerializer
+    throttle_classes = [SlidingWindowScopedThrottle]
+    throttle_scope = "company_changes"
+    default_expand = LIST_DEFAULT_EXPAND
+
+    def get(self, request):
+        params = ChangeFeedParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+
+        try:
+            changes, next_cursor, has_more = read_change_feed(
+                params.validated_data["cursor"],
+                params.validated_data["limit"],
             )
+        except ChangeFeedExpired as e:
+            return Response(
+                {
+                    "detail": "Журнал изменений за этот период удалён: нужна полная выгрузка /companies/dump/.",
+                    "reset": True,
+                    "next_cursor": e.next_cursor,
+                },
+                status=status.HTTP_410_GONE,
+            )
+
+        upsert_ids = [c["company_id"] for c in changes if c["action"] == CompanyChange.ACTION_UPSERT]
+        companies = list(self.get_queryset().filter(pk__in=upsert_ids))
+        data = dict(zip((c.pk for c in companies), self.get_serializer(companies, many=True).data))
+
+        results = []
+        for change in changes:
+            company = data.get(change["company_id"])
+            # компанию успели удалить, а tombstone ещё впереди
+            action = change["action"] if company is not None else CompanyChange.ACTION_DELETE
+            results.append({
+                "company_bin": change["company_bin"],
+                "action": action,
+                "changed_at": change["changed_at"],
+                "company": company,
+            })
+
+        return Response({
+            "next_cursor": next_cursor,
+            "has_more": has_more,
+            "results": results,
+        })
+
+
+class CompanyFacets(GenericAPIView):
+    """
+    Счётчики для фильтров: сколько компаний текущей выборки (те же ?search=,
+    что у списка) приходится на каждого ребёнка выбранного узла КАТО / ОКЭД /
+    КРП / Товаров, на каждую отрасль, форму собственности и программу.
+    Выборка фильтруется так же, как список (ClassifierTreeFilter). Если в
+    ?kato= / ?oked= / ?krp= / ?product= ровно один существующий узел,
+    счётчики строятся по его детям, иначе — по корням дерева.
+    """
+    permission_classes = [IsAuthenticated]
+    filter_backends = GetCompanyData.filter_backends
+    throttle_classes = [SlidingWindowScopedThrottle]
+    throttle_scope = "company_facets"
+
+    def get(self, request):
+        companies_qs = self.filter_queryset(Company.objects.all())
+
+        nodes = {}
+        for name, tree in CLASSIFIER_TREES.items():
+            codes = split_param(request.query_params.get(name))
+            nodes[name] = resolve_node(tree, codes[0]) if len(codes) == 1 else None
+
+        data = {"total": companies_qs.count()}
+
+        for name, tree in CLASSIFIER_TREES.items():
+            node = nodes[name]
+            data[name] = {
+                "node": None if node is None else {
+                    "code": str(getattr(node, tree.code_field)),
+                    "name": getattr(node, tree.name_field),
+                },
+                "items": next_level_counts(companies_qs, tree, node),
+            }
+
+        data["industry"] = flat_counts(companies_qs, "industry", "industry_id", "industry__name")
+        data["kfc"] = flat_counts(companies_qs, "kfc", "kfc__kfc_code", "kfc__kfc_name")
+        data["program"] = flat_counts(
+            companies_qs,
+            "program_participations__program",
+            "program_participations__program_id",
+            "program_participations__program__name",
         )
+
+        return Response(data)
+
+
+class CompanyRegionalStats(GenericAPIView):
+    """
+    Компании и суммы налогов, НДС и госзакупок по узлам КАТО уровня
+    ?depth= (1 — области). ?year= — метрики за год (без него — за все годы);
+    выборка фильтруется так же, как список (?oked=, ?kato=, ?krp=...).
+    """
+    permission_classes = [IsAuthenticated]
+    filter_backends = [ClassifierTreeFilter]
+    throttle_classes = [SlidingWindowScopedThrottle]
+    throttle_scope = "company_regions"
+
+    def get(self, request):
+        params = RegionalStatsParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        depth = params.validated_data["depth"]
+        year = params.validated_data.get("year")
+
+        companies_qs = self.filter_queryset(Company.objects.all())
+
+        return Response({
+            "depth": depth,
+            "year": year,
+            "results": regional_stats(companies_qs, depth, year),
+        })
+
+
+class CompanyMetricRanking(GenericAPIView):
+    """
+    Топ компаний по метрике: ?metric=taxes|nds|goszakupsupplier|goszakupcustomer,
+    ?year= (по умолчанию — последний год в данных), ?order=value|growth|delta
+    (значение, рост к прошлому году в долях, прирост), ?limit=.
+    Поддерево классификатора — те же ?kato= / ?oked= / ?krp= / ?product=, что у списка.
+    """
+    permission_classes = [IsAuthenticated]
+    filter_backends = [ClassifierTreeFilter]
+    throttle_classes = [SlidingWindowScopedThrottle]
+    throttle_scope = "company_top"
+
+    def get(self, request):
+        params = MetricRankingParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        metric = params.validated_data["metric"]
+        year = params.validated_data.get("year") or latest_year(metric)
+
+        companies_qs = self.filter_queryset(Company.objects.all())
+        if not companies_qs.query.has_filters():
+            # без фильтров — без подзапроса: чистый проход по индексу (year, value)
+            companies_qs = None
+
+        results = []
+        if year is not None:
+            results = rank_companies(
+                metric,
+                year,
+                order=params.validated_data["order"],
+                companies_qs=companies_qs,
+                limit=params.validated_data["limit"],
+            )
+
+        return Response({
+            "metric": metric,
+            "year": year,
+            "order": params.validated_data["order"],
+            "results": results,
+        })
+
+
+class CompanySimilar(APIView):
+    """
+    Похожие компании: общие ОКЭД, ТН ВЭД, товары, КАТО и КРП,
+    взвешенные по редкости признака. ?limit= — сколько вернуть.
+    """
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [SlidingWindowScopedThrottle]
+    throttle_scope = "company_similar"
+
+    def get(self, request, company_bin):
+        params = SimilarCompaniesParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+
+        company_id = Company.objects.filter(company_bin=company_bin).values_list("pk", flat=True).first()
+        if company_id is None:
+            raise NotFound()
+
+        similar = find_similar_companies(company_id, params.validated_data["limit"])
+        companies = Company.objects.in_bulk([pk for pk, _, _ in similar])
+
+        return Response({
+            "company_bin": company_bin,
+            "results": [
+                {
+                    "company_bin": companies[pk].company_bin,
+                    "name_ru": companies[pk].name_ru,
+                    "score": round(score, 4),
+                    "shared": shared,
+                }
+                for pk, score, shared in similar
+                if pk in companies
+            ],
+        })
+
+
+class CompanyCatalogDump(APIView):
+    """
+    Весь каталог одним ответом в NDJSON (строка — компания с кодами
+    классификаторов и последними метриками). Первая строка —
+    {"next_cursor": N}, курсор для /companies/changes/ после выгрузки. Сжатие на лету —
+    CompressionMiddleware по Accept-Encoding. Под ASGI поток отдаётся
+    асинхронным итератором, под WSGI — обычным.
+    """
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [SlidingWindowScopedThrottle]
+    throttle_scope = "company_dump"
+
+    def get(self, request):
+        if isinstance(request._request, ASGIRequest):
+            chunks = aiter_catalog_ndjson()
+        else:
+            chunks = iter_catalog_ndjson()
+        response = StreamingHttpResponse(chunks, content_type="application/x-ndjson; charset=utf-8")
+        response["Content-Disposition"] = 'attachment; filename="companies.ndjson"'
+        return response
+
+
+class CompanyDetailCacheStats(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(company_detail_cache_stats())
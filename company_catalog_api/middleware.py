@@ -0,0 +1,178 @@
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.regex_helper import _lazy_re_compile
+
+try:
+    import brotli
+except ImportError:  # необязательная зависимость
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # необязательная зависимость
+    zstandard = None
+
+
+# Сжимаются только ответы API. HTML (админка) — нет: в нём рядом
+# с CSRF-токеном отражается пользовательский ввод, а сжатие такой
+# страницы открывает BREACH. В ответах API секретов, которые можно
+# подобрать по длине, нет.
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/msgpack",
+    "application/x-msgpack",
+)
+
+_accept_re = _lazy_re_compile(r"\s*([^\s;,]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?")
+
+
+class _Gzip:
+    name = "gzip"
+
+    def __init__(self):
+        self._obj = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._obj.compress(data)
+
+    def flush(self):
+        return self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._obj.flush()
+
+
+class _Brotli:
+    name = "br"
+
+    def __init__(self):
+        self._obj = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+
+    def compress(self, data):
+        return self._obj.process(data)
+
+    def flush(self):
+        return self._obj.flush()
+
+    def finish(self):
+        return self._obj.finish()
+
+
+class _Zstd:
+    name = "zstd"
+
+    def __init__(self):
+        self._obj = zstandard.ZstdCompressor(level=settings.COMPRESSION_ZSTD_LEVEL).compressobj()
+
+    def compress(self, data):
+        return self._obj.compress(data)
+
+    def flush(self):
+        return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self._obj.flush()
+
+
+def available_codecs():
+    # в порядке предпочтения сервера
+    codecs = []
+    if zstandard is not None:
+        codecs.append(_Zstd)
+    if brotli is not None:
+        codecs.append(_Brotli)
+    codecs.append(_Gzip)
+    return codecs
+
+
+def choose_codec(accept_encoding):
+    """
+    Кодек по Accept-Encoding: из принятых клиентом (q > 0) — с наибольшим q,
+    при равенстве — по предпочтению сервера.
+    """
+    accepted = {}
+    for match in _accept_re.finditer(accept_encoding or ""):
+        name, q = match.group(1).lower(), match.group(2)
+        try:
+            accepted[name] = float(q) if q is not None else 1.0
+        except ValueError:
+            continue
+
+    best = None
+    for codec in available_codecs():
+        q = accepted.get(codec.name, accepted.get("*", 0))
+        if q > 0 and (best is None or q > best[0]):
+            best = (q, codec)
+    return best[1] if best else None
+
+
+def _compress_stream(codec, chunks):
+    compressor = codec()
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        # сбрасываем на каждом чанке: клиент получает данные сразу, а не в конце
+        data += compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def _acompress_stream(codec, chunks):
+    compressor = codec()
+    async for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Сжатие ответов API (COMPRESSIBLE_TYPES) по Accept-Encoding: zstd / br
+    (если установлены) или gzip. Обычные ответы — начиная с
+    COMPRESSION_MIN_SIZE байт; потоковые (выгрузки) — на лету, чанк за
+    чанком, без буферизации всего ответа. Ответы с Content-Encoding,
+    HTML и файлы (xlsx) не трогает.
+    """
+
+    def process_response(self, request, response):
+        if response.has_header("Content-Encoding") or response.status_code < 200 or response.status_code in (204, 304):
+            return response
+
+        content_type = response.get("Content-Type", "").split(";")[0].strip().lower()
+        if content_type not in COMPRESSIBLE_TYPES:
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+
+        codec = choose_codec(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        if codec is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = _acompress_stream(codec, response.streaming_content)
+            else:
+                response.streaming_content = _compress_stream(codec, response.streaming_content)
+            del response.headers["Content-Length"]
+        else:
+            if len(response.content) < settings.COMPRESSION_MIN_SIZE:
+                return response
+            compressor = codec()
+            compressed = compressor.compress(response.content) + compressor.finish()
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers["Content-Length"] = str(len(compressed))
+
+        # сжатое представление не побайтно равно исходному — ETag становится слабым
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+
+        response.headers["Content-Encoding"] = codec.name
+        return response
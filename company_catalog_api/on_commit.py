@@ -0,0 +1,41 @@
+from functools import partial
+
+from django.db import transaction
+
+
+# Отложенная пачечная обработка: сигналы внутри транзакции срабатывают
+# на каждую строку, а пересчитывать / инвалидировать достаточно один раз
+# на набор затронутых id после коммита.
+
+
+def on_commit_batch(key, items, flush, using=None):
+    """
+    Копит items в множестве на соединении и вызывает flush(множество)
+    после коммита — один раз на все вызовы с тем же key. Вне транзакции
+    flush вызывается сразу.
+
+    id из откатившегося savepoint (или всей транзакции) остаются
+    в множестве и уйдут во flush со следующим коммитом: лишний
+    пересчёт безвреден, потерянный — нет.
+    """
+    items = {item for item in items if item is not None}
+    if not items:
+        return
+
+    connection = transaction.get_connection(using)
+    if not connection.in_atomic_block:
+        flush(items)
+        return
+
+    batches = connection.__dict__.setdefault("_on_commit_batches", {})
+    batch = batches.setdefault(key, set())
+    batch.update(items)
+    # колбэк на каждый вызов: колбэки из откатившегося savepoint Django
+    # выбрасывает, а первый оставшийся заберёт всё множество
+    transaction.on_commit(partial(_flush_batch, batches, key, flush), using=using)
+
+
+def _flush_batch(batches, key, flush):
+    items = batches.pop(key, None)
+    if items:
+        flush(items)
@@ -52,6 +52,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'company_catalog_api.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -127,4 +128,114 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
-AUTH_USER_MODEL = 'users.User'
\ No newline at end of file
+AUTH_USER_MODEL = 'users.User'
+
+REST_FRAMEWORK = {
+    "DEFAULT_AUTHENTICATION_CLASSES": [
+        "rest_framework.authentication.SessionAuthentication",
+        "rest_framework.authentication.BasicAuthentication",
+        "users.authentication.CachedTokenAuthentication",
+    ],
+    # лимиты на токен (companies/throttling.py); бюджеты раздельные по эндпоинтам
+    "DEFAULT_THROTTLE_RATES": {
+        "company_list": os.environ.get("THROTTLE_COMPANY_LIST", "600/min"),
+        "company_list_expensive": os.environ.get("THROTTLE_COMPANY_LIST_EXPENSIVE", "60/min"),
+        "company_detail": os.environ.get("THROTTLE_COMPANY_DETAIL", "1200/min"),
+        "company_bulk": os.environ.get("THROTTLE_COMPANY_BULK", "30/min"),
+        "company_dump": os.environ.get("THROTTLE_COMPANY_DUMP", "6/hour"),
+        "company_load": os.environ.get("THROTTLE_COMPANY_LOAD", "10/min"),
+        "company_similar": os.environ.get("THROTTLE_COMPANY_SIMILAR", "120/min"),
+        "company_changes": os.environ.get("THROTTLE_COMPANY_CHANGES", "600/min"),
+        "company_facets": os.environ.get("THROTTLE_COMPANY_FACETS", "60/min"),
+        "company_regions": os.environ.get("THROTTLE_COMPANY_REGIONS", "60/min"),
+        "company_top": os.environ.get("THROTTLE_COMPANY_TOP", "60/min"),
+    },
+}
+
+# Сжатие ответов (company_catalog_api/middleware.py): минимальный размер
+# обычного ответа и уровни gzip / brotli / zstd
+COMPRESSION_MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_SIZE", 1024))
+COMPRESSION_GZIP_LEVEL = int(os.environ.get("COMPRESSION_GZIP_LEVEL", 6))
+COMPRESSION_BROTLI_QUALITY = int(os.environ.get("COMPRESSION_BROTLI_QUALITY", 5))
+COMPRESSION_ZSTD_LEVEL = int(os.environ.get("COMPRESSION_ZSTD_LEVEL", 3))
+
+# Кэш токенов API (users/authentication.py): размер LRU и время жизни записи, сек
+TOKEN_AUTH_CACHE_SIZE = int(os.environ.get("TOKEN_AUTH_CACHE_SIZE", 10000))
+TOKEN_AUTH_CACHE_TTL = int(os.environ.get("TOKEN_AUTH_CACHE_TTL", 60))
+
+
+# Экспорт XLSX: число процессов для подготовки строк и минимальный размер
+# выборки, начиная с которого экспорт распараллеливается. По умолчанию 1 —
+# экспорт из админки идёт в веб-воркере, форкать его без нужды не стоит
+EXPORT_PARALLEL_WORKERS = int(os.environ.get("EXPORT_PARALLEL_WORKERS", 1))
+EXPORT_PARALLEL_MIN_ROWS = int(os.environ.get("EXPORT_PARALLEL_MIN_ROWS", 20000))
+
+# Список компаний (/companies/get-company-data/): размер страницы по умолчанию
+# и верхняя граница для ?page_size=
+COMPANY_LIST_PAGE_SIZE = int(os.environ.get("COMPANY_LIST_PAGE_SIZE", 100))
+COMPANY_LIST_MAX_PAGE_SIZE = int(os.environ.get("COMPANY_LIST_MAX_PAGE_SIZE", 1000))
+
+# Пакетный поиск по БИН (/companies/info/bulk/): максимум БИН в одном запросе
+COMPANY_BULK_LOOKUP_MAX = int(os.environ.get("COMPANY_BULK_LOOKUP_MAX", 5000))
+
+# Сериализация компаний в списке и карточке напрямую из values()
+# (services/company_fast.py); False — через CompanySerializer
+COMPANY_FAST_SERIALIZATION = os.environ.get("COMPANY_FAST_SERIALIZATION", "1") == "1"
+
+# Полная выгрузка каталога (/companies/dump/): размер чанка курсора и prefetch
+CATALOG_DUMP_CHUNK_SIZE = int(os.environ.get("CATALOG_DUMP_CHUNK_SIZE", 2000))
+
+# Похожие компании (/companies/similar/<bin>/): признаки, которые есть
+# у большего числа компаний, кандидатов не дают; сколько кандидатов
+# оценивается точно; размер ответа по умолчанию и максимум
+SIMILAR_COMPANIES_MAX_POSTINGS = int(os.environ.get("SIMILAR_COMPANIES_MAX_POSTINGS", 5000))
+SIMILAR_COMPANIES_CANDIDATES = int(os.environ.get("SIMILAR_COMPANIES_CANDIDATES", 500))
+SIMILAR_COMPANIES_LIMIT = int(os.environ.get("SIMILAR_COMPANIES_LIMIT", 20))
+SIMILAR_COMPANIES_MAX_LIMIT = int(os.environ.get("SIMILAR_COMPANIES_MAX_LIMIT", 100))
+
+# Рейтинг компаний по метрике (/companies/top/): размер по умолчанию и максимум
+METRIC_RANKING_LIMIT = int(os.environ.get("METRIC_RANKING_LIMIT", 100))
+METRIC_RANKING_MAX_LIMIT = int(os.environ.get("METRIC_RANKING_MAX_LIMIT", 1000))
+
+# Справочники (/dictionaries/): как часто процесс сверяет версию классификатора
+# с БД и сколько клиент может не перепроверять ответ
+CLASSIFIER_VERSION_CHECK_SECONDS = int(os.environ.get("CLASSIFIER_VERSION_CHECK_SECONDS", 5))
+CLASSIFIER_CACHE_MAX_AGE = int(os.environ.get("CLASSIFIER_CACHE_MAX_AGE", 60))
+# Автодополнение (/dictionaries/<name>/autocomplete/): вариантов по умолчанию
+CLASSIFIER_AUTOCOMPLETE_LIMIT = int(os.environ.get("CLASSIFIER_AUTOCOMPLETE_LIMIT", 10))
+
+# Журнал изменений (/companies/changes/): размер пачки, задержка, после которой
+# запись считается устоявшейся, и срок хранения (prune_company_changes)
+CHANGE_FEED_PAGE_SIZE = int(os.environ.get("CHANGE_FEED_PAGE_SIZE", 1000))
+CHANGE_FEED_MAX_PAGE_SIZE = int(os.environ.get("CHANGE_FEED_MAX_PAGE_SIZE", 10000))
+CHANGE_FEED_SETTLE_SECONDS = int(os.environ.get("CHANGE_FEED_SETTLE_SECONDS", 5))
+CHANGE_FEED_RETENTION_DAYS = int(os.environ.get("CHANGE_FEED_RETENTION_DAYS", 90))
+
+# Кэш карточек компаний (/companies/info/<bin>/). По умолчанию — память процесса;
+# COMPANY_DETAIL_CACHE_DIR включает файловый кэш, общий для воркеров на хосте
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # счётчики лимитов запросов; для общего бюджета на все процессы —
+    # общий бэкенд с атомарным incr (Redis / Memcached)
+    "throttle": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "throttle",
+        "OPTIONS": {"MAX_ENTRIES": 100000},
+    },
+    "company_detail": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "company-detail",
+        "TIMEOUT": 60 * 60,
+        "OPTIONS": {"MAX_ENTRIES": 20000},
+    },
+}
+
+if os.environ.get("COMPANY_DETAIL_CACHE_DIR"):
+    CACHES["company_detail"] = {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.environ["COMPANY_DETAIL_CACHE_DIR"],
+        "TIMEOUT": 60 * 60,
+        "OPTIONS": {"MAX_ENTRIES": 200000},
+    }
@@ -0,0 +1,21 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from users.models import User
+
+
+class APITestCase(TestCase):
+    """
+    Общая заготовка тестов API: пользователь cls.user и self.client,
+    уже авторизованный им. Свои данные — в setUpTestData с super().
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.user = User.objects.create_user(email="api@example.kz", password="x")
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
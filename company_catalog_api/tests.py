@@ -0,0 +1,75 @@
+import gzip
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from .middleware import CompressionMiddleware, brotli, choose_codec, zstandard
+
+
+@override_settings(COMPRESSION_MIN_SIZE=100)
+class CompressionMiddlewareTests(SimpleTestCase):
+    BODY = ('{"results": [' + '{"name_ru": "Компания"},' * 50 + "{}]}").encode("utf-8")
+
+    def process(self, response, accept_encoding="gzip"):
+        request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING=accept_encoding)
+        middleware = CompressionMiddleware(lambda request: response)
+        return middleware(request)
+
+    def json_response(self, body=BODY, **kwargs):
+        return HttpResponse(body, content_type="application/json", **kwargs)
+
+    def test_negotiation(self):
+        self.assertEqual(choose_codec("gzip").name, "gzip")
+        self.assertIsNone(choose_codec("identity"))
+        self.assertIsNone(choose_codec("gzip;q=0"))
+        if brotli is not None:
+            self.assertEqual(choose_codec("gzip;q=0.5, br").name, "br")
+        if zstandard is not None:
+            # при равном q — предпочтение сервера
+            self.assertEqual(choose_codec("gzip, br, zstd").name, "zstd")
+            self.assertEqual(choose_codec("*").name, "zstd")
+            self.assertEqual(choose_codec("zstd;q=0, gzip").name, "gzip")
+
+    def test_compresses_json(self):
+        response = self.process(self.json_response())
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.content), self.BODY)
+        self.assertEqual(response["Content-Length"], str(len(response.content)))
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+
+    def test_small_response_is_not_compressed(self):
+        response = self.process(self.json_response(b'{"detail": "ok"}'))
+        self.assertFalse(response.has_header("Content-Encoding"))
+        # представление всё равно зависит от Accept-Encoding
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+
+    def test_html_is_not_compressed(self):
+        html = HttpResponse(b"<html>" + b"x" * 1000 + b"</html>", content_type="text/html; charset=utf-8")
+        response = self.process(html)
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertFalse(response.has_header("Vary"))
+
+    def test_no_acceptable_encoding(self):
+        response = self.process(self.json_response(), accept_encoding="identity")
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(response.content, self.BODY)
+
+    def test_streaming_is_compressed_per_chunk(self):
+        chunks = [b'{"id": %d}\n' % n for n in range(100)]
+        streaming = StreamingHttpResponse(iter(chunks), content_type="application/x-ndjson; charset=utf-8")
+        response = self.process(streaming)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertFalse(response.has_header("Content-Length"))
+        parts = list(response.streaming_content)
+        # каждый чанк сбрасывается сразу, а не копится до конца ответа
+        self.assertGreater(len(parts), 1)
+        self.assertEqual(gzip.decompress(b"".join(parts)), b"".join(chunks))
+
+    def test_etag_becomes_weak(self):
+        response = self.json_response()
+        response["ETag"] = '"abc"'
+        self.assertEqual(self.process(response)["ETag"], 'W/"abc"')
+
+        uncompressed = self.json_response()
+        uncompressed["ETag"] = '"abc"'
+        self.assertEqual(self.process(uncompressed, accept_encoding="identity")["ETag"], '"abc"')
@@ -21,6 +21,7 @@ from django.urls import path, include
 urlpatterns = [
     path('admin/', admin.site.urls),
     path("companies/", include("companies.urls")),
+    path("dictionaries/", include("dictionaries.urls")),
 ]
 
 
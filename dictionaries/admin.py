@@ -1,37 +1,77 @@
 from django.contrib import admin
+from django.contrib.admin.views.autocomplete import AutocompleteJsonView
+from django.db.models import Case, IntegerField, When
 
 from .models import (
     Krp, Kse, Kfc, Kato, Oked,
     Industry, Product, Tnved
 )
+from .services.autocomplete import get_index
+from .services.classifier_snapshot import CLASSIFIERS
+
+
+class ClassifierAutocompleteMixin:
+    """
+    autocomplete_fields (в т.ч. в карточке компании) ищут по индексу
+    префиксов в памяти вместо icontains по search_fields. Виджет листает
+    страницами: у индекса берутся коды до конца запрошенной страницы.
+    Поиск в списке объектов остаётся прежним.
+    """
+    classifier = None
+
+    def get_search_results(self, request, queryset, search_term):
+        match = request.resolver_match
+        if not search_term or match is None or match.url_name != "autocomplete":
+            return super().get_search_results(request, queryset, search_term)
+
+        page = request.GET.get("page", "")
+        page = int(page) if page.isdigit() and int(page) > 0 else 1
+        # и ещё один код — чтобы пагинатор знал, есть ли следующая страница
+        limit = page * AutocompleteJsonView.paginate_by + 1
+
+        codes = get_index(self.classifier).search_codes(search_term, limit)
+        if not codes:
+            return queryset.none(), False
+        code_field = CLASSIFIERS[self.classifier].code_field
+        # порядок выдачи — ранг индекса
+        order = Case(
+            *[When(**{code_field: code}, then=i) for i, code in enumerate(codes)],
+            output_field=IntegerField(),
+        )
+        return queryset.filter(**{f"{code_field}__in": codes}).order_by(order), False
 
 
 @admin.register(Krp)
-class KrpAdmin(admin.ModelAdmin):
+class KrpAdmin(ClassifierAutocompleteMixin, admin.ModelAdmin):
+    classifier = "krp"
     list_display = ("krp_code", "krp_name")
     search_fields = ("krp_code", "krp_name")
 
 
 @admin.register(Kse)
-class KseAdmin(admin.ModelAdmin):
+class KseAdmin(ClassifierAutocompleteMixin, admin.ModelAdmin):
+    classifier = "kse"
     list_display = ("kse_code", "kse_name")
     search_fields = ("kse_code", "kse_name")
 
 
 @admin.register(Kfc)
-class KfcAdmin(admin.ModelAdmin):
+class KfcAdmin(ClassifierAutocompleteMixin, admin.ModelAdmin):
+    classifier = "kfc"
     list_display = ("kfc_code", "kfc_name")
     search_fields = ("kfc_code", "kfc_name")
 
 
 @admin.register(Kato)
-class KatoAdmin(admin.ModelAdmin):
+class KatoAdmin(ClassifierAutocompleteMixin, admin.ModelAdmin):
+    classifier = "kato"
     list_display = ("kato_code", "kato_name")
     search_fields = ("kato_code", "kato_name")
 
 
 @admin.register(Oked)
-class OkedAdmin(admin.ModelAdmin):
+class OkedAdmin(ClassifierAutocompleteMixin, admin.ModelAdmin):
+    classifier = "oked"
     list_display = ("oked_code", "oked_name")
     search_fields = ("oked_code", "oked_name")
 
@@ -42,11 +82,13 @@ class IndustryAdmin(admin.ModelAdmin):
 
 
 @admin.register(Product)
-class ProductAdmin(admin.ModelAdmin):
+class ProductAdmin(ClassifierAutocompleteMixin, admin.ModelAdmin):
+    classifier = "product"
     search_fields = ("name",)
 
 
 @admin.register(Tnved)
-class TnvedAdmin(admin.ModelAdmin):
+class TnvedAdmin(ClassifierAutocompleteMixin, admin.ModelAdmin):
+    classifier = "tnved"
     list_display = ("tn_ved_code", "tn_ved_name")
     search_fields = ("tn_ved_code", "tn_ved_name")
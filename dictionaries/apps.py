@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class DictionariesConfig(AppConfig):
     name = 'dictionaries'
     verbose_name = "Справочники"
-    verbose_name_plural = "Справочники"
\ No newline at end of file
+    verbose_name_plural = "Справочники"
+
+    def ready(self):
+        from . import signals  # noqa: F401
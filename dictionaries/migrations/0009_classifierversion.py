@@ -0,0 +1,26 @@
+# Generated by Django 6.0 on 2026-10-19 16:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dictionaries', '0008_delete_companyproduct'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClassifierVersion',
+            fields=[
+                ('name', models.CharField(max_length=32, primary_key=True, serialize=False, verbose_name='Классификатор')),
+                ('version', models.PositiveBigIntegerField(default=1, verbose_name='Версия')),
+                ('updated', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Версия классификатора',
+                'verbose_name_plural': 'Версии классификаторов',
+                'db_table': 'classifier_versions',
+            },
+        ),
+    ]
@@ -194,3 +194,22 @@ class Tnved(models.Model):
         db_table = "tnved"
         verbose_name = "ТН ВЭДы"
         verbose_name_plural = "ТН ВЭДы"
+
+
+class ClassifierVersion(models.Model):
+    """
+    Версия данных классификатора: растёт при каждом изменении его записей
+    (dictionaries/signals.py). На ней держатся ETag и кэш в памяти
+    эндпоинтов /dictionaries/.
+    """
+    name = models.CharField(max_length=32, primary_key=True, verbose_name="Классификатор")
+    version = models.PositiveBigIntegerField(default=1, verbose_name="Версия")
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+
+    class Meta:
+        db_table = "classifier_versions"
+        verbose_name = "Версия классификатора"
+        verbose_name_plural = "Версии классификаторов"
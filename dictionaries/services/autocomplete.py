@@ -0,0 +1,266 @@
+import bisect
+import heapq
+import re
+import threading
+from collections import namedtuple
+from functools import reduce
+from operator import or_
+
+from .classifier_snapshot import get_snapshot
+
+
+# Автодополнение по классификаторам: отсортированный список ключей
+# (код, полное название, каждое слово названия) и бинарный поиск по префиксу.
+# Запросы из нескольких слов — пересечение битовых масок узлов по словам.
+# Индекс строится из снимка классификатора при первом запросе и
+# пересобирается вместе со снимком, когда меняется версия данных.
+
+# Вид совпадения — первая часть ранга: чем меньше, тем выше в выдаче
+EXACT_CODE, CODE_PREFIX, NAME_PREFIX, WORD_PREFIX = range(4)
+
+# Префиксы, под которые попадает больше ключей, чем это, считаются заранее
+# (короткие и самые частые: "п", "про", "производ"); остальные — перебором диапазона
+SCAN_LIMIT = 200
+
+# Сколько лучших вариантов хранится на префикс (и верхняя граница limit в API);
+# больший limit (страницы админки) считается перебором диапазона
+MAX_RESULTS = 50
+
+_non_word_re = re.compile(r"[^\w]+")
+
+# Маски узлов по префиксу слова: где оно совпало в самом узле (код, начало
+# названия, другое слово названия) и path — у узла или любого предка
+WordMasks = namedtuple("WordMasks", ["code", "name", "word", "path"])
+
+
+def normalize(text):
+    # регистр, ё/е и пунктуация не важны: "Ж/д перевозки" == "жд перевозки"
+    text = (text or "").lower().replace("ё", "е")
+    return " ".join(_non_word_re.sub(" ", text.replace("/", "")).split())
+
+
+def compact_code(code):
+    # "01.11.0" и "01110" — один код
+    return _non_word_re.sub("", code.lower())
+
+
+class AutocompleteIndex:
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+
+        # ранг узла при равном виде совпадения: ближе к корню, короче название, код
+        self._rank = {}
+        self._names = {}
+        entries = []
+        for code, node in snapshot.nodes.items():
+            name = normalize(node["name"])
+            self._names[code] = name
+            self._rank[code] = (self._depth(code), len(name), code)
+
+            entries.append((compact_code(code), CODE_PREFIX, code))
+            if name:
+                entries.append((name, NAME_PREFIX, code))
+                for word in set(name.split()[1:]):
+                    entries.append((word, WORD_PREFIX, code))
+        entries.sort()
+
+        self._keys = [entry[0] for entry in entries]
+        self._entries = entries
+
+        # частые префиксы длины n могут быть только продолжениями частых длины n - 1
+        self._top = {}
+        prefixes = {key[:1] for key in self._keys}
+        while prefixes:
+            frequent = set()
+            for prefix in prefixes:
+                lo, hi = self._range(prefix)
+                if hi - lo > SCAN_LIMIT:
+                    self._top[prefix] = self._scan(prefix, MAX_RESULTS)
+                    n = len(prefix) + 1
+                    frequent.update(key[:n] for key in self._keys[lo:hi] if len(key) >= n)
+            prefixes = frequent
+
+        # бит узла в масках — его место в порядке ранга, поэтому младшие биты
+        # маски сразу дают лучшие варианты; маски частых слов кэшируются
+        self._order = sorted(snapshot.nodes, key=self._rank.get)
+        self._bits = {code: i for i, code in enumerate(self._order)}
+        self._word_masks_cache = {}
+
+        # в порядке обхода дерева поддерево узла — отрезок [i, _ends[i])
+        self._walk_order = []
+        self._ends = []
+        self._walk(snapshot)
+
+    def _walk(self, snapshot):
+        position = self._walk_position = {}
+        # узлы, недостижимые от корней (битые parent), обходятся как корни
+        for root in list(snapshot.roots) + list(snapshot.nodes):
+            stack = [(root, False)]
+            while stack:
+                code, leaving = stack.pop()
+                if leaving:
+                    self._ends[position[code]] = len(self._walk_order)
+                    continue
+                if code in position:
+                    continue
+                position[code] = len(self._walk_order)
+                self._walk_order.append(code)
+                self._ends.append(None)
+                stack.append((code, True))
+                stack.extend((child, False) for child in reversed(snapshot.children.get(code, [])))
+
+    def _depth(self, code):
+        depth = 0
+        parent = self.snapshot.nodes[code]["parent"]
+        while parent is not None and depth < len(self.snapshot.nodes):
+            depth += 1
+            parent = self.snapshot.nodes[parent]["parent"]
+        return depth
+
+    def _range(self, prefix):
+        lo = bisect.bisect_left(self._keys, prefix)
+        return lo, bisect.bisect_left(self._keys, prefix + "\uffff", lo)
+
+    def _matches(self, prefix, accept=None):
+        # лучший ранг каждого узла, у которого есть ключ с этим префиксом
+        lo, hi = self._range(prefix)
+        best = {}
+        for key, kind, code in self._entries[lo:hi]:
+            if accept is not None and not accept(code):
+                continue
+            depth, name_len, _ = self._rank[code]
+            if kind == CODE_PREFIX:
+                # коды — по порядку кода, длина названия не важна
+                rank = (EXACT_CODE if key == prefix else CODE_PREFIX, depth, 0, code)
+            else:
+                rank = (kind, depth, name_len, code)
+            if code not in best or rank < best[code]:
+                best[code] = rank
+        return best
+
+    def _scan(self, prefix, limit, accept=None):
+        best = self._matches(prefix, accept)
+        return heapq.nsmallest(limit, best, key=best.get)
+
+    def _mask(self, bits):
+        buf = bytearray(len(self._order) // 8 + 1)
+        for bit in bits:
+            buf[bit >> 3] |= 1 << (bit & 7)
+        return int.from_bytes(buf, "little")
+
+    @staticmethod
+    def _set_bits(mask, limit=None):
+        bits = f"{mask:b}"[::-1]
+        found = []
+        i = bits.find("1")
+        while i != -1 and (limit is None or len(found) < limit):
+            found.append(i)
+            i = bits.find("1", i + 1)
+        return found
+
+    def _word_masks(self, word):
+        masks = self._word_masks_cache.get(word)
+        if masks is not None:
+            return masks
+
+        lo, hi = self._range(word)
+        own = {CODE_PREFIX: [], NAME_PREFIX: [], WORD_PREFIX: []}
+        for key, kind, code in self._entries[lo:hi]:
+            own[kind].append(code)
+
+        # поддеревья вложены друг в друга или не пересекаются: вложенные пропускаем
+        path_bits = []
+        end = 0
+        for i in sorted({self._walk_position[code] for codes in own.values() for code in codes}):
+            if i >= end:
+                end = self._ends[i]
+                path_bits.extend(self._bits[code] for code in self._walk_order[i:end])
+
+
+        masks = WordMasks(
+            code=self._mask(self._bits[code] for code in own[CODE_PREFIX]),
+            name=self._mask(self._bits[code] for code in own[NAME_PREFIX]),
+            word=self._mask(self._bits[code] for code in own[WORD_PREFIX]),
+            path=self._mask(path_bits),
+        )
+        if hi - lo > SCAN_LIMIT:
+            self._word_masks_cache[word] = masks
+        return masks
+
+    def search_codes(self, query, limit):
+        text = normalize(query)
+        if not text:
+            return []
+        words = text.split()
+        if len(words) == 1:
+            prefix = compact_code(text)
+            if prefix in self._top and limit <= MAX_RESULTS:
+                return self._top[prefix][:limit]
+            return self._scan(prefix, limit)
+
+        # несколько слов: код с разделителями ("01.11"), фраза с начала названия
+        # или все слова в любом порядке — каждое где-то в пути узла, хотя бы
+        # одно в его собственном коде или названии ("жив лош" находит
+        # "Живые животные / Лошади"). Пути пересекаются от самого редкого слова
+        best = self._matches(compact_code(text))
+        for code, rank in self._matches(text).items():
+            if code not in best or rank < best[code]:
+                best[code] = rank
+
+        masks = [self._word_masks(word) for word in words]
+        found = -1
+        for path in sorted((m.path for m in masks), key=int.bit_count):
+            found &= path
+            if not found:
+                break
+
+        if found:
+            code_hits = found & reduce(or_, (m.code for m in masks))
+            name_hits = found & reduce(or_, (m.name for m in masks)) & ~code_hits
+            word_hits = found & reduce(or_, (m.word for m in masks)) & ~code_hits & ~name_hits
+
+            # у кодов другой ранг — их немного, считаются по одному
+            for bit in self._set_bits(code_hits):
+                code = self._order[bit]
+                depth = self._rank[code][0]
+                kind = EXACT_CODE if compact_code(code) in words else CODE_PREFIX
+                rank = (kind, depth, 0, code)
+                if code not in best or rank < best[code]:
+                    best[code] = rank
+            for kind, hits in ((NAME_PREFIX, name_hits), (WORD_PREFIX, word_hits)):
+                for bit in self._set_bits(hits, limit):
+                    code = self._order[bit]
+                    rank = (kind, *self._rank[code])
+                    if code not in best or rank < best[code]:
+                        best[code] = rank
+        return heapq.nsmallest(limit, best, key=best.get)
+
+    def path(self, code):
+        names = [node["name"] for node in self.snapshot.ancestors(code)]
+        names.append(self.snapshot.nodes[code]["name"])
+        return " / ".join(name or "" for name in names)
+
+    def search(self, query, limit):
+        return [
+            {"code": code, "name": self.snapshot.nodes[code]["name"], "path": self.path(code)}
+            for code in self.search_codes(query, limit)
+        ]
+
+
+_indexes = {}
+_lock = threading.Lock()
+
+
+def get_index(name):
+    snapshot = get_snapshot(name)
+    index = _indexes.get(name)
+    if index is not None and index.snapshot is snapshot:
+        return index
+
+    with _lock:
+        index = _indexes.get(name)
+        if index is None or index.snapshot is not snapshot:
+            index = AutocompleteIndex(snapshot)
+            _indexes[name] = index
+    return index
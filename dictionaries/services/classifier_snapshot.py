@@ -0,0 +1,178 @@
+import json
+import threading
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.db.models import F
+
+from company_catalog_api.on_commit import on_commit_batch
+from dictionaries.models import ClassifierVersion, Kato, Kfc, Krp, Kse, Oked, Product, Tnved
+
+
+# Классификатор, отдаваемый /dictionaries/<name>/:
+#   code_field — код узла (у Product кода нет — берётся id),
+#   parent     — есть ли FK parent; у ТН ВЭД иерархия выводится из префиксов кода.
+ClassifierSpec = namedtuple("ClassifierSpec", ["model", "code_field", "name_field", "parent"])
+
+CLASSIFIERS = {
+    "kato": ClassifierSpec(Kato, "kato_code", "kato_name", True),
+    "oked": ClassifierSpec(Oked, "oked_code", "oked_name", True),
+    "krp": ClassifierSpec(Krp, "krp_code", "krp_name", True),
+    "kse": ClassifierSpec(Kse, "kse_code", "kse_name", True),
+    "kfc": ClassifierSpec(Kfc, "kfc_code", "kfc_name", False),
+    "product": ClassifierSpec(Product, "id", "name", True),
+    "tnved": ClassifierSpec(Tnved, "tn_ved_code", "tn_ved_name", False),
+}
+
+CLASSIFIER_BY_MODEL = {spec.model: name for name, spec in CLASSIFIERS.items()}
+
+
+def dumps_json(data):
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _prefix_parents(codes):
+    # родитель кода ТН ВЭД — самый длинный из существующих кодов-префиксов
+    existing = set(codes)
+    parents = {}
+    for code in codes:
+        parents[code] = next(
+            (code[:i] for i in range(len(code) - 1, 0, -1) if code[:i] in existing),
+            None,
+        )
+    return parents
+
+
+class ClassifierSnapshot:
+    """
+    Классификатор целиком в памяти: узлы, дети, готовые JSON плоского
+    списка и дерева. Строится один раз на версию данных.
+    """
+
+    def __init__(self, name, version):
+        spec = CLASSIFIERS[name]
+        self.name = name
+        self.version = version
+        self.etag = f'"{name}-{version}"'
+
+        fields = ["id", spec.code_field, spec.name_field] + (["parent_id"] if spec.parent else [])
+        rows = list(spec.model.objects.order_by(spec.code_field).values_list(*fields))
+
+        code_by_id = {row[0]: str(row[1]) for row in rows}
+        if spec.parent:
+            parents = {str(row[1]): code_by_id.get(row[3]) for row in rows}
+        elif name == "tnved":
+            parents = _prefix_parents([str(row[1]) for row in rows])
+        else:
+            parents = {}
+
+        # id -> код: компании ссылаются на классификатор по id
+        self.code_by_id = code_by_id
+
+        self.nodes = {}
+        self.children = {}
+        self.roots = []
+        for row in rows:
+            code = str(row[1])
+            parent = parents.get(code)
+            self.nodes[code] = {"code": code, "name": row[2], "parent": parent}
+            if parent is None:
+                self.roots.append(code)
+            else:
+                self.children.setdefault(parent, []).append(code)
+
+        self.flat_json = dumps_json(list(self.nodes.values()))
+        self.tree_json = dumps_json([self._subtree(code) for code in self.roots])
+
+    def _subtree(self, code):
+        node = self.nodes[code]
+        return {
+            "code": code,
+            "name": node["name"],
+            "children": [self._subtree(child) for child in self.children.get(code, [])],
+        }
+
+    def node(self, code):
+        node = self.nodes.get(code)
+        if node is None:
+            return None
+        return {**node, "has_children": code in self.children}
+
+    def child_nodes(self, code):
+        return [self.node(child) for child in self.children.get(code, [])]
+
+    def lineage(self, code):
+        # коды от корня до самого узла
+        chain = [code]
+        parent = self.nodes[code]["parent"]
+        while parent is not None and parent not in chain:
+            chain.append(parent)
+            parent = self.nodes[parent]["parent"]
+        chain.reverse()
+        return chain
+
+    def ancestors(self, code):
+        # от корня до непосредственного родителя
+        return [self.node(c) for c in self.lineage(code)[:-1]]
+
+
+_snapshots = {}
+_checked_versions = {}
+_lock = threading.Lock()
+
+
+def current_version(name):
+    """
+    Версия из БД не чаще раза в CLASSIFIER_VERSION_CHECK_SECONDS на процесс:
+    свой процесс узнаёт об изменении сразу (сигналы), остальные — с этой задержкой.
+    """
+    now = time.monotonic()
+    checked = _checked_versions.get(name)
+    if checked is not None and now - checked[1] < settings.CLASSIFIER_VERSION_CHECK_SECONDS:
+        return checked[0]
+
+    version = ClassifierVersion.objects.filter(name=name).values_list("version", flat=True).first() or 0
+    _checked_versions[name] = (version, now)
+    return version
+
+
+def get_snapshot(name):
+    version = current_version(name)
+    snapshot = _snapshots.get(name)
+    if snapshot is not None and snapshot.version == version:
+        return snapshot
+
+    with _lock:
+        snapshot = _snapshots.get(name)
+        if snapshot is None or snapshot.version != version:
+            snapshot = ClassifierSnapshot(name, version)
+            _snapshots[name] = snapshot
+    return snapshot
+
+
+def clear_snapshots():
+    # после отката транзакции (тесты) версия в БД может совпасть со старой
+    with _lock:
+        _snapshots.clear()
+        _checked_versions.clear()
+
+
+def bump_classifier_version(name):
+    updated = ClassifierVersion.objects.filter(name=name).update(version=F("version") + 1)
+    if not updated:
+        _, created = ClassifierVersion.objects.get_or_create(name=name, defaults={"version": 1})
+        if not created:
+            ClassifierVersion.objects.filter(name=name).update(version=F("version") + 1)
+    _checked_versions.pop(name, None)
+
+
+def bump_classifier_versions(names):
+    for name in sorted(names):
+        bump_classifier_version(name)
+
+
+def schedule_version_bump(name):
+    # после коммита: иначе другой процесс может собрать снимок из ещё не видимых данных;
+    # загрузка справочника сохраняет тысячи строк — версия поднимается один раз на транзакцию
+    on_commit_batch("classifier_versions", [name], bump_classifier_versions)
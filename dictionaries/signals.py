@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete, post_save
+
+from .services.classifier_snapshot import CLASSIFIER_BY_MODEL, schedule_version_bump
+
+
+def classifier_changed(sender, **kwargs):
+    schedule_version_bump(CLASSIFIER_BY_MODEL[sender])
+
+
+for model in CLASSIFIER_BY_MODEL:
+    post_save.connect(classifier_changed, sender=model, dispatch_uid=f"classifier_changed_{model.__name__}")
+    post_delete.connect(classifier_changed, sender=model, dispatch_uid=f"classifier_deleted_{model.__name__}")
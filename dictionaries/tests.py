@@ -1,3 +1,167 @@
-from django.test import TestCase
+from django.db.models import F
+from django.test import override_settings
 
-# Create your tests here.
+from company_catalog_api.testing import APITestCase
+from users.models import User
+
+from .models import ClassifierVersion, Kato, Tnved
+from .services.autocomplete import MAX_RESULTS, get_index
+from .services.classifier_snapshot import clear_snapshots, get_snapshot
+
+
+class ClassifierAutocompleteTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        with cls.captureOnCommitCallbacks(execute=True):
+            region = Kato.objects.create(kato_code="750000000", kato_name="г. Алматы")
+            Kato.objects.create(kato_code="751010000", kato_name="Алмалинский район", parent=region)
+            Kato.objects.create(kato_code="751210000", kato_name="Ауэзовский район", parent=region)
+            Tnved.objects.create(tn_ved_code="01", tn_ved_name="Живые животные")
+            Tnved.objects.create(tn_ved_code="0101", tn_ved_name="Лошади, ослы, мулы и лошаки живые")
+            Tnved.objects.create(tn_ved_code="0102", tn_ved_name="Живой крупный рогатый скот")
+
+    def setUp(self):
+        super().setUp()
+        clear_snapshots()
+
+    def codes(self, name, query, limit=10):
+        return [item["code"] for item in get_index(name).search(query, limit)]
+
+    def test_code_prefix_ranks_exact_code_first(self):
+        self.assertEqual(self.codes("tnved", "01"), ["01", "0101", "0102"])
+        self.assertEqual(self.codes("kato", "7510"), ["751010000"])
+
+    def test_name_prefix_before_word_prefix(self):
+        # "Живые животные" — с начала названия, у 0101 "живые" — последнее слово;
+        # "г. Алматы" начинается не с "алма"
+        self.assertEqual(self.codes("tnved", "жив"), ["01", "0102", "0101"])
+        self.assertEqual(self.codes("kato", "алма"), ["751010000", "750000000"])
+
+    def test_words_in_any_order_match_full_path(self):
+        self.assertEqual(self.codes("tnved", "мулы лошади"), ["0101"])
+        self.assertEqual(self.codes("kato", "алматы ауэз"), ["751210000"])
+
+    def test_many_words_match_across_path(self):
+        # частые слова пересекаются по путям, у узла есть хотя бы одно
+        self.assertEqual(self.codes("tnved", "ж л"), ["0101"])
+        self.assertEqual(self.codes("kato", "г а р"), ["751210000", "751010000"])
+        self.assertEqual(self.codes("kato", "район ж"), [])
+
+    def test_index_follows_classifier_version(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Kato.objects.filter(kato_code="751210000").get().delete()
+        self.assertEqual(self.codes("kato", "ауэз"), [])
+
+    def test_endpoint_returns_path(self):
+        response = self.client.get("/dictionaries/kato/autocomplete/", {"q": "ауэз"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [{
+            "code": "751210000",
+            "name": "Ауэзовский район",
+            "path": "г. Алматы / Ауэзовский район",
+        }])
+        self.assertEqual(self.client.get("/dictionaries/kato/autocomplete/", {"q": "а", "limit": 0}).status_code, 400)
+
+
+class ClassifierAdminAutocompleteTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.admin = User.objects.create_superuser(email="admin@example.kz", password="x")
+        with cls.captureOnCommitCallbacks(execute=True):
+            region = Kato.objects.create(kato_code="750000000", kato_name="г. Алматы")
+            Kato.objects.create(kato_code="751210000", kato_name="Ауэзовский район", parent=region)
+            Kato.objects.bulk_create(
+                Kato(kato_code=f"7510{n:05d}", kato_name=f"Село {n}", parent=region)
+                for n in range(MAX_RESULTS + 10)
+            )
+
+    def setUp(self):
+        super().setUp()
+        clear_snapshots()
+        self.client.force_login(self.admin)
+
+    def autocomplete(self, term, page=1):
+        response = self.client.get("/admin/autocomplete/", {
+            "term": term, "page": page,
+            "app_label": "companies", "model_name": "company", "field_name": "kato",
+        })
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_ranked_by_index(self):
+        data = self.autocomplete("алматы ауэз")
+        self.assertEqual([item["text"] for item in data["results"]], ["Ауэзовский район"])
+
+    def pages(self, term):
+        texts = []
+        page, more = 1, True
+        while more:
+            data = self.autocomplete(term, page)
+            texts += [item["text"] for item in data["results"]]
+            more = data["pagination"]["more"]
+            page += 1
+        return texts
+
+    def test_pages_past_max_results_in_index_order(self):
+        # больше MAX_RESULTS совпадений: все страницы — из индекса, в порядке ранга
+        # (короче название — выше); icontains в SQLite "село" бы не нашёл
+        expected = [f"Село {n}" for n in range(MAX_RESULTS + 10)]
+        expected.sort(key=lambda name: (len(name), name))
+        self.assertEqual(self.pages("село"), expected)
+        self.assertEqual(self.pages("алматы с"), expected)
+
+
+class ClassifierSnapshotTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        with cls.captureOnCommitCallbacks(execute=True):
+            Kato.objects.create(kato_code="750000000", kato_name="г. Алматы")
+
+    def setUp(self):
+        super().setUp()
+        clear_snapshots()
+
+    def version(self):
+        return ClassifierVersion.objects.get(name="kato").version
+
+    def test_one_bump_per_transaction(self):
+        before = self.version()
+        with self.captureOnCommitCallbacks(execute=True):
+            region = Kato.objects.get(kato_code="750000000")
+            for n in range(5):
+                Kato.objects.create(kato_code=f"75101{n}000", kato_name=f"Район {n}", parent=region)
+            Tnved.objects.create(tn_ved_code="01", tn_ved_name="Живые животные")
+        self.assertEqual(self.version(), before + 1)
+        self.assertEqual(ClassifierVersion.objects.get(name="tnved").version, 1)
+
+    def test_etag_and_not_modified(self):
+        response = self.client.get("/dictionaries/kato/")
+        etag = response["ETag"]
+        self.assertEqual(self.client.get("/dictionaries/kato/", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Kato.objects.filter(kato_code="750000000").get().delete()
+        response = self.client.get("/dictionaries/kato/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.json(), [])
+
+    def test_snapshot_is_reused_within_check_interval(self):
+        snapshot = get_snapshot("kato")
+        with self.assertNumQueries(0):
+            self.assertIs(get_snapshot("kato"), snapshot)
+
+    def test_version_from_other_process(self):
+        snapshot = get_snapshot("kato")
+        # другой процесс поднял версию: сигналы этого процесса о ней не знают
+        ClassifierVersion.objects.filter(name="kato").update(version=F("version") + 1)
+        with override_settings(CLASSIFIER_VERSION_CHECK_SECONDS=60):
+            self.assertIs(get_snapshot("kato"), snapshot)
+        with override_settings(CLASSIFIER_VERSION_CHECK_SECONDS=0):
+            self.assertEqual(get_snapshot("kato").version, snapshot.version + 1)
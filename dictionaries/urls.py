@@ -0,0 +1,12 @@
+from django.urls import path
+
+from . import views
+
+urlpatterns = [
+    path("<str:name>/", views.ClassifierList.as_view()),
+    path("<str:name>/tree/", views.ClassifierTree.as_view()),
+    path("<str:name>/autocomplete/", views.ClassifierAutocomplete.as_view()),
+    path("<str:name>/<str:code>/", views.ClassifierNode.as_view()),
+    path("<str:name>/<str:code>/children/", views.ClassifierChildren.as_view()),
+    path("<str:name>/<str:code>/ancestors/", views.ClassifierAncestors.as_view()),
+]
@@ -1,3 +1,95 @@
-from django.shortcuts import render
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.views import APIView
 
-# Create your views here.
+from .services.autocomplete import MAX_RESULTS, get_index
+from .services.classifier_snapshot import CLASSIFIERS, dumps_json, get_snapshot
+
+
+class ClassifierView(APIView):
+    """
+    Классификаторы из снимка в памяти (services/classifier_snapshot.py).
+    ETag — версия данных классификатора, поэтому повторный запрос
+    с If-None-Match стоит одного сравнения строк.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get_snapshot(self):
+        name = self.kwargs["name"]
+        if name not in CLASSIFIERS:
+            raise NotFound(f"Неизвестный классификатор: {name}")
+        return get_snapshot(name)
+
+    def get_node_code(self, snapshot):
+        code = self.kwargs["code"]
+        if code not in snapshot.nodes:
+            raise NotFound(f"Код {code} не найден в классификаторе {snapshot.name}")
+        return code
+
+    def render(self, snapshot):
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        snapshot = self.get_snapshot()
+
+        not_modified = get_conditional_response(request, etag=snapshot.etag)
+        if not_modified is None:
+            content = self.render(snapshot)
+            response = HttpResponse(content, content_type="application/json")
+        else:
+            response = not_modified
+
+        response["ETag"] = snapshot.etag
+        patch_cache_control(response, private=True, max_age=settings.CLASSIFIER_CACHE_MAX_AGE)
+        return response
+
+
+class ClassifierList(ClassifierView):
+    def render(self, snapshot):
+        return snapshot.flat_json
+
+
+class ClassifierTree(ClassifierView):
+    def render(self, snapshot):
+        return snapshot.tree_json
+
+
+class ClassifierNode(ClassifierView):
+    def render(self, snapshot):
+        return dumps_json(snapshot.node(self.get_node_code(snapshot)))
+
+
+class ClassifierChildren(ClassifierView):
+    def render(self, snapshot):
+        return dumps_json(snapshot.child_nodes(self.get_node_code(snapshot)))
+
+
+class ClassifierAncestors(ClassifierView):
+    def render(self, snapshot):
+        return dumps_json(snapshot.ancestors(self.get_node_code(snapshot)))
+
+
+class ClassifierAutocomplete(ClassifierView):
+    """
+    ?q=<префикс кода или слов названия>&limit=<до 50>: лучшие совпадения
+    с полным путём от корня. Тот же ETag — ответ зависит только от версии и URL.
+    """
+
+    def get_limit(self):
+        raw = self.request.query_params.get("limit")
+        if raw is None:
+            return settings.CLASSIFIER_AUTOCOMPLETE_LIMIT
+        try:
+            limit = int(raw)
+        except ValueError:
+            raise ValidationError({"limit": "Ожидается целое число."})
+        if not 1 <= limit <= MAX_RESULTS:
+            raise ValidationError({"limit": f"Допустимо от 1 до {MAX_RESULTS}."})
+        return limit
+
+    def render(self, snapshot):
+        query = self.request.query_params.get("q", "")
+        return dumps_json(get_index(snapshot.name).search(query, self.get_limit()))
@@ -0,0 +1,45 @@
+# Generated by Django 6.0 on 2026-10-19 18:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('metrics', '0002_alter_goszakupcustomer_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='taxes',
+            index=models.Index(fields=['year', 'value'], name='taxes_year_value_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='taxes',
+            index=models.Index(fields=['company', 'year'], name='taxes_company_year_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='nds',
+            index=models.Index(fields=['year', 'value'], name='nds_year_value_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='nds',
+            index=models.Index(fields=['company', 'year'], name='nds_company_year_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='goszakupsupplier',
+            index=models.Index(fields=['year', 'value'], name='gz_supplier_year_value_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='goszakupsupplier',
+            index=models.Index(fields=['company', 'year'], name='gz_supplier_company_year_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='goszakupcustomer',
+            index=models.Index(fields=['year', 'value'], name='gz_customer_year_value_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='goszakupcustomer',
+            index=models.Index(fields=['company', 'year'], name='gz_customer_company_year_idx'),
+        ),
+    ]
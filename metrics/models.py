@@ -9,6 +9,11 @@ class Taxes(models.Model):
 
     class Meta:
         db_table = "taxes"
+        indexes = [
+            # рейтинг за год (/companies/top/) и предыдущий год компании для роста
+            models.Index(fields=["year", "value"], name="taxes_year_value_idx"),
+            models.Index(fields=["company", "year"], name="taxes_company_year_idx"),
+        ]
         verbose_name = "Налоги"
         verbose_name_plural = "Налоги"
 
@@ -19,6 +24,11 @@ class Nds(models.Model):
 
     class Meta:
         db_table = "nds"
+        indexes = [
+            # рейтинг за год (/companies/top/) и предыдущий год компании для роста
+            models.Index(fields=["year", "value"], name="nds_year_value_idx"),
+            models.Index(fields=["company", "year"], name="nds_company_year_idx"),
+        ]
         verbose_name = "НДС"
         verbose_name_plural = "НДС"
 
@@ -29,6 +39,11 @@ class GosZakupSupplier(models.Model):
 
     class Meta:
         db_table = "gos_zakup_supplier"
+        indexes = [
+            # рейтинг за год (/companies/top/) и предыдущий год компании для роста
+            models.Index(fields=["year", "value"], name="gz_supplier_year_value_idx"),
+            models.Index(fields=["company", "year"], name="gz_supplier_company_year_idx"),
+        ]
         verbose_name = "Гос. закупки (как поставщик)"
         verbose_name_plural = "Гос. закупки (как поставщик)"
 
@@ -39,5 +54,10 @@ class GosZakupCustomer(models.Model):
 
     class Meta:
         db_table = "gos_zakup_customer"
+        indexes = [
+            # рейтинг за год (/companies/top/) и предыдущий год компании для роста
+            models.Index(fields=["year", "value"], name="gz_customer_year_value_idx"),
+            models.Index(fields=["company", "year"], name="gz_customer_company_year_idx"),
+        ]
         verbose_name = "Гос. закупки (как закупщик)"
         verbose_name_plural = "Гос. закупки (как закупщик)"
\ No newline at end of file
@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     name = 'users'
     verbose_name = "Пользователи"
-    verbose_name_plural = "Пользователи"
\ No newline at end of file
+    verbose_name_plural = "Пользователи"
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,110 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from .models import User
+
+
+# Что из токена и пользователя держится в кэше. На каждый запрос по этим
+# значениям собираются новые экземпляры (from_db): объект пользователя
+# (и его _perm_cache) не делится между запросами и потоками, а прочие
+# поля догружаются из БД только если их кто-то прочитает.
+TOKEN_FIELDS = ("key", "user_id", "created")
+USER_FIELDS = ("id", "email", "is_active", "is_staff", "is_superuser")
+
+CachedToken = namedtuple("CachedToken", ["db", "token_values", "user_values", "expires"])
+
+
+class TokenUserCache:
+    """
+    Ограниченный LRU ключ -> значения полей Token и его пользователя в памяти
+    процесса с коротким TTL. Отзыв токена и деактивация пользователя сбрасывают
+    запись сразу (signals.py); TTL страхует от изменений в обход сигналов
+    (QuerySet.update, другой процесс). Размер и TTL по умолчанию читаются
+    из настроек при каждом обращении.
+    """
+
+    def __init__(self, max_size=None, ttl=None):
+        self._max_size = max_size
+        self._ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def max_size(self):
+        return settings.TOKEN_AUTH_CACHE_SIZE if self._max_size is None else self._max_size
+
+    @property
+    def ttl(self):
+        return settings.TOKEN_AUTH_CACHE_TTL if self._ttl is None else self._ttl
+
+    def get(self, key):
+        """
+        Новый Token с загруженным user или None.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+
+        user = User.from_db(entry.db, USER_FIELDS, entry.user_values)
+        token = Token.from_db(entry.db, TOKEN_FIELDS, entry.token_values)
+        token.user = user
+        return token
+
+    def set(self, key, token):
+        max_size = self.max_size
+        if max_size <= 0:
+            return
+        entry = CachedToken(
+            db=token._state.db,
+            token_values=tuple(getattr(token, f) for f in TOKEN_FIELDS),
+            user_values=tuple(getattr(token.user, f) for f in USER_FIELDS),
+            expires=time.monotonic() + self.ttl,
+        )
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > max_size:
+                self._entries.popitem(last=False)
+
+    def evict_token(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def evict_user(self, user_id):
+        user_id_index = TOKEN_FIELDS.index("user_id")
+        with self._lock:
+            for key in [k for k, entry in self._entries.items() if entry.token_values[user_id_index] == user_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_user_cache = TokenUserCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication без запроса в БД на каждый запрос: пара токен/пользователь
+    берётся из token_user_cache, а в БД идём только при промахе.
+    """
+
+    def authenticate_credentials(self, key):
+        token = token_user_cache.get(key)
+        if token is not None:
+            return (token.user, token)
+
+        user, token = super().authenticate_credentials(key)
+        token_user_cache.set(key, token)
+        return (user, token)
@@ -0,0 +1,18 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import token_user_cache
+from .models import User
+
+
+@receiver(post_delete, sender=Token)
+def token_revoked(sender, instance, **kwargs):
+    token_user_cache.evict_token(instance.key)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    # деактивация, смена прав и т.п. — в кэше не должно остаться старого объекта
+    token_user_cache.evict_user(instance.pk)
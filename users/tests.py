@@ -1,3 +1,56 @@
-from django.test import TestCase
+from django.test import override_settings
+from rest_framework.authtoken.models import Token
 
-# Create your tests here.
+from company_catalog_api.testing import APITestCase
+
+from .authentication import token_user_cache
+
+
+class CachedTokenAuthenticationTests(APITestCase):
+    URL = "/companies/get-company-data/"
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.token = Token.objects.create(user=cls.user)
+
+    def setUp(self):
+        super().setUp()
+        token_user_cache.clear()
+        # вместо force_authenticate — настоящий заголовок с токеном
+        self.client.force_authenticate(None)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def test_second_request_skips_token_lookup(self):
+        # несуществующий БИН: кроме аутентификации — один запрос по индексу БИН
+        url = "/companies/info/000000000000/"
+        with self.assertNumQueries(2):
+            self.assertEqual(self.client.get(url).status_code, 404)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_cached_user_is_not_shared(self):
+        self.client.get(self.URL)
+        first = token_user_cache.get(self.token.key)
+        second = token_user_cache.get(self.token.key)
+        self.assertIsNot(first.user, second.user)
+        self.assertEqual(first.user.pk, self.user.pk)
+        self.assertEqual(first, self.token)
+
+    @override_settings(TOKEN_AUTH_CACHE_SIZE=0)
+    def test_cache_size_read_from_settings(self):
+        self.assertEqual(self.client.get(self.URL).status_code, 200)
+        self.assertIsNone(token_user_cache.get(self.token.key))
+
+    def test_revoked_token_is_rejected(self):
+        self.client.get(self.URL)
+        self.token.delete()
+        self.assertIsNone(token_user_cache.get(self.token.key))
+        self.assertEqual(self.client.get(self.URL).status_code, 403)
+
+    def test_deactivated_user_is_rejected(self):
+        self.client.get(self.URL)
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(token_user_cache.get(self.token.key))
+        self.assertEqual(self.client.get(self.URL).status_code, 403)